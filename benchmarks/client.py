@@ -0,0 +1,109 @@
+# benchmarks/client.py
+"""
+Cliente HTTP e estatísticas compartilhados pelas ferramentas de carga.
+
+Usa apenas a biblioteca padrão (http.client) com uma conexão keep-alive por thread,
+para que o custo medido seja o do servidor e não o do gerador de carga.
+"""
+import http.client
+import json
+import math
+import time
+import uuid
+from urllib.parse import urlsplit
+
+
+class BenchClient:
+    def __init__(self, base_url: str, timeout: float = 60.0):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme or "http"
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or (443 if self.scheme == "https" else 80)
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+        self._conn = None
+
+    def _connect(self):
+        conn_class = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        self._conn = conn_class(self.host, self.port, timeout=self.timeout)
+
+    def request(self, method: str, path: str, body: bytes = None, headers: dict = None):
+        """Executa a requisição e retorna (status, corpo, latência em ms). Status 0 indica falha de rede."""
+        if self._conn is None:
+            self._connect()
+        headers = dict(headers or {})
+        start = time.perf_counter()
+        try:
+            self._conn.request(method, self.prefix + path, body=body, headers=headers)
+            response = self._conn.getresponse()
+            payload = response.read()
+            status = response.status
+            if response.getheader("connection", "").lower() == "close":
+                self.close()
+        except (http.client.HTTPException, OSError):
+            self.close()
+            return 0, b"", (time.perf_counter() - start) * 1000
+        return status, payload, (time.perf_counter() - start) * 1000
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def json_body(data: dict):
+    return json.dumps(data).encode(), {"Content-Type": "application/json"}
+
+
+def multipart_body(fields: dict, files: dict = None):
+    """Monta um corpo multipart/form-data. `files` é {campo: (nome, content_type, bytes)}."""
+    boundary = uuid.uuid4().hex
+    chunks = []
+    for name, value in fields.items():
+        if value is None:
+            continue
+        chunks.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        )
+    for name, (filename, content_type, content) in (files or {}).items():
+        chunks.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n".encode()
+        )
+        chunks.append(content)
+        chunks.append(b"\r\n")
+    chunks.append(f"--{boundary}--\r\n".encode())
+    return b"".join(chunks), {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+
+
+def fake_pdf(size: int) -> bytes:
+    """PDF mínimo válido preenchido até `size` bytes."""
+    header = b"%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n2 0 obj<</Type/Pages/Count 0>>endobj\n"
+    trailer = b"trailer<</Root 1 0 R>>\n%%EOF\n"
+    padding = max(0, size - len(header) - len(trailer))
+    return header + b"%" + b"0" * max(0, padding - 2) + b"\n" + trailer
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Percentil pelo método nearest-rank sobre uma lista já ordenada."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: list, errors: int = 0, elapsed: float = None) -> dict:
+    ordered = sorted(latencies)
+    count = len(ordered)
+    summary = {
+        "requisicoes": count,
+        "erros": errors,
+        "p50_ms": round(percentile(ordered, 50), 2),
+        "p90_ms": round(percentile(ordered, 90), 2),
+        "p95_ms": round(percentile(ordered, 95), 2),
+        "p99_ms": round(percentile(ordered, 99), 2),
+        "max_ms": round(ordered[-1], 2) if ordered else 0.0,
+    }
+    if elapsed is not None:
+        summary["throughput_rps"] = round(count / elapsed, 2) if elapsed > 0 else 0.0
+    return summary
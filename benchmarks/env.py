@@ -0,0 +1,58 @@
+# benchmarks/env.py
+"""
+Prepara as variáveis de ambiente usadas pelo benchmark ANTES de importar qualquer
+módulo de `src` (o `Settings` é instanciado no import de `src.core.config`).
+
+Valores já definidos no ambiente (ou no .env) têm prioridade; aqui só entram os
+padrões necessários para rodar localmente com SQLite e o SMTP sink.
+"""
+import os
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+DATA_DIR = BENCH_DIR / "data"
+
+DEFAULT_SQLITE_URL = f"sqlite:///{DATA_DIR / 'bench.sqlite3'}"
+DEFAULT_SMTP_PORT = 2525
+
+
+def configure_environment(database_url: str = None, smtp_port: int = DEFAULT_SMTP_PORT) -> dict:
+    """Aplica os padrões do benchmark em `os.environ` e retorna o ambiente resultante."""
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+
+    defaults = {
+        "PROJECT_NAME": "IFRO Autoriza (benchmark)",
+        "API_V1_STR": "/api/v1",
+        "BACKEND_CORS_ORIGINS": '["http://localhost"]',
+        "DB_USER": "bench",
+        "DB_PASSWORD": "bench",
+        "DB_SERVER": "localhost",
+        "DB_PORT": "5432",
+        "DB_NAME": "ifroautoriza_bench",
+        "JWT_SECRET": "benchmark-secret",
+        "JWT_ALGORITHM": "HS256",
+        "ACCESS_TOKEN_EXPIRE_MINUTES": "600",
+        "SMTP_USER": "bench",
+        "SMTP_PASS": "bench",
+        "FROM_EMAIL": "nao-responda@ifro.edu.br",
+        "UPLOAD_DIRECTORY": str(DATA_DIR / "uploads"),
+        "ARCHIVE_DIRECTORY": str(DATA_DIR / "arquivo"),
+        "MAX_FILE_SIZE": str(5 * 1024 * 1024),
+        "ALLOWED_FILE_TYPES": '["application/pdf", "image/jpeg", "image/png"]',
+        # Acesso a relacionamento fora do plano de carregamento levanta erro (N+1 aparece como falha)
+        "ORM_STRICT_LOADING": "true",
+    }
+    for key, value in defaults.items():
+        os.environ.setdefault(key, value)
+
+    # Estes sempre apontam para o ambiente local do benchmark
+    os.environ["DATABASE_URL"] = database_url or os.environ.get("BENCH_DATABASE_URL", DEFAULT_SQLITE_URL)
+    os.environ["SMTP_HOST"] = "127.0.0.1"
+    os.environ["SMTP_PORT"] = str(smtp_port)
+    os.environ["SMTP_STARTTLS"] = "false"
+    os.environ["SMTP_USE_CREDENTIALS"] = "false"
+    os.environ["SMTP_VALIDATE_CERTS"] = "false"
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    # Tarefas periódicas não disputam o banco com a carga medida
+    os.environ["SCHEDULER_ENABLED"] = "false"
+    return dict(os.environ)
@@ -0,0 +1,72 @@
+# benchmarks/rate_limit_check.py
+"""
+Confere que o rate limit é um só para todos os workers: sobe a aplicação com 2 workers do uvicorn
+apontando para o mesmo armazenamento, faz mais requisições que o limite, cada uma em uma conexão
+nova (espalhadas entre os workers), e exige que exatamente `limite` passem antes do primeiro 429.
+
+Uso:
+    python -m benchmarks.rate_limit_check
+    python -m benchmarks.rate_limit_check --storage redis://localhost:6379/15
+    python -m benchmarks.rate_limit_check --storage memory://   # mostra o problema: workers × limite
+"""
+import argparse
+import sys
+
+from benchmarks.client import BenchClient
+from benchmarks.env import DATA_DIR, configure_environment
+from benchmarks.run import start_server, wait_until_healthy
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--storage", default=None, help="RATE_LIMIT_STORAGE_URI (padrão: SQLite em benchmarks/data)")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--limit", type=int, default=20, help="Requisições por minuto na rota pública testada")
+    parser.add_argument("--port", type=int, default=8011)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    env = configure_environment()
+    storage = args.storage
+    if storage is None:
+        caminho = DATA_DIR / "rate_limit_check.sqlite3"
+        for arquivo in (caminho, caminho.with_name(caminho.name + "-wal"), caminho.with_name(caminho.name + "-shm")):
+            arquivo.unlink(missing_ok=True)
+        storage = f"sqlite:///{caminho}"
+    env.update({
+        "RATE_LIMIT_ENABLED": "true",
+        "RATE_LIMIT_STORAGE_URI": storage,
+        "RATE_LIMIT_PUBLIC_READ": f"{args.limit}/minute",
+    })
+
+    api_prefix = env["API_V1_STR"]
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = start_server(env, args.port, args.workers)
+    try:
+        wait_until_healthy(server, base_url, api_prefix)
+        statuses = []
+        for _ in range(args.limit * args.workers + 5):
+            # Conexão nova a cada requisição: o kernel distribui entre os workers
+            client = BenchClient(base_url, timeout=10)
+            status, _, _ = client.request("GET", f"{api_prefix}/eventos/publicos", headers={"Connection": "close"})
+            client.close()
+            statuses.append(status)
+    finally:
+        server.terminate()
+        server.wait(timeout=15)
+
+    aceitas = statuses.index(429) if 429 in statuses else len(statuses)
+    print(f"Armazenamento: {storage}; {args.workers} workers; limite {args.limit}/minuto")
+    print(f"Aceitas antes do primeiro 429: {aceitas}; total de 429: {statuses.count(429)}; outros: "
+          f"{sorted(set(s for s in statuses if s not in (200, 429)))}")
+    if aceitas != args.limit or any(s == 200 for s in statuses[aceitas:]):
+        print("FALHA: o limite não é compartilhado entre os workers.")
+        return 1
+    print("OK: os workers dividem o mesmo contador.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
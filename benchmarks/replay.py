@@ -0,0 +1,306 @@
+# benchmarks/replay.py
+"""
+Reproduz o tráfego real registrado em logs/app.log contra uma instância de staging.
+
+Lê as linhas de requisição escritas pelo middleware de `src/main.py`
+("METHOD /caminho" status - 12.34ms, com ou sem o [trace_id] do tracing antes),
+reconstrói o instante de chegada de cada requisição (horário do log menos a
+latência) e as reenvia mantendo os intervalos
+originais, em 1x, 10x ou velocidade máxima. IDs de eventos/autorizações e links
+únicos do log são trocados, de forma consistente, por IDs que existem no staging.
+
+Ao final compara, por rota, a distribuição de latência medida com a registrada.
+
+Uso:
+    python -m benchmarks.replay --target http://staging:8000 --speed 10
+    python -m benchmarks.replay --target http://staging:8000 --speed max --since "2026-10-18 20:30" \\
+        --until "2026-10-18 22:00" --ids ids_staging.json --token $TOKEN --include-writes
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from benchmarks.client import BenchClient, fake_pdf, json_body, multipart_body, summarize
+from benchmarks.env import BENCH_DIR, DATA_DIR
+
+DEFAULT_LOG = BENCH_DIR.parent / "logs" / "app.log"
+
+LOG_LINE = re.compile(
+    # O "[trace_id] " antes da mensagem só existe nos logs escritos com o tracing (src/core/tracing.py)
+    r'^(?P<ts>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}) - \S+ - \w+ - (?:\[[^\]]*\] )?'
+    r'"(?P<method>[A-Z]+) (?P<path>\S+)" (?P<status>\d{3}) - (?P<latency>[\d.]+)ms$'
+)
+UUID = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+# Segmento anterior ao ID -> tipo de ID a ser substituído
+ID_KINDS = {"eventos": "eventos", "evento": "eventos", "autorizacoes": "autorizacoes",
+            "usuarios": "usuarios", "campus": "campus"}
+
+
+def read_log(paths: list, since: datetime = None, until: datetime = None) -> list:
+    """Lê as linhas de requisição dos arquivos (incluindo rotacionados) em ordem de chegada."""
+    entries = []
+    for path in paths:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                match = LOG_LINE.match(line.rstrip("\n"))
+                if not match:
+                    continue
+                finished = datetime.strptime(match["ts"], "%Y-%m-%d %H:%M:%S,%f")
+                latency = float(match["latency"])
+                arrival = finished - timedelta(milliseconds=latency)
+                if (since and arrival < since) or (until and arrival > until):
+                    continue
+                entries.append({
+                    "chegada": arrival, "method": match["method"], "path": match["path"],
+                    "status": int(match["status"]), "latencia_ms": latency,
+                })
+    entries.sort(key=lambda e: e["chegada"])
+    return entries
+
+
+def log_files(log_path: Path) -> list:
+    """app.log e seus arquivos rotacionados (app.log.1 ... app.log.5), do mais antigo ao mais novo."""
+    rotated = [p for p in log_path.parent.glob(log_path.name + ".*") if p.suffix[1:].isdigit()]
+    rotated.sort(key=lambda p: int(p.suffix[1:]), reverse=True)
+    return rotated + ([log_path] if log_path.is_file() else [])
+
+
+def route_template(path: str) -> str:
+    """Troca IDs, links únicos e datas por marcadores para agrupar as latências por rota."""
+    segments = path.split("/")
+    for i, segment in enumerate(segments):
+        if segment.isdigit():
+            segments[i] = "{id}"
+        elif UUID.match(segment):
+            segments[i] = "{link_unico}"
+        elif ISO_DATE.match(segment):
+            segments[i] = "{data}"
+    return "/".join(segments)
+
+
+class IdSubstitution:
+    """Mapeia cada ID do log para um ID do staging, sempre o mesmo para o mesmo valor original."""
+
+    def __init__(self, pools: dict, rng: random.Random):
+        self.pools = pools
+        self.rng = rng
+        self.mapping = defaultdict(dict)
+        self.missing = set()
+
+    def _map(self, kind: str, value: str):
+        pool = self.pools.get(kind)
+        if not pool:
+            self.missing.add(kind)
+            return value
+        if value not in self.mapping[kind]:
+            self.mapping[kind][value] = str(self.rng.choice(pool))
+        return self.mapping[kind][value]
+
+    def apply(self, path: str) -> str:
+        segments = path.split("/")
+        for i, segment in enumerate(segments):
+            if segment.isdigit() and i > 0:
+                kind = ID_KINDS.get(segments[i - 1])
+                if kind:
+                    segments[i] = self._map(kind, segment)
+            elif UUID.match(segment):
+                segments[i] = self._map("links", segment)
+        return "/".join(segments)
+
+
+def discover_pools(client: BenchClient, api_prefix: str, limit: int = 200) -> dict:
+    """Descobre IDs públicos do staging (links e IDs de eventos) quando não há arquivo --ids."""
+    pools = {"links": [], "eventos": [], "campus": []}
+    status, payload, _ = client.request("GET", f"{api_prefix}/campus/")
+    if status == 200:
+        pools["campus"] = [c["id"] for c in json.loads(payload)]
+    status, payload, _ = client.request("GET", f"{api_prefix}/eventos/publicos")
+    if status == 200:
+        pools["links"] = [e["link_unico"] for e in json.loads(payload)][:limit]
+    for link in pools["links"]:
+        status, payload, _ = client.request("GET", f"{api_prefix}/eventos/publico/{link}")
+        if status == 200:
+            pools["eventos"].append(json.loads(payload)["id"])
+    return pools
+
+
+def is_known_write(template: str) -> bool:
+    """Rotas de escrita para as quais sabemos sintetizar um corpo (login e cadastro ficam de fora)."""
+    return template.endswith(("/inscrever-se", "/submeter", "/status", "/pre-cadastrar")) or "/presenca/" in template
+
+
+def build_body(template: str, rng: random.Random, upload: bytes):
+    """Corpo sintético para as rotas de escrita conhecidas (o log não guarda os corpos)."""
+    n = rng.randint(1, 10**9)
+    files = {"arquivo": ("autorizacao.pdf", "application/pdf", upload)}
+    fields = {
+        "email_aluno": f"replay.aluno{n}@estudante.ifro.edu.br",
+        "nome_responsavel": "Responsável Replay",
+        "email_responsavel": f"replay.resp{n}@example.com",
+    }
+    if template.endswith("/inscrever-se"):
+        return multipart_body({**fields, "nome_aluno": f"Aluno Replay {n}"}, files)
+    if template.endswith("/submeter"):
+        return multipart_body(fields, files)
+    if template.endswith("/status"):
+        return json_body({"status": "aprovado"})
+    if "/presenca/" in template:
+        return json_body({"presente_ida": True, "presente_volta": False})
+    if template.endswith("/pre-cadastrar"):
+        return json_body({"nome_aluno": f"Aluno Replay {n}"})
+    return None
+
+
+def replay(entries: list, target: str, speed: float, concurrency: int, substitution: IdSubstitution,
+           token: str = None, include_writes: bool = False, upload_size: int = 300 * 1024) -> dict:
+    """Reenvia as requisições respeitando os intervalos originais divididos por `speed` (0 = máximo)."""
+    upload = fake_pdf(upload_size)
+    local = threading.local()
+    lock = threading.Lock()
+    measured = defaultdict(list)
+    errors = defaultdict(int)
+    lag = []
+    skipped = defaultdict(int)
+
+    def send(entry: dict, scheduled: float):
+        if not hasattr(local, "client"):
+            local.client = BenchClient(target)
+            local.rng = random.Random(threading.get_ident())
+        template = route_template(entry["path"])
+        key = f"{entry['method']} {template}"
+        body, headers = None, {}
+        if entry["method"] != "GET":
+            body, headers = build_body(template, local.rng, upload)
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        delay = time.perf_counter() - scheduled
+        status, _, elapsed_ms = local.client.request(entry["method"], substitution.apply(entry["path"]), body, headers)
+        with lock:
+            measured[key].append(elapsed_ms)
+            lag.append(max(0.0, delay) * 1000)
+            if not 200 <= status < 400:
+                errors[key] += 1
+
+    start_wall = time.perf_counter()
+    origin = entries[0]["chegada"] if entries else None
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for entry in entries:
+            if entry["method"] != "GET":
+                template = route_template(entry["path"])
+                if not (include_writes and is_known_write(template)):
+                    skipped[f"{entry['method']} {template}"] += 1
+                    continue
+            offset = (entry["chegada"] - origin).total_seconds() / speed if speed else 0.0
+            scheduled = start_wall + offset
+            wait = scheduled - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            pool.submit(send, entry, scheduled)
+    elapsed = time.perf_counter() - start_wall
+
+    return {
+        "duracao_s": round(elapsed, 2),
+        "atraso_agendamento": summarize(lag),
+        "ignoradas": dict(skipped),
+        "rotas": {key: summarize(values, errors[key], elapsed) for key, values in sorted(measured.items())},
+    }
+
+
+def recorded_summary(entries: list) -> dict:
+    grouped = defaultdict(list)
+    errors = defaultdict(int)
+    for entry in entries:
+        key = f"{entry['method']} {route_template(entry['path'])}"
+        grouped[key].append(entry["latencia_ms"])
+        if not 200 <= entry["status"] < 400:
+            errors[key] += 1
+    return {key: summarize(values, errors[key]) for key, values in sorted(grouped.items())}
+
+
+def print_comparison(recorded: dict, replayed: dict):
+    print(f"\n{'rota':<66} {'req':>6} {'p50 log':>9} {'p50 novo':>9} {'p95 log':>9} {'p95 novo':>9} {'Δp95':>8}")
+    for key, result in replayed["rotas"].items():
+        base = recorded.get(key, {})
+        base_p95 = base.get("p95_ms", 0)
+        change = f"{(result['p95_ms'] / base_p95 - 1):+.0%}" if base_p95 else "-"
+        print(f"{key:<66} {result['requisicoes']:>6} {base.get('p50_ms', 0):>9.1f} {result['p50_ms']:>9.1f} "
+              f"{base_p95:>9.1f} {result['p95_ms']:>9.1f} {change:>8}")
+    lag = replayed["atraso_agendamento"]
+    print(f"\nAtraso do gerador em relação ao agendamento: p50 {lag['p50_ms']:.1f}ms, p99 {lag['p99_ms']:.1f}ms")
+    if replayed["ignoradas"]:
+        total = sum(replayed["ignoradas"].values())
+        print(f"Requisições de escrita não reproduzidas: {total} (use --include-writes para rotas conhecidas)")
+
+
+def parse_speed(value: str) -> float:
+    if value.lower() in ("max", "maximo", "0"):
+        return 0.0
+    return float(value.lower().rstrip("x"))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Reproduz o tráfego de logs/app.log contra um staging.")
+    parser.add_argument("--target", required=True, help="URL base do staging, ex.: http://staging:8000")
+    parser.add_argument("--log", type=Path, default=DEFAULT_LOG, help="Arquivo de log (rotacionados são incluídos)")
+    parser.add_argument("--api-prefix", default="/api/v1")
+    parser.add_argument("--speed", type=parse_speed, default=1.0, help="1, 10, 10x ou max")
+    parser.add_argument("--since", type=datetime.fromisoformat)
+    parser.add_argument("--until", type=datetime.fromisoformat)
+    parser.add_argument("--route", action="append", help="Reproduz só rotas que contenham este trecho (repetível)")
+    parser.add_argument("--concurrency", type=int, default=64, help="Máximo de requisições simultâneas")
+    parser.add_argument("--ids", type=Path, help='JSON {"eventos": [...], "autorizacoes": [...], "links": [...]}')
+    parser.add_argument("--token", help="Bearer token usado nas rotas autenticadas")
+    parser.add_argument("--include-writes", action="store_true", help="Reproduz também rotas de escrita conhecidas")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    files = log_files(args.log)
+    if not files:
+        print(f"Nenhum log encontrado em {args.log}")
+        return 1
+    entries = read_log(files, args.since, args.until)
+    if args.route:
+        entries = [e for e in entries if any(r in e["path"] for r in args.route)]
+    if not entries:
+        print("Nenhuma requisição no intervalo selecionado.")
+        return 1
+
+    client = BenchClient(args.target)
+    pools = json.loads(args.ids.read_text()) if args.ids else discover_pools(client, args.api_prefix)
+    client.close()
+    substitution = IdSubstitution(pools, random.Random(args.seed))
+
+    span = (entries[-1]["chegada"] - entries[0]["chegada"]).total_seconds()
+    speed_label = f"{args.speed:g}x" if args.speed else "máxima"
+    print(f"Reproduzindo {len(entries)} requisições ({span:.0f}s de tráfego) em velocidade {speed_label}...")
+    replayed = replay(entries, args.target, args.speed, args.concurrency, substitution,
+                      args.token, args.include_writes)
+    recorded = recorded_summary(entries)
+    print_comparison(recorded, replayed)
+    if substitution.missing:
+        print(f"Sem IDs de staging para: {', '.join(sorted(substitution.missing))} (valores originais mantidos)")
+
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    result_path = DATA_DIR / f"replay-{datetime.now():%Y%m%d-%H%M%S}.json"
+    result_path.write_text(json.dumps(
+        {"alvo": args.target, "velocidade": speed_label, "registrado": recorded, "reproduzido": replayed},
+        indent=2, ensure_ascii=False,
+    ))
+    print(f"Resultado salvo em {result_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,235 @@
+# benchmarks/run.py
+"""
+Executa os cenários de carga contra a aplicação FastAPI real e compara com a baseline.
+
+Passos:
+  1. (opcional) popula o banco com `benchmarks.seed`;
+  2. sobe o SMTP sink local e a aplicação (uvicorn) em um subprocesso;
+  3. roda cada cenário com N threads, medindo latência por rota;
+  4. imprime throughput e percentis, salva o resultado em benchmarks/data/ e
+     compara com benchmarks/baselines/<nome>.json, sinalizando regressões.
+
+Uso:
+    python -m benchmarks.run --seed-data --profile quick
+    python -m benchmarks.run --save-baseline
+    python -m benchmarks.run --fail-on-regression --tolerance 0.2
+"""
+import argparse
+import json
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from benchmarks.client import BenchClient, summarize
+from benchmarks.env import BENCH_DIR, DATA_DIR, configure_environment
+
+BASELINE_DIR = BENCH_DIR / "baselines"
+PROJECT_ROOT = BENCH_DIR.parent
+# Diferenças abaixo disso são ruído de medição, mesmo que passem da tolerância relativa
+MIN_ABSOLUTE_DELTA_MS = 2.0
+
+
+def start_server(env: dict, port: int, workers: int) -> subprocess.Popen:
+    command = [
+        sys.executable, "-m", "uvicorn", "src.main:app",
+        "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--log-level", "warning",
+    ]
+    return subprocess.Popen(command, cwd=PROJECT_ROOT, env=env)
+
+
+def wait_until_healthy(server: subprocess.Popen, base_url: str, api_prefix: str, timeout: float = 60.0):
+    client = BenchClient(base_url, timeout=2)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"A aplicação encerrou durante a inicialização (código {server.returncode})")
+        status, _, _ = client.request("GET", f"{api_prefix}/health")
+        if status == 200:
+            client.close()
+            return
+        time.sleep(0.3)
+    raise RuntimeError(f"A aplicação não respondeu em {base_url} após {timeout:.0f}s")
+
+
+def run_scenario(name: str, scenario: dict, ctx, base_url: str, total: int, concurrency: int, seed: int) -> dict:
+    counter = iter(range(total))
+    counter_lock = threading.Lock()
+    results_lock = threading.Lock()
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    status_counts = defaultdict(int)
+
+    def worker(index: int):
+        rng = random.Random(f"{seed}-{name}-{index}")
+        client = BenchClient(base_url)
+        local = []
+        while True:
+            with counter_lock:
+                if next(counter, None) is None:
+                    break
+            rota, method, path, body, headers = scenario["gerar"](ctx, rng)
+            status, _, elapsed_ms = client.request(method, path, body, headers)
+            local.append((rota, status, elapsed_ms))
+        client.close()
+        with results_lock:
+            for rota, status, elapsed_ms in local:
+                latencies[rota].append(elapsed_ms)
+                status_counts[status] += 1
+                if not 200 <= status < 400:
+                    errors[rota] += 1
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    result = summarize(all_latencies, sum(errors.values()), elapsed)
+    result["concorrencia"] = concurrency
+    result["status"] = {str(code): count for code, count in sorted(status_counts.items())}
+    result["rotas"] = {rota: summarize(values, errors[rota], elapsed) for rota, values in sorted(latencies.items())}
+    return result
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    """Retorna a lista de regressões (p95 maior ou throughput menor que a tolerância permite)."""
+    regressions = []
+
+    def check(label: str, cur: dict, base: dict):
+        if not base:
+            return
+        cur_p95, base_p95 = cur.get("p95_ms", 0), base.get("p95_ms", 0)
+        if base_p95 and cur_p95 > base_p95 * (1 + tolerance) and cur_p95 - base_p95 > MIN_ABSOLUTE_DELTA_MS:
+            regressions.append(f"{label}: p95 {base_p95:.1f}ms -> {cur_p95:.1f}ms")
+        cur_rps, base_rps = cur.get("throughput_rps", 0), base.get("throughput_rps", 0)
+        if base_rps and cur_rps < base_rps * (1 - tolerance):
+            regressions.append(f"{label}: throughput {base_rps:.1f} -> {cur_rps:.1f} req/s")
+
+    for name, result in current["cenarios"].items():
+        base = baseline.get("cenarios", {}).get(name)
+        if not base:
+            continue
+        check(name, result, base)
+        for rota, route_result in result["rotas"].items():
+            check(f"{name} {rota}", route_result, base.get("rotas", {}).get(rota))
+    return regressions
+
+
+def print_report(results: dict):
+    print(f"\n{'cenário / rota':<62} {'req':>6} {'err':>5} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for name, result in results["cenarios"].items():
+        print(f"{name:<62} {result['requisicoes']:>6} {result['erros']:>5} {result['throughput_rps']:>8.1f} "
+              f"{result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f}")
+        for rota, route in result["rotas"].items():
+            print(f"  {rota:<60} {route['requisicoes']:>6} {route['erros']:>5} {route['throughput_rps']:>8.1f} "
+                  f"{route['p50_ms']:>8.1f} {route['p95_ms']:>8.1f} {route['p99_ms']:>8.1f}")
+
+
+def parse_args(argv=None):
+    from benchmarks.scenarios import SCENARIOS
+    from benchmarks.seed import PROFILES
+
+    parser = argparse.ArgumentParser(description="Benchmark de carga do IFRO Autoriza.")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="quick")
+    parser.add_argument("--database-url", help="Padrão: SQLite em benchmarks/data/bench.sqlite3")
+    parser.add_argument("--seed-data", action="store_true", help="Recria e popula o banco antes de rodar")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplica a quantidade de requisições de cada cenário")
+    parser.add_argument("--concurrency", type=int, help="Sobrescreve a concorrência de todos os cenários")
+    parser.add_argument("--workers", type=int, default=2, help="Workers do uvicorn")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--smtp-port", type=int, default=2525)
+    parser.add_argument("--upload-size", type=int, default=300 * 1024, help="Tamanho do PDF enviado nas submissões")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", help="Nome da baseline (padrão: o perfil)")
+    parser.add_argument("--save-baseline", action="store_true", help="Grava o resultado como nova baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Piora relativa aceita antes de sinalizar regressão")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Sai com código 1 se houver regressão")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    env = configure_environment(database_url=args.database_url, smtp_port=args.smtp_port)
+
+    from benchmarks.scenarios import SCENARIOS, ScenarioContext, load_targets
+    from benchmarks.seed import PROFILES, seed
+    from benchmarks.smtp_sink import SMTPSink
+
+    if args.seed_data:
+        seed(dict(PROFILES[args.profile]), seed_value=args.seed)
+
+    api_prefix = env["API_V1_STR"]
+    base_url = f"http://127.0.0.1:{args.port}"
+    sink = SMTPSink(port=args.smtp_port).start_in_thread()
+    server = start_server(env, args.port, args.workers)
+    results = {
+        "perfil": args.profile,
+        "banco": env["DATABASE_URL"].split("://")[0],
+        "workers": args.workers,
+        "executado_em": datetime.now().isoformat(timespec="seconds"),
+        "cenarios": {},
+    }
+    try:
+        wait_until_healthy(server, base_url, api_prefix)
+        rng = random.Random(args.seed)
+        ctx = ScenarioContext(api_prefix, args.upload_size)
+        load_targets(ctx, base_url, rng)
+
+        for name in args.scenarios:
+            scenario = SCENARIOS[name]
+            if not getattr(ctx, scenario["requer"]):
+                print(f"Cenário '{name}' ignorado: o banco não tem dados para ele ({scenario['requer']}).")
+                continue
+            total = max(1, int(scenario["requisicoes"] * args.scale))
+            concurrency = args.concurrency or scenario["concorrencia"]
+            print(f"Executando cenário '{name}': {total} requisições, concorrência {concurrency}...")
+            results["cenarios"][name] = run_scenario(name, scenario, ctx, base_url, total, concurrency, args.seed)
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        # O uvicorn encerra de forma graciosa, então as background tasks de e-mail já terminaram
+        results["emails_recebidos"] = sink.messages
+        sink.stop()
+
+    print_report(results)
+    print(f"\nE-mails recebidos pelo SMTP sink: {results['emails_recebidos']}")
+
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    result_path = DATA_DIR / f"resultado-{datetime.now():%Y%m%d-%H%M%S}.json"
+    result_path.write_text(json.dumps(results, indent=2, ensure_ascii=False))
+    print(f"Resultado salvo em {result_path}")
+
+    baseline_path = BASELINE_DIR / f"{args.baseline or args.profile}.json"
+    if args.save_baseline:
+        BASELINE_DIR.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(results, indent=2, ensure_ascii=False))
+        print(f"Baseline gravada em {baseline_path}")
+        return 0
+
+    if not baseline_path.is_file():
+        print(f"Nenhuma baseline em {baseline_path}; use --save-baseline para criar uma.")
+        return 0
+
+    regressions = compare(results, json.loads(baseline_path.read_text()), args.tolerance)
+    if not regressions:
+        print(f"Sem regressões em relação a {baseline_path.name} (tolerância {args.tolerance:.0%}).")
+        return 0
+    print(f"\nREGRESSÕES em relação a {baseline_path.name} (tolerância {args.tolerance:.0%}):")
+    for regression in regressions:
+        print(f"  - {regression}")
+    return 1 if args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+# benchmarks/scenarios.py
+"""
+Cenários roteirizados executados contra a aplicação real.
+
+Cada cenário é um dicionário com a quantidade padrão de requisições, a concorrência e
+uma função `gerar(ctx, rng)` que devolve a próxima requisição como
+(rota, método, caminho, corpo, headers). `rota` é o template usado para agrupar as
+latências (ex.: "GET /eventos/publico/{link_unico}").
+"""
+import json
+import random
+import threading
+from datetime import date, timedelta
+from urllib.parse import urlencode
+
+from benchmarks.client import BenchClient, fake_pdf, json_body, multipart_body
+from benchmarks.seed import BENCH_PASSWORD, random_name
+
+SAMPLE_SIZE = 200
+
+
+class ScenarioContext:
+    """Alvos amostrados do banco e tokens dos professores usados pelos cenários."""
+
+    def __init__(self, api_prefix: str, upload_size: int):
+        self.api = api_prefix
+        self.upload = fake_pdf(upload_size)
+        self.public_events = []      # (id, link_unico, campus_id)
+        self.campus_ids = []
+        self.teacher_events = []     # (evento_id, token)
+        self.pending_reviews = []    # (autorizacao_id, token)
+        self.attendance = []         # (autorizacao_id, data_inicio, data_fim, token)
+        self.preregistered = []      # autorizacao_id
+        self._lock = threading.Lock()
+
+    def pop(self, name: str):
+        with self._lock:
+            pool = getattr(self, name)
+            return pool.pop() if pool else None
+
+
+def load_targets(ctx: ScenarioContext, base_url: str, rng: random.Random):
+    """Amostra eventos, autorizações e professores do banco do benchmark e faz login deles."""
+    from sqlalchemy import func, or_, and_
+    from src.db import models
+    from src.db.session import SessionLocal
+
+    today = date.today()
+    db = SessionLocal()
+    try:
+        future = or_(
+            models.Evento.data_fim >= today,
+            and_(models.Evento.data_fim.is_(None), models.Evento.data_inicio >= today),
+        )
+        ctx.public_events = [
+            tuple(row) for row in db.query(models.Evento.id, models.Evento.link_unico, models.Evento.campus_id)
+            .filter(future).order_by(func.random()).limit(SAMPLE_SIZE).all()
+        ]
+        ctx.campus_ids = [row.id for row in db.query(models.Campus.id).all()]
+        ctx.preregistered = [
+            row.id for row in db.query(models.Autorizacao.id).join(models.Evento)
+            .filter(future, models.Autorizacao.status == "pré-cadastrado")
+            .order_by(func.random()).limit(SAMPLE_SIZE * 10).all()
+        ]
+
+        owned_events = (
+            db.query(models.Evento.id, models.Evento.data_inicio, models.Evento.data_fim, models.Usuario.email)
+            .join(models.Usuario, models.Evento.usuario_id == models.Usuario.id)
+            .filter(models.Usuario.tipo == "professor")
+            .order_by(func.random()).limit(SAMPLE_SIZE // 4).all()
+        )
+        event_ids = [e.id for e in owned_events]
+        submitted = (
+            db.query(models.Autorizacao.id, models.Autorizacao.evento_id)
+            .filter(models.Autorizacao.evento_id.in_(event_ids), models.Autorizacao.status == "submetido").all()
+        )
+        approved = (
+            db.query(models.Autorizacao.id, models.Autorizacao.evento_id)
+            .filter(models.Autorizacao.evento_id.in_(event_ids), models.Autorizacao.status == "aprovado").all()
+        )
+    finally:
+        db.close()
+
+    client = BenchClient(base_url)
+    tokens = {}
+    for event in owned_events:
+        if event.email in tokens:
+            continue
+        body = urlencode({"username": event.email, "password": BENCH_PASSWORD}).encode()
+        status, payload, _ = client.request(
+            "POST", f"{ctx.api}/auth/token", body, {"Content-Type": "application/x-www-form-urlencoded"}
+        )
+        if status == 200:
+            tokens[event.email] = json.loads(payload)["access_token"]
+    client.close()
+
+    by_event = {e.id: e for e in owned_events if e.email in tokens}
+    ctx.teacher_events = [(e.id, tokens[e.email]) for e in by_event.values()]
+    ctx.pending_reviews = [(a.id, tokens[by_event[a.evento_id].email]) for a in submitted if a.evento_id in by_event]
+    ctx.attendance = [
+        (a.id, by_event[a.evento_id].data_inicio, by_event[a.evento_id].data_fim or by_event[a.evento_id].data_inicio,
+         tokens[by_event[a.evento_id].email])
+        for a in approved if a.evento_id in by_event
+    ]
+    rng.shuffle(ctx.pending_reviews)
+    rng.shuffle(ctx.preregistered)
+
+
+def auth_header(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def gerar_publico(ctx: ScenarioContext, rng: random.Random):
+    """Página inicial pública: campi, listagem de eventos, detalhe pelo link e lista de pré-cadastrados."""
+    roll = rng.random()
+    if roll < 0.15:
+        return "GET /campus/", "GET", f"{ctx.api}/campus/", None, {}
+    if roll < 0.45:
+        query = f"?campus_id={rng.choice(ctx.campus_ids)}" if ctx.campus_ids and rng.random() < 0.5 else ""
+        return "GET /eventos/publicos", "GET", f"{ctx.api}/eventos/publicos{query}", None, {}
+    evento_id, link, _ = rng.choice(ctx.public_events)
+    if roll < 0.8:
+        return "GET /eventos/publico/{link_unico}", "GET", f"{ctx.api}/eventos/publico/{link}", None, {}
+    return ("GET /autorizacoes/eventos/{evento_id}/pre-cadastrados", "GET",
+            f"{ctx.api}/autorizacoes/eventos/{evento_id}/pre-cadastrados", None, {})
+
+
+def gerar_submissoes(ctx: ScenarioContext, rng: random.Random):
+    """Submissões em massa com upload de arquivo, por auto-inscrição ou por pré-cadastro."""
+    n = rng.randint(1, 10**9)
+    files = {"arquivo": ("autorizacao.pdf", "application/pdf", ctx.upload)}
+    fields = {
+        "email_aluno": f"bench.aluno{n}@estudante.ifro.edu.br",
+        "nome_responsavel": random_name(rng),
+        "email_responsavel": f"bench.resp{n}@example.com",
+    }
+    autorizacao_id = ctx.pop("preregistered") if rng.random() < 0.4 else None
+    if autorizacao_id:
+        body, headers = multipart_body(fields, files)
+        return "PUT /autorizacoes/{autorizacao_id}/submeter", "PUT", f"{ctx.api}/autorizacoes/{autorizacao_id}/submeter", body, headers
+
+    evento_id, _, _ = rng.choice(ctx.public_events)
+    fields.update({"nome_aluno": random_name(rng), "matricula_aluno": str(rng.randint(10**12, 10**13 - 1))})
+    body, headers = multipart_body(fields, files)
+    return ("POST /autorizacoes/evento/{evento_id}/inscrever-se", "POST",
+            f"{ctx.api}/autorizacoes/evento/{evento_id}/inscrever-se", body, headers)
+
+
+def gerar_revisao(ctx: ScenarioContext, rng: random.Random):
+    """Professor revisando: lista os eventos, abre a lista de autorizações e aprova/rejeita."""
+    roll = rng.random()
+    if roll < 0.3:
+        pending = ctx.pop("pending_reviews")
+        if pending:
+            autorizacao_id, token = pending
+            status = "aprovado" if rng.random() < 0.85 else "rejeitado"
+            body, headers = json_body({"status": status, "motivo": "Documento ilegível." if status == "rejeitado" else None})
+            return ("PATCH /autorizacoes/{autorizacao_id}/status", "PATCH",
+                    f"{ctx.api}/autorizacoes/{autorizacao_id}/status", body, {**headers, **auth_header(token)})
+    evento_id, token = rng.choice(ctx.teacher_events)
+    if roll < 0.5:
+        return "GET /eventos/", "GET", f"{ctx.api}/eventos/", None, auth_header(token)
+    if roll < 0.6:
+        return "GET /eventos/{event_id}", "GET", f"{ctx.api}/eventos/{evento_id}", None, auth_header(token)
+    return ("GET /autorizacoes/eventos/{evento_id}/autorizacoes", "GET",
+            f"{ctx.api}/autorizacoes/eventos/{evento_id}/autorizacoes", None, auth_header(token))
+
+
+def gerar_presenca(ctx: ScenarioContext, rng: random.Random):
+    """Chamada de ida e volta para alunos aprovados em um dia do período do evento."""
+    autorizacao_id, inicio, fim, token = rng.choice(ctx.attendance)
+    dia = inicio + timedelta(days=rng.randint(0, (fim - inicio).days))
+    body, headers = json_body({"presente_ida": True, "presente_volta": rng.random() < 0.7})
+    return ("PATCH /autorizacoes/{autorizacao_id}/presenca/{data_presenca}", "PATCH",
+            f"{ctx.api}/autorizacoes/{autorizacao_id}/presenca/{dia.isoformat()}", body,
+            {**headers, **auth_header(token)})
+
+
+SCENARIOS = {
+    "publico": {"requisicoes": 2000, "concorrencia": 32, "gerar": gerar_publico, "requer": "public_events"},
+    "submissoes": {"requisicoes": 300, "concorrencia": 16, "gerar": gerar_submissoes, "requer": "public_events"},
+    "revisao": {"requisicoes": 600, "concorrencia": 8, "gerar": gerar_revisao, "requer": "teacher_events"},
+    "presenca": {"requisicoes": 600, "concorrencia": 8, "gerar": gerar_presenca, "requer": "attendance"},
+}
@@ -0,0 +1,101 @@
+# benchmarks/serialization.py
+"""
+Microbenchmark da serialização de listas grandes (ex.: evento de 1.500 alunos com presenças).
+
+Compara o caminho clássico do FastAPI (validação no response_model -> jsonable_encoder ->
+json da stdlib) com `dump_orm_list` (validação única + pydantic-core) e com o
+streaming em lotes de `stream_orm_list`.
+
+Uso:
+    python -m benchmarks.serialization --alunos 1500 --dias 5
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import date, datetime, timedelta
+
+from benchmarks.client import percentile
+
+
+def build_rows(alunos: int, dias: int):
+    from src.db import models
+
+    rows = []
+    inicio = date.today()
+    for i in range(alunos):
+        autorizacao = models.Autorizacao(
+            id=i + 1, nome_aluno=f"Aluno {i:05d}", matricula_aluno=f"{2024000000000 + i}",
+            email_aluno=f"aluno{i}@estudante.ifro.edu.br", nome_responsavel=f"Responsável {i}",
+            email_responsavel=f"resp{i}@example.com", status="aprovado",
+            submetido_em=datetime.now(), caminho_arquivo=f"{i}.pdf", nome_arquivo_original="autorizacao.pdf",
+        )
+        autorizacao.presencas = [
+            models.Presenca(id=i * dias + d, autorizacao_id=i + 1, data_presenca=inicio + timedelta(days=d),
+                            presente_ida=True, presente_volta=d % 2 == 0)
+            for d in range(dias)
+        ]
+        rows.append(autorizacao)
+    return rows
+
+
+def classic_path(schema, rows) -> bytes:
+    """O que o FastAPI faz sem o caminho rápido: valida, converte para dicts e usa json.dumps."""
+    from fastapi.encoders import jsonable_encoder
+    from src.utils.serialization import list_adapter
+
+    validated = list_adapter(schema).validate_python(rows, from_attributes=True)
+    return json.dumps(jsonable_encoder(validated)).encode()
+
+
+def streamed_path(schema, rows) -> bytes:
+    from src.utils.serialization import stream_orm_list
+
+    response = stream_orm_list(schema, rows)
+
+    async def consume():
+        return b"".join([chunk async for chunk in response.body_iterator])
+
+    return asyncio.run(consume())
+
+
+def measure(fn, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        payload = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {"p50_ms": percentile(timings, 50), "min_ms": timings[0], "bytes": len(payload)}
+
+
+def main(argv=None):
+    from src.db import schemas
+    from src.utils.serialization import dump_orm_list
+
+    parser = argparse.ArgumentParser(description="Compara os caminhos de serialização de listas grandes.")
+    parser.add_argument("--alunos", type=int, default=1500)
+    parser.add_argument("--dias", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=15)
+    args = parser.parse_args(argv)
+
+    schema = schemas.AuthorizationForProfessor
+    rows = build_rows(args.alunos, args.dias)
+    assert json.loads(classic_path(schema, rows)) == json.loads(dump_orm_list(schema, rows)) == json.loads(streamed_path(schema, rows))
+
+    paths = {
+        "atual (validação + jsonable_encoder + json)": lambda: classic_path(schema, rows),
+        "dump_orm_list (pydantic-core)": lambda: dump_orm_list(schema, rows),
+        "stream_orm_list (lotes de 500)": lambda: streamed_path(schema, rows),
+    }
+    print(f"{args.alunos} autorizações x {args.dias} dias de presença, {args.repeat} repetições")
+    baseline = None
+    for label, fn in paths.items():
+        result = measure(fn, args.repeat)
+        baseline = baseline or result["p50_ms"]
+        print(f"  {label:<46} p50 {result['p50_ms']:8.1f}ms  min {result['min_ms']:8.1f}ms  "
+              f"{result['bytes'] / 1024:8.0f} KiB  ({baseline / result['p50_ms']:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# benchmarks/smtp_sink.py
+"""
+Servidor SMTP mínimo que aceita e descarta todas as mensagens.
+
+Permite exercitar o caminho real do `EmailService` (FastMail + aiosmtplib) durante o
+benchmark sem depender de um servidor de e-mail externo.
+
+Uso avulso:
+    python -m benchmarks.smtp_sink --port 2525
+"""
+import argparse
+import asyncio
+import threading
+
+
+class SMTPSink:
+    def __init__(self, host: str = "127.0.0.1", port: int = 2525):
+        self.host = host
+        self.port = port
+        self.messages = 0
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        writer.write(b"220 ifroautoriza-bench ESMTP\r\n")
+        await writer.drain()
+        in_data = False
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if in_data:
+                    if line.rstrip(b"\r\n") == b".":
+                        in_data = False
+                        self.messages += 1
+                        writer.write(b"250 OK: mensagem descartada\r\n")
+                        await writer.drain()
+                    continue
+
+                command = line[:4].upper()
+                if command == b"EHLO":
+                    writer.write(b"250-localhost\r\n250-8BITMIME\r\n250 SIZE 52428800\r\n")
+                elif command == b"DATA":
+                    in_data = True
+                    writer.write(b"354 Envie a mensagem; termine com <CRLF>.<CRLF>\r\n")
+                elif command == b"QUIT":
+                    writer.write(b"221 Tchau\r\n")
+                    await writer.drain()
+                    break
+                else:
+                    # HELO, MAIL, RCPT, RSET, NOOP...
+                    writer.write(b"250 OK\r\n")
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        async with self._server:
+            await self._server.serve_forever()
+
+    def start_in_thread(self):
+        """Sobe o servidor em uma thread daemon e retorna quando ele já aceita conexões."""
+        started = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port)
+            )
+            started.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="smtp-sink", daemon=True)
+        self._thread.start()
+        started.wait(timeout=10)
+        return self
+
+    def stop(self):
+        if self._loop and self._server:
+            self._loop.call_soon_threadsafe(self._server.close)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SMTP sink local para testes de carga.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2525)
+    args = parser.parse_args()
+    print(f"SMTP sink escutando em {args.host}:{args.port}")
+    asyncio.run(SMTPSink(args.host, args.port).serve())
@@ -0,0 +1,56 @@
+# gunicorn.conf.py
+"""
+Configuração do gunicorn em produção (lida automaticamente quando o comando roda na raiz do projeto):
+
+    gunicorn src.main:app
+
+- preload_app: a aplicação é importada uma vez no master e compartilhada (copy-on-write) pelos
+  workers; cada worker só executa o aquecimento (src/core/warmup.py) antes de aceitar requests.
+- Reinício gradual: `kill -USR2 <master>` (ExecReload do deploy/ifroautoriza.service) sobe um
+  master novo com o código novo; quando ele está pronto, avisa o systemd do novo MAINPID e
+  encerra o master antigo, cujos workers terminam os requests em andamento (graceful_timeout).
+- Os workers dividem os contadores do rate limit pelo SQLite em var/ (src/core/rate_limit.py); com
+  mais de uma máquina atrás do balanceador, aponte RATE_LIMIT_STORAGE_URI para um Redis.
+"""
+import multiprocessing
+import os
+import signal
+
+from gunicorn import systemd
+
+bind = os.getenv("GUNICORN_BIND", "127.0.0.1:8000")
+worker_class = "uvicorn.workers.UvicornWorker"
+# Cada worker tem o próprio pool do SQLAlchemy (5 + 10 de overflow): confira o max_connections do banco
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+
+preload_app = True
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+# Recicla os workers aos poucos (o jitter evita que todos reiniciem ao mesmo tempo)
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "5000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "500"))
+
+pidfile = os.getenv("GUNICORN_PIDFILE") or None
+accesslog = None
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOGLEVEL", "info")
+
+
+def post_fork(server, worker):
+    # Os engines foram criados no master (preload); o worker não pode reutilizar conexões herdadas
+    from src.db.session import engine, replica_engine
+
+    engine.dispose(close=False)
+    if replica_engine is not None:
+        replica_engine.dispose(close=False)
+
+
+def when_ready(server):
+    if not server.master_pid:
+        return
+    # Somos o master novo de um USR2: o systemd passa a acompanhar este processo e o antigo sai
+    systemd.sd_notify(f"MAINPID={os.getpid()}", server.log)
+    server.log.info("Encerrando o master antigo (pid %s)", server.master_pid)
+    os.kill(server.master_pid, signal.SIGTERM)
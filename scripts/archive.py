@@ -0,0 +1,65 @@
+"""
+Arquivo frio dos eventos encerrados (src/services/archive_service.py, migração 0010).
+
+Uso:
+    python scripts/archive.py arquivar [--dry-run] [--limite N]   # eventos encerrados há mais de ARCHIVE_AFTER_DAYS
+    python scripts/archive.py expurgar [--dry-run]                # eventos arquivados além de AUTHORIZATION_RETENTION_DAYS
+    python scripts/archive.py reindexar                           # refaz o índice a partir dos segmentos
+
+O agendador (tarefas `arquivar_eventos` e `retencao_arquivo` em src/services/jobs.py) arquiva e
+expurga todo dia; este script serve para rodar as etapas isoladamente (ex.: a primeira carga, em
+lotes com --limite).
+"""
+import argparse
+import sys
+from pathlib import Path
+from dotenv import load_dotenv
+
+project_root = Path(__file__).resolve().parents[1]
+sys.path.append(str(project_root))
+load_dotenv(dotenv_path=project_root / '.env')
+
+from src.db.session import SessionLocal
+from src.services import archive_service
+from src.utils.logger import logger
+
+
+def archive_command(args):
+    db = SessionLocal()
+    try:
+        eventos, autorizacoes = archive_service.archive_closed_events(db, dry_run=args.dry_run, limite=args.limite)
+    finally:
+        db.close()
+    if not args.dry_run:
+        logger.info(f"Arquivo: {eventos} eventos arquivados ({autorizacoes} autorizações).")
+
+
+def purge_command(args):
+    removidas = archive_service.purge_expired_archive(dry_run=args.dry_run)
+    if not args.dry_run:
+        logger.info(f"Arquivo: {removidas} autorizações removidas pela retenção.")
+
+
+def reindex_command(args):
+    eventos = archive_service.rebuild_index()
+    logger.info(f"Arquivo: índice refeito com {eventos} eventos.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Arquivo frio dos eventos encerrados.")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+    arquivar = subparsers.add_parser("arquivar")
+    arquivar.add_argument("--dry-run", action="store_true")
+    arquivar.add_argument("--limite", type=int, default=None, help="Máximo de eventos nesta execução")
+    arquivar.set_defaults(func=archive_command)
+    expurgar = subparsers.add_parser("expurgar")
+    expurgar.add_argument("--dry-run", action="store_true")
+    expurgar.set_defaults(func=purge_command)
+    subparsers.add_parser("reindexar").set_defaults(func=reindex_command)
+    args = parser.parse_args(argv)
+    args.func(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
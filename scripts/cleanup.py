@@ -1,42 +1,38 @@
-import os
+"""
+Limpeza completa fora de hora: arquivamento, retenção e expurgo dos dados temporários.
+
+As mesmas tarefas rodam sozinhas no agendador dos workers da API (src/services/scheduler.py);
+este script as executa agora, em sequência, com a mesma concessão (não roda junto com um worker
+que já esteja executando a tarefa) e com o resultado registrado no histórico.
+"""
 import sys
-from datetime import datetime, timedelta
 from pathlib import Path
 
 # Adiciona o diretório raiz ao path para importar módulos do projeto
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 from src.db.session import SessionLocal
-from src.db.models import Autorizacao
-from src.services.file_service import delete_file
+from src.services import scheduler
+from src.services.jobs import JOBS
 from src.utils.logger import logger
 
-def cleanup_old_records():
+# Arquivamento antes da retenção: eventos encerrados saem das tabelas quentes para o arquivo frio
+CLEANUP_JOBS = (
+    "arquivar_eventos", "retencao_arquivo", "particoes", "retencao",
+    "codigos_verificacao", "chaves_idempotencia", "uploads_pendentes", "dossies",
+)
+
+if __name__ == "__main__":
     db = SessionLocal()
     try:
-        two_years_ago = datetime.now() - timedelta(days=365*2)
-        
-        old_authorizations = db.query(Autorizacao).filter(Autorizacao.submetido_em < two_years_ago).all()
-        
-        if not old_authorizations:
-            logger.info("Limpeza: Nenhum registro antigo encontrado.")
-            return
-
-        logger.info(f"Limpeza: Encontrados {len(old_authorizations)} registros com mais de 2 anos.")
-        
-        for auth in old_authorizations:
-            if auth.caminho_arquivo:
-                delete_file(auth.caminho_arquivo)
-            db.delete(auth)
-        
-        db.commit()
-        logger.info("Limpeza: Registros e arquivos antigos removidos com sucesso.")
-        
-    except Exception as e:
-        logger.error(f"Erro no script de limpeza: {e}")
-        db.rollback()
+        scheduler.sync_jobs(db)
     finally:
         db.close()
-
-if __name__ == "__main__":
-    cleanup_old_records()
\ No newline at end of file
+    falhas = 0
+    for nome in CLEANUP_JOBS:
+        execucao = scheduler.run_job(JOBS[nome], forcar=True)
+        if execucao is None:
+            logger.info(f"Limpeza: '{nome}' já está em execução em outro worker.")
+        else:
+            falhas += execucao.status == 'erro'
+    sys.exit(1 if falhas else 0)
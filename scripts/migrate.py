@@ -0,0 +1,90 @@
+import sys
+from pathlib import Path
+from dotenv import load_dotenv
+
+# Adiciona a raiz do projeto ao path e carrega o .env antes de importar os módulos do projeto
+project_root = Path(__file__).resolve().parents[1]
+sys.path.append(str(project_root))
+load_dotenv(dotenv_path=project_root / '.env')
+
+from sqlalchemy import text
+
+from src.db.session import engine
+from src.utils.logger import logger
+
+MIGRATIONS_DIR = project_root / 'src' / 'db' / 'migrations'
+# Arquivos com este marcador rodam fora de transação (ex.: CREATE INDEX CONCURRENTLY),
+# um comando por vez; os comandos devem terminar com ';' no fim da linha
+NO_TRANSACTION_MARKER = '-- migracao: sem-transacao'
+# Arquivos com este marcador exigem janela de manutenção: o deploy (--auto) para antes deles e
+# eles são aplicados à mão, rodando o script sem --auto
+MANUAL_MARKER = '-- migracao: manual'
+
+
+def applied_migrations(conn) -> set:
+    conn.execute(text(
+        'CREATE TABLE IF NOT EXISTS schema_migrations ('
+        'nome VARCHAR(255) PRIMARY KEY, aplicada_em TIMESTAMP NOT NULL DEFAULT now())'
+    ))
+    return {row.nome for row in conn.execute(text('SELECT nome FROM schema_migrations'))}
+
+
+def split_statements(sql: str) -> list:
+    statements, current = [], []
+    for line in sql.splitlines():
+        if line.strip().startswith('--') and not current:
+            continue
+        current.append(line)
+        if line.rstrip().endswith(';'):
+            statements.append('\n'.join(current))
+            current = []
+    if ''.join(current).strip():
+        statements.append('\n'.join(current))
+    return statements
+
+
+def run_migrations(dry_run: bool = False, auto: bool = False):
+    """
+    Aplica, em ordem, os arquivos .sql de src/db/migrations que ainda não constam em schema_migrations.
+    As migrações são escritas para PostgreSQL e pressupõem o schema base criado a partir de src/db/models.py.
+    Com `auto` (deploy), para com SystemExit(2) na primeira migração marcada como manual, sem aplicá-la.
+    """
+    if engine.dialect.name != 'postgresql':
+        logger.warning(f"Migrações ignoradas: o banco '{engine.dialect.name}' não é PostgreSQL.")
+        return []
+
+    with engine.begin() as conn:
+        done = applied_migrations(conn)
+
+    pending = [path for path in sorted(MIGRATIONS_DIR.glob('*.sql')) if path.name not in done]
+    if not pending:
+        logger.info("Migrações: banco já está atualizado.")
+        return []
+
+    for path in pending:
+        sql = path.read_text(encoding='utf-8')
+        if dry_run:
+            print(f"[pendente] {path.name}{' (manual)' if MANUAL_MARKER in sql else ''}")
+            continue
+        if auto and MANUAL_MARKER in sql:
+            logger.error(
+                f"Migrações: {path.name} exige janela de manutenção e não é aplicada no deploy; "
+                f"aplique com 'python scripts/migrate.py' e repita o deploy."
+            )
+            raise SystemExit(2)
+        logger.info(f"Migrações: aplicando {path.name}...")
+        if NO_TRANSACTION_MARKER in sql:
+            with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+                for statement in split_statements(sql):
+                    conn.exec_driver_sql(statement)
+                conn.execute(text('INSERT INTO schema_migrations (nome) VALUES (:nome)'), {'nome': path.name})
+        else:
+            with engine.begin() as conn:
+                conn.exec_driver_sql(sql)
+                conn.execute(text('INSERT INTO schema_migrations (nome) VALUES (:nome)'), {'nome': path.name})
+        logger.info(f"Migrações: {path.name} aplicada.")
+    return [path.name for path in pending]
+
+
+if __name__ == "__main__":
+    run_migrations(dry_run='--dry-run' in sys.argv, auto='--auto' in sys.argv)
@@ -0,0 +1,72 @@
+"""
+Manutenção das partições semestrais de Autorizacoes e Presencas (migração 0009).
+
+Uso:
+    python scripts/partitions.py listar
+    python scripts/partitions.py criar [--semestres N]     # atual + N seguintes (padrão: PARTITIONS_AHEAD_SEMESTERS)
+    python scripts/partitions.py expurgar [--dry-run]      # semestres além de AUTHORIZATION_RETENTION_DAYS
+
+O `criar` e o `expurgar` rodam todo dia nas tarefas `particoes` e `retencao` do agendador
+(src/services/jobs.py), para que as partições existam antes das primeiras submissões de cada semestre.
+"""
+import argparse
+import sys
+from pathlib import Path
+from dotenv import load_dotenv
+
+project_root = Path(__file__).resolve().parents[1]
+sys.path.append(str(project_root))
+load_dotenv(dotenv_path=project_root / '.env')
+
+from sqlalchemy import text
+
+from src.db.session import SessionLocal
+from src.services import partitions
+from src.utils.logger import logger
+
+
+def list_command(db, args):
+    for partition in partitions.list_partitions(db):
+        total = db.execute(text(f'SELECT count(*) FROM "Autorizacoes_{partition.sufixo}"')).scalar()
+        print(f"{partition.sufixo}  {partition.inicio:%Y-%m-%d} a {partition.fim:%Y-%m-%d}  {total} autorizações")
+    na_padrao = db.execute(text(f'SELECT count(*) FROM "Autorizacoes_{partitions.DEFAULT_SUFFIX}"')).scalar()
+    print(f"{partitions.DEFAULT_SUFFIX}  (fora dos semestres)  {na_padrao} autorizações")
+
+
+def create_command(db, args):
+    sufixos = partitions.ensure_partitions(db, args.semestres)
+    db.commit()
+    logger.info(f"Partições: semestres garantidos: {', '.join(sufixos)}.")
+
+
+def purge_command(db, args):
+    removidas = partitions.purge_expired_partitions(db, dry_run=args.dry_run)
+    if not args.dry_run:
+        logger.info(f"Partições: {removidas} autorizações removidas.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manutenção das partições de Autorizacoes e Presencas.")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+    subparsers.add_parser("listar").set_defaults(func=list_command)
+    criar = subparsers.add_parser("criar")
+    criar.add_argument("--semestres", type=int, default=None)
+    criar.set_defaults(func=create_command)
+    expurgar = subparsers.add_parser("expurgar")
+    expurgar.add_argument("--dry-run", action="store_true")
+    expurgar.set_defaults(func=purge_command)
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        if not partitions.is_partitioned(db):
+            logger.warning("Partições: Autorizacoes não é particionada (migração 0009 não aplicada ou banco não PostgreSQL).")
+            return 1
+        args.func(db, args)
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
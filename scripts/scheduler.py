@@ -0,0 +1,111 @@
+"""
+Tarefas periódicas (src/services/scheduler.py, migração 0011). Normalmente os próprios workers da
+API as executam; este script serve para acompanhar e para rodar uma tarefa fora de hora.
+
+Uso:
+    python scripts/scheduler.py listar [--dias N]             # agenda, próxima execução e métricas
+    python scripts/scheduler.py executar NOME [NOME ...]      # executa já (respeita a concessão de outro worker)
+    python scripts/scheduler.py executar --vencidas           # só as vencidas, como a thread dos workers
+    python scripts/scheduler.py historico NOME [--limite N]   # últimas execuções da tarefa
+"""
+import argparse
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from dotenv import load_dotenv
+
+project_root = Path(__file__).resolve().parents[1]
+sys.path.append(str(project_root))
+load_dotenv(dotenv_path=project_root / '.env')
+
+from src.db import models
+from src.db.session import SessionLocal
+from src.services import scheduler
+from src.services.jobs import JOBS
+
+
+def _format(momento):
+    return f"{momento:%d/%m/%Y %H:%M}" if momento else "-"
+
+
+def list_command(args):
+    db = SessionLocal()
+    try:
+        scheduler.sync_jobs(db)
+        metricas = scheduler.job_metrics(db, desde=datetime.now() - timedelta(days=args.dias))
+    finally:
+        db.close()
+    print(f"{'tarefa':<22} {'agenda':<14} {'próxima':<17} {'exec.':>5} {'erros':>5} {'média ms':>9} {'máx. ms':>8}  última")
+    for metrica in metricas:
+        media = f"{metrica.duracao_media_ms:.0f}" if metrica.duracao_media_ms is not None else "-"
+        ultima = f"{_format(metrica.ultima_execucao)} {metrica.ultimo_status}" if metrica.ultima_execucao else "-"
+        if metrica.executor:
+            ultima += f" (em execução por {metrica.executor})"
+        print(
+            f"{metrica.nome:<22} {metrica.agenda:<14} {_format(metrica.proxima_execucao):<17} {metrica.execucoes:>5} "
+            f"{metrica.erros:>5} {media:>9} {metrica.duracao_maxima_ms or '-':>8}  {ultima}"
+        )
+        if metrica.ultimo_status == 'erro' and metrica.ultimo_erro:
+            print(f"{'':<22} erro: {metrica.ultimo_erro.splitlines()[0]}")
+
+
+def run_command(args):
+    db = SessionLocal()
+    try:
+        scheduler.sync_jobs(db)
+    finally:
+        db.close()
+    if args.vencidas:
+        print(f"{scheduler.run_due_jobs()} tarefas vencidas executadas.")
+        return 0
+
+    desconhecidas = [nome for nome in args.nomes if nome not in JOBS]
+    if desconhecidas or not args.nomes:
+        print(f"Informe as tarefas ({', '.join(JOBS)}) ou --vencidas.", file=sys.stderr)
+        return 2
+    falhas = 0
+    for nome in args.nomes:
+        execucao = scheduler.run_job(JOBS[nome], forcar=True)
+        if execucao is None:
+            print(f"{nome}: em execução em outro worker.")
+            continue
+        print(f"{nome}: {execucao.status} em {execucao.duracao_ms}ms ({execucao.itens if execucao.itens is not None else '-'} itens).")
+        falhas += execucao.status == 'erro'
+    return 1 if falhas else 0
+
+
+def history_command(args):
+    db = SessionLocal()
+    try:
+        execucoes = db.query(models.ExecucaoTarefa).filter(
+            models.ExecucaoTarefa.tarefa == args.nome
+        ).order_by(models.ExecucaoTarefa.id.desc()).limit(args.limite).all()
+    finally:
+        db.close()
+    for execucao in execucoes:
+        duracao = f"{execucao.duracao_ms}ms" if execucao.duracao_ms is not None else "-"
+        itens = execucao.itens if execucao.itens is not None else "-"
+        linha = f"{_format(execucao.iniciada_em)}  {execucao.status:<10} {duracao:>9}  {itens!s:>6} itens  {execucao.executor}"
+        print(linha + (f"\n    {execucao.erro}" if execucao.erro else ""))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tarefas periódicas da aplicação.")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+    listar = subparsers.add_parser("listar")
+    listar.add_argument("--dias", type=int, default=7, help="Período das métricas")
+    listar.set_defaults(func=list_command)
+    executar = subparsers.add_parser("executar")
+    executar.add_argument("nomes", nargs="*")
+    executar.add_argument("--vencidas", action="store_true")
+    executar.set_defaults(func=run_command)
+    historico = subparsers.add_parser("historico")
+    historico.add_argument("nome", choices=list(JOBS))
+    historico.add_argument("--limite", type=int, default=20)
+    historico.set_defaults(func=history_command)
+    args = parser.parse_args(argv)
+    return args.func(args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,18 @@
 # src/api/deps.py
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session, joinedload # Importar joinedload
+from sqlalchemy.orm import Session
+from typing import Optional
 from jose import JWTError, jwt
 
 from src.core.config import settings
 from src.db import models
+from src.db.load_plans import AUTHORIZATION_FULL
+from src.db.routing import read_session
 from src.db.session import SessionLocal
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/token")
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/token", auto_error=False)
 
 def get_db():
     db = SessionLocal()
@@ -17,12 +21,25 @@ def get_db():
     finally:
         db.close()
 
+def get_read_db(request: Request):
+    """Sessão das rotas só de leitura: réplica quando configurada e disponível, senão o primário."""
+    db = read_session(request)
+    try:
+        yield db
+    finally:
+        db.close()
+
 def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> models.Usuario:
+    return get_user_from_token(db, token)
+
+def get_user_from_token(db: Session, token: Optional[str]) -> models.Usuario:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Não foi possível validar as credenciais",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    if not token:
+        raise credentials_exception
     try:
         payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
         email: str = payload.get("sub")
@@ -44,6 +61,25 @@ def get_current_active_user(current_user: models.Usuario = Depends(get_current_u
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Usuário inativo")
     return current_user
 
+def get_current_active_reader(db: Session = Depends(get_read_db), token: str = Depends(oauth2_scheme)) -> models.Usuario:
+    """Como get_current_active_user, mas na mesma sessão de leitura da rota (uma conexão por requisição)."""
+    return get_current_active_user(get_user_from_token(db, token))
+
+def get_current_stream_user(
+    header_token: Optional[str] = Depends(oauth2_scheme_optional),
+    token: Optional[str] = Query(None, description="Alternativa ao cabeçalho Authorization, que o EventSource do navegador não envia."),
+) -> models.Usuario:
+    """
+    Autenticação dos streams de longa duração: usa uma sessão própria, fechada logo em seguida,
+    para que o stream não segure uma conexão do pool enquanto estiver aberto.
+    """
+    db = SessionLocal()
+    try:
+        user = get_user_from_token(db, header_token or token)
+        return get_current_active_user(user)
+    finally:
+        db.close()
+
 def get_current_active_admin(current_user: models.Usuario = Depends(get_current_active_user)) -> models.Usuario:
     if current_user.tipo != 'admin':
         raise HTTPException(
@@ -66,19 +102,30 @@ def get_event_by_id_for_user(
         
     return event
 
-def get_authorization_by_id_for_user(
-    autorizacao_id: int,
+def get_event_version_for_user(
+    event_id: int,
     db: Session = Depends(get_db),
     current_user: models.Usuario = Depends(get_current_active_user)
+) -> int:
+    """Como get_event_by_id_for_user, mas lê só a versão (para o ETag) sem carregar o evento."""
+    row = db.query(models.Evento.versao, models.Evento.usuario_id).filter(models.Evento.id == event_id).first()
+    if not row:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Evento não encontrado")
+
+    if current_user.tipo != 'admin' and row.usuario_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Ação não permitida")
+
+    return row.versao
+
+def _authorization_for_user(
+    db: Session, autorizacao_id: int, current_user: models.Usuario, bloquear: bool = False
 ) -> models.Autorizacao:
-    """
-    Busca uma autorização e verifica se o usuário atual (professor ou admin) tem permissão para acessá-la.
-    """
-    # --- CORREÇÃO AQUI: Adicionado joinedload para carregar as presenças ---
-    autorizacao = db.query(models.Autorizacao).options(
-        joinedload(models.Autorizacao.presencas)
-    ).filter(models.Autorizacao.id == autorizacao_id).first()
-    # --- FIM DA CORREÇÃO ---
+    # O evento é lido na verificação de dono e as presenças vão na resposta ao professor
+    query = db.query(models.Autorizacao).options(*AUTHORIZATION_FULL).filter(models.Autorizacao.id == autorizacao_id)
+    if bloquear:
+        # Só a linha da autorização: o evento vem de um LEFT JOIN, que não aceita FOR UPDATE
+        query = query.with_for_update(of=models.Autorizacao)
+    autorizacao = query.first()
 
     if not autorizacao:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Autorização não encontrada")
@@ -86,4 +133,26 @@ def get_authorization_by_id_for_user(
     if current_user.tipo != 'admin' and autorizacao.evento.usuario_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Ação não permitida")
         
-    return autorizacao
\ No newline at end of file
+    return autorizacao
+
+def get_authorization_by_id_for_user(
+    autorizacao_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.Usuario = Depends(get_current_active_user)
+) -> models.Autorizacao:
+    """
+    Busca uma autorização e verifica se o usuário atual (professor ou admin) tem permissão para acessá-la.
+    """
+    return _authorization_for_user(db, autorizacao_id, current_user)
+
+def get_authorization_by_id_for_update(
+    autorizacao_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.Usuario = Depends(get_current_active_user)
+) -> models.Autorizacao:
+    """
+    Como get_authorization_by_id_for_user, com a linha bloqueada (FOR UPDATE) até o commit. Para as
+    rotas que aplicam deltas aos contadores a partir do estado lido: dois "aprovar" simultâneos não
+    descontam duas vezes o mesmo submetido.
+    """
+    return _authorization_for_user(db, autorizacao_id, current_user, bloquear=True)
\ No newline at end of file
@@ -0,0 +1,92 @@
+# src/api/endpoints/archive.py
+"""
+Consulta (somente leitura) ao arquivo frio dos eventos encerrados. A busca usa apenas o índice
+em memória; o detalhe do evento abre o segmento dele. Admin vê todos os eventos; professor, os seus.
+"""
+import time
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from src.api.deps import get_current_active_reader
+from src.core.config import settings
+from src.db import models, schemas
+from src.services import archive_service
+from src.services.storage import get_storage
+
+router = APIRouter()
+
+
+def _event_info(entrada: dict) -> dict:
+    return {
+        "id": entrada["evento"], "titulo": entrada["titulo"], "data_inicio": entrada["data_inicio"],
+        "data_fim": entrada["data_fim"], "campus_id": entrada["campus"], "usuario_id": entrada["usuario"],
+        "total_autorizacoes": entrada["autorizacoes"], "arquivado_em": entrada["arquivado_em"],
+    }
+
+
+def _download(arquivo: dict) -> Optional[schemas.PresignedTransfer]:
+    if not arquivo["presente"]:
+        return None
+    expires_in = settings.STORAGE_PRESIGN_EXPIRES_SECONDS
+    url = get_storage().presign_get(arquivo["chave"], arquivo["nome_original"], arquivo["tipo"], expires_in)
+    return schemas.PresignedTransfer(url=url, metodo="GET", expira_em=datetime.fromtimestamp(time.time() + expires_in))
+
+
+@router.get("/busca", response_model=schemas.ArchiveSearchPage)
+def search_archive(
+    q: Optional[str] = Query(None, min_length=2, max_length=100, description="Nome do aluno, matrícula ou responsável."),
+    matricula: Optional[str] = Query(None, max_length=50),
+    evento_id: Optional[int] = None,
+    pagina: int = Query(1, ge=1, le=50),
+    limite: int = Query(20, ge=1, le=100),
+    current_user: models.Usuario = Depends(get_current_active_reader)
+):
+    """Autorizações arquivadas, do evento mais recente para o mais antigo (ignora acentos e maiúsculas)."""
+    if not (q or matricula or evento_id):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Informe q, matricula ou evento_id.")
+
+    hits = archive_service.index.search(
+        termo=q, matricula=matricula, evento_id=evento_id,
+        usuario_id=None if current_user.tipo == 'admin' else current_user.id,
+    )
+    inicio = (pagina - 1) * limite
+    itens = [
+        {
+            "id": autorizacao["autorizacao"],
+            "nome_aluno": autorizacao["nome_aluno"],
+            "matricula_aluno": autorizacao["matricula_aluno"],
+            "nome_responsavel": autorizacao["nome_responsavel"],
+            "status": autorizacao["status"],
+            "evento": _event_info(evento),
+        }
+        for autorizacao, evento in hits[inicio:inicio + limite]
+    ]
+    return {"itens": itens, "pagina": pagina, "limite": limite, "tem_mais": len(hits) > inicio + limite}
+
+
+@router.get("/eventos/{evento_id}", response_model=schemas.ArchivedEvent)
+def read_archived_event(evento_id: int, current_user: models.Usuario = Depends(get_current_active_reader)):
+    """Evento arquivado completo: autorizações, presenças e links de curta duração para os arquivos."""
+    entrada = archive_service.index.event(evento_id)
+    if entrada is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Evento não encontrado no arquivo.")
+    if current_user.tipo != 'admin' and entrada["usuario"] != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Ação não permitida")
+
+    try:
+        evento, autorizacoes = archive_service.read_segment(entrada["segmento"])
+    except FileNotFoundError:
+        # Removido por outro processo (exclusão ou retenção) depois da última leitura do índice
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Evento não encontrado no arquivo.")
+
+    for autorizacao in autorizacoes:
+        if autorizacao["arquivo"]:
+            autorizacao["arquivo"]["download"] = _download(autorizacao["arquivo"])
+    return {
+        **_event_info(entrada),
+        "descricao": evento["descricao"], "horario": evento["horario"],
+        "local_evento": evento["local_evento"], "observacoes": evento["observacoes"],
+        "autorizacoes": autorizacoes,
+    }
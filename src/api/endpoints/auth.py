@@ -1,15 +1,18 @@
 # src/api/endpoints/auth.py
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Request
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 import random
 
 from src.api.deps import get_db
+from src.core.config import settings
+from src.core.rate_limit import get_account_key, limiter, login_account_limit, login_ip_limit
 from src.core.security import create_access_token, verify_password, get_password_hash
 from src.db import models, schemas
 from src.utils.logger import logger
 from src.services.email_service import EmailService
+from src.services.campus_registry import registry as campus_registry
 
 router = APIRouter()
 
@@ -20,7 +23,11 @@ def generate_verification_code() -> str:
 # --- FLUXO DE CADASTRO DE PROFESSOR ---
 
 @router.post("/register/request-code", status_code=status.HTTP_200_OK)
+@limiter.limit(settings.RATE_LIMIT_LOGIN, key_func=get_account_key)
+@login_account_limit
+@login_ip_limit
 async def request_registration_code(
+    request: Request,
     user_in: schemas.ProfessorRegisterRequest,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
@@ -35,7 +42,7 @@ async def request_registration_code(
             detail="Cadastro permitido apenas para e-mails institucionais (@ifro.edu.br)."
         )
     
-    campus = db.query(models.Campus).filter(models.Campus.id == user_in.campus_id).first()
+    campus = campus_registry.get(db, user_in.campus_id)
     if not campus:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -70,7 +77,10 @@ async def request_registration_code(
     return {"message": "Código de verificação enviado para o seu e-mail."}
 
 @router.post("/register/verify-code", status_code=status.HTTP_200_OK)
-def verify_registration_code(form_data: schemas.VerifyCode, db: Session = Depends(get_db)):
+@limiter.limit(settings.RATE_LIMIT_LOGIN, key_func=get_account_key)
+@login_account_limit
+@login_ip_limit
+def verify_registration_code(request: Request, form_data: schemas.VerifyCode, db: Session = Depends(get_db)):
     """
     Passo 2 do Cadastro: Verifica se o código fornecido é válido.
     """
@@ -81,7 +91,10 @@ def verify_registration_code(form_data: schemas.VerifyCode, db: Session = Depend
     return {"message": "Código verificado com sucesso. Prossiga para criar sua senha."}
 
 @router.post("/register/set-password", status_code=status.HTTP_200_OK)
-def set_registration_password(form_data: schemas.SetPassword, db: Session = Depends(get_db)):
+@limiter.limit(settings.RATE_LIMIT_LOGIN, key_func=get_account_key)
+@login_account_limit
+@login_ip_limit
+def set_registration_password(request: Request, form_data: schemas.SetPassword, db: Session = Depends(get_db)):
     """
     Passo 3 do Cadastro: Define a senha e ativa o usuário.
     """
@@ -101,7 +114,11 @@ def set_registration_password(form_data: schemas.SetPassword, db: Session = Depe
 # --- FLUXO DE RECUPERAÇÃO DE SENHA ---
 
 @router.post("/password-reset/request-code", status_code=status.HTTP_200_OK)
+@limiter.limit(settings.RATE_LIMIT_LOGIN, key_func=get_account_key)
+@login_account_limit
+@login_ip_limit
 async def request_password_reset_code(
+    request: Request,
     form_data: schemas.RequestCode,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
@@ -125,8 +142,11 @@ async def request_password_reset_code(
 # --- LOGIN (TOKEN) ---
 
 @router.post("/token", response_model=schemas.Token)
+@limiter.limit(settings.RATE_LIMIT_LOGIN, key_func=get_account_key)
+@login_account_limit
+@login_ip_limit
 def login_for_access_token(
-    db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()
+    request: Request, db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()
 ):
     """
     Endpoint para login e obtenção de token JWT.
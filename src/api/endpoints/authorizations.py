@@ -1,22 +1,53 @@
 # src/api/endpoints/authorizations.py
 from fastapi import (APIRouter, Depends, HTTPException, BackgroundTasks, 
-                     UploadFile, File, Form, status)
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session, joinedload
-from pathlib import Path
-from typing import List
+                     UploadFile, File, Form, Header, Query, Request, Response, status)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, RedirectResponse, StreamingResponse
+from sqlalchemy import and_, or_, func, literal, select, text
+from sqlalchemy.orm import Session
+from typing import List, Literal, Optional
+import asyncio
 import re
-from datetime import date
+import time
+from collections import defaultdict
+from datetime import date, datetime
+from pydantic import EmailStr, TypeAdapter, ValidationError
 
-from src.api.deps import get_db, get_current_active_user, get_authorization_by_id_for_user, get_event_by_id_for_user
+from src.api.deps import (get_db, get_read_db, get_current_active_user, get_current_active_reader,
+                          get_current_stream_user, get_authorization_by_id_for_user,
+                          get_authorization_by_id_for_update, get_event_by_id_for_user)
 from src.db import models, schemas
+from src.db.load_plans import AUTHORIZATION_WITH_ATTENDANCE, AUTHORIZATION_WITH_EVENT, refresh_plan
+from src.db.session import SessionLocal
 from src.services.email_service import EmailService
-from src.services.file_service import save_upload_file
+from src.services.storage import get_storage
+from src.services.upload_staging import store_submission_file
+from src.services import change_feed, idempotency, realtime, stats_service
+from src.services.partitions import since_event
+from src.utils.http_cache import etag_matches, event_etag, not_modified, set_etag
 from src.utils.logger import logger
+from src.utils.pagination import decode_cursor, encode_cursor
+from src.utils.serialization import orm_list_response, orm_response
 from src.core.config import settings
+from src.core.rate_limit import get_client_key, limiter, upload_ip_limit
 
 router = APIRouter()
 
+email_adapter = TypeAdapter(EmailStr)
+
+# Intervalo de reconexão sugerido ao EventSource e nova tentativa quando o aviso chega antes
+# de a versão ficar visível (uma transação mais antiga ainda aberta segura o limite do feed)
+SSE_RETRY_MS = 5000
+SSE_PENDING_RECHECK_SECONDS = 1.0
+
+# Limiar do pg_trgm para a busca entre eventos; abaixo do padrão (0,6) para tolerar erros de digitação
+SEARCH_SIMILARITY_THRESHOLD = 0.4
+
+def reject_archived_event(db_event: models.Evento):
+    """As autorizações de um evento arquivado estão no arquivo frio; novas ficariam fora dele."""
+    if db_event.arquivado_em:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Evento arquivado: não recebe novas autorizações.")
+
 # ... (função clean_and_validate_matricula permanece a mesma) ...
 def clean_and_validate_matricula(matricula: str) -> str:
     if not matricula:
@@ -29,6 +60,17 @@ def clean_and_validate_matricula(matricula: str) -> str:
         )
     return cleaned
 
+def validate_submission_emails(email_aluno: str, email_responsavel: str):
+    """Valida os e-mails recebidos via Form, que não passam por um schema Pydantic."""
+    for label, value in (("do aluno", email_aluno), ("do responsável", email_responsavel)):
+        try:
+            email_adapter.validate_python(value)
+        except ValidationError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"O e-mail {label} é inválido.")
+
+    if email_aluno.lower() == email_responsavel.lower():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="O e-mail do aluno e do responsável não podem ser iguais.")
+
 # =================================================================
 # ROTAS DO PROFESSOR/ADMINISTRADOR
 # =================================================================
@@ -41,7 +83,7 @@ def preregister_student(
     db: Session = Depends(get_db)
 ):
     """Pré-cadastra um aluno em um evento, inserindo apenas nome e matrícula."""
-    
+    reject_archived_event(db_event)
     cleaned_matricula = clean_and_validate_matricula(student_in.matricula_aluno)
 
     db_auth = models.Autorizacao(
@@ -51,51 +93,300 @@ def preregister_student(
         status='pré-cadastrado'
     )
     db.add(db_auth)
+    stats_service.register_status_change(db, db_event.id, None, db_auth.status)
     db.commit()
-    db.refresh(db_auth)
+    db_auth = refresh_plan(db, db_auth, AUTHORIZATION_WITH_ATTENDANCE)
     logger.info(f"Aluno '{student_in.nome_aluno}' pré-cadastrado no evento {db_event.id}.")
     return db_auth
 
-@router.get("/eventos/{evento_id}/autorizacoes", response_model=List[schemas.AuthorizationForProfessor])
+@router.get("/eventos/{evento_id}/autorizacoes", response_model=schemas.AuthorizationPage)
 def get_event_authorizations(
+    request: Request,
+    response: Response,
     evento_id: int, 
-    db: Session = Depends(get_db), 
+    status_filtro: Optional[List[Literal['pré-cadastrado', 'submetido', 'aprovado', 'rejeitado']]] = Query(
+        None, alias="status", description="Filtra por status (pode ser repetido)."
+    ),
+    busca: Optional[str] = Query(None, min_length=1, max_length=255, description="Prefixo do nome ou da matrícula do aluno."),
+    presente_em: Optional[date] = Query(None, description="Apenas alunos com presença (ida) marcada nesta data."),
+    cursor: Optional[str] = Query(None, description="Valor de `proximo_cursor` da página anterior."),
+    limite: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_read_db),
+    current_user: models.Usuario = Depends(get_current_active_reader)
+):
+    """
+    Busca as autorizações de um evento, paginadas por (nome_aluno, id).
+    Retorna também o total e a contagem por status considerando os filtros de busca e data.
+    Responde 304 ao If-None-Match quando nada mudou no evento desde o ETag informado.
+    """
+    # Verifica primeiro se o evento existe para o usuário e lê a versão (uma busca pela PK)
+    event = db.query(models.Evento.versao, models.Evento.usuario_id, models.Evento.criado_em).filter_by(id=evento_id).first()
+    if not event or (current_user.tipo != 'admin' and event.usuario_id != current_user.id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Evento não encontrado ou sem permissão de acesso.")
+
+    etag = event_etag(evento_id, event.versao, "autorizacoes")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
+    filters = [models.Autorizacao.evento_id == evento_id, since_event(event.criado_em)]
+    if busca:
+        termo = busca.strip()
+        if re.fullmatch(r'[\d.\-]+', termo):
+            # A matrícula é gravada só com dígitos (clean_and_validate_matricula)
+            filters.append(models.Autorizacao.matricula_aluno.startswith(re.sub(r'\D', '', termo), autoescape=True))
+        else:
+            filters.append(models.Autorizacao.nome_aluno.istartswith(termo, autoescape=True))
+    if presente_em:
+        filters.append(models.Autorizacao.presencas.any(and_(
+            models.Presenca.data_presenca == presente_em,
+            models.Presenca.presente_ida.is_(True),
+        )))
+
+    # Contagem por status em uma única agregação sobre o índice (evento_id, status)
+    contagem_status = dict(
+        db.query(models.Autorizacao.status, func.count(models.Autorizacao.id))
+        .filter(*filters).group_by(models.Autorizacao.status).all()
+    )
+    if status_filtro:
+        filters.append(models.Autorizacao.status.in_(status_filtro))
+        total = sum(contagem_status.get(s, 0) for s in set(status_filtro))
+    else:
+        total = sum(contagem_status.values())
+
+    query = db.query(models.Autorizacao).filter(*filters)
+    if cursor:
+        nome_aluno, autorizacao_id = decode_cursor(cursor, 2)
+        query = query.filter(or_(
+            models.Autorizacao.nome_aluno > nome_aluno,
+            and_(models.Autorizacao.nome_aluno == nome_aluno, models.Autorizacao.id > autorizacao_id),
+        ))
+
+    # As presenças são carregadas só para as linhas da página
+    itens = query.options(*AUTHORIZATION_WITH_ATTENDANCE).order_by(
+        models.Autorizacao.nome_aluno, models.Autorizacao.id
+    ).limit(limite + 1).all()
+
+    proximo_cursor = None
+    if len(itens) > limite:
+        itens = itens[:limite]
+        proximo_cursor = encode_cursor(itens[-1].nome_aluno, itens[-1].id)
+
+    return {
+        "itens": itens,
+        "proximo_cursor": proximo_cursor,
+        "total": total,
+        "contagem_status": contagem_status,
+    }
+
+
+@router.get("/eventos/{evento_id}/mudancas", response_model=schemas.ChangeFeed)
+def get_event_changes(
+    evento_id: int,
+    desde: Optional[str] = Query(None, description="Valor de `proximo_cursor` da consulta anterior. Sem ele, retorna tudo."),
+    db: Session = Depends(get_db),
     current_user: models.Usuario = Depends(get_current_active_user)
 ):
-    """Busca todas as autorizações de um evento específico, garantindo o carregamento das presenças."""
-    # --- CORREÇÃO AQUI: Refatorado para uma consulta direta e robusta ---
-    query = db.query(models.Autorizacao).options(
-        joinedload(models.Autorizacao.presencas)
-    ).join(models.Evento).filter(models.Autorizacao.evento_id == evento_id)
+    """
+    Autorizações e presenças inseridas, alteradas ou excluídas no evento desde o cursor.
+    Cada consulta é uma varredura de intervalo nos índices de `versao`, devolvendo só o que mudou.
+    """
+    event = db.query(models.Evento).filter_by(id=evento_id).first()
+    if not event or (current_user.tipo != 'admin' and event.usuario_id != current_user.id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Evento não encontrado ou sem permissão de acesso.")
+
+    versao_inicial = 0
+    if desde:
+        (versao_inicial,) = decode_cursor(desde, 1)
+        if not isinstance(versao_inicial, int):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor de paginação inválido.")
+
+    # Versões em [desde, limite): o que ainda está em transações abertas fica para a próxima consulta
+    limite_versao = change_feed.current_watermark(db)
+    changes = change_feed.collect_changes(db, [evento_id], versao_inicial, limite_versao)
+
+    return {
+        "autorizacoes": changes["autorizacoes"],
+        "presencas": [presenca for presenca, _ in changes["presencas"]],
+        "excluidos": [{"tipo": excluido.tipo, "id": excluido.registro_id} for excluido in changes["excluidos"]],
+        "proximo_cursor": encode_cursor(limite_versao),
+    }
+
+
+def load_stream_changes(usuario_id: int, is_admin: bool, desde: Optional[int]):
+    """Mudanças dos eventos do usuário (admin: todos) desde o cursor, agrupadas por evento, e o novo cursor."""
+    db = SessionLocal()
+    try:
+        limite_versao = change_feed.current_watermark(db)
+        if desde is None:
+            return [], limite_versao
+
+        eventos = select(models.Evento.id)
+        if not is_admin:
+            eventos = eventos.where(models.Evento.usuario_id == usuario_id)
+        changes = change_feed.collect_changes(db, eventos, desde, limite_versao)
+
+        por_evento = defaultdict(lambda: {"autorizacoes": [], "presencas": [], "excluidos": []})
+        for autorizacao in changes["autorizacoes"]:
+            por_evento[autorizacao.evento_id]["autorizacoes"].append(autorizacao)
+        for presenca, evento_id in changes["presencas"]:
+            por_evento[evento_id]["presencas"].append(presenca)
+        for excluido in changes["excluidos"]:
+            por_evento[excluido.evento_id]["excluidos"].append({"tipo": excluido.tipo, "id": excluido.registro_id})
+
+        messages = [
+            schemas.EventChanges.model_validate({"evento_id": evento_id, **itens}, from_attributes=True).model_dump_json()
+            for evento_id, itens in por_evento.items()
+        ]
+        return messages, limite_versao
+    finally:
+        db.close()
+
+
+async def change_event_stream(subscription: realtime.Subscription, desde: Optional[int]):
+    """
+    Gera o text/event-stream: consulta o feed quando chega um aviso, manda um comentário de
+    heartbeat quando ocioso e marca o último evento de cada lote com o cursor (id do SSE).
+    """
+    try:
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        messages, cursor = await run_in_threadpool(
+            load_stream_changes, subscription.usuario_id, subscription.is_admin, desde
+        )
+        for data in messages:
+            yield f"event: mudancas\ndata: {data}\n\n"
+        yield f"event: conectado\nid: {encode_cursor(cursor)}\ndata: {{}}\n\n"
+
+        aguardando = None
+        while True:
+            timeout = SSE_PENDING_RECHECK_SECONDS if aguardando is not None else settings.SSE_HEARTBEAT_SECONDS
+            try:
+                await asyncio.wait_for(subscription.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                if aguardando is None:
+                    yield ": ping\n\n"
+                    continue
+            versao = subscription.take_pending()
+            if versao is not None:
+                aguardando = max(versao, aguardando or versao)
+
+            messages, cursor = await run_in_threadpool(
+                load_stream_changes, subscription.usuario_id, subscription.is_admin, cursor
+            )
+            for index, data in enumerate(messages):
+                event_id = f"id: {encode_cursor(cursor)}\n" if index == len(messages) - 1 else ""
+                yield f"event: mudancas\n{event_id}data: {data}\n\n"
+            if aguardando is not None and aguardando < cursor:
+                aguardando = None
+    finally:
+        realtime.broker.unsubscribe(subscription)
+
+
+@router.get("/mudancas/stream", response_class=StreamingResponse)
+async def stream_changes(
+    request: Request,
+    current_user: models.Usuario = Depends(get_current_stream_user)
+):
+    """
+    Stream SSE (text/event-stream) com as mudanças em autorizações e presenças dos eventos do usuário
+    (admin: todos), substituindo o polling. Cada evento `mudancas` traz o mesmo conteúdo do feed
+    `/eventos/{evento_id}/mudancas`; ao reconectar, o navegador envia `Last-Event-ID` e o stream
+    reenvia o que mudou desde então.
+    """
+    desde = None
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id:
+        try:
+            (desde,) = decode_cursor(last_event_id, 1)
+        except HTTPException:
+            desde = None
+        if not isinstance(desde, int):
+            desde = None
+
+    subscription = realtime.broker.subscribe(current_user.id, current_user.tipo == 'admin')
+    return StreamingResponse(
+        change_event_stream(subscription, desde),
+        media_type="text/event-stream",
+        # Sem cache e sem buffer no proxy reverso (nginx), para os eventos saírem na hora
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/busca", response_model=schemas.AuthorizationSearchPage)
+def search_authorizations(
+    q: str = Query(..., min_length=2, max_length=100, description="Nome, matrícula, responsável ou e-mail."),
+    pagina: int = Query(1, ge=1, le=50),
+    limite: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+    current_user: models.Usuario = Depends(get_current_active_reader)
+):
+    """
+    Busca alunos em todos os eventos visíveis ao usuário (admin: todos; professor: os seus),
+    ignorando acentos e tolerando erros de digitação. Os resultados vêm ordenados por relevância,
+    já com o evento de cada autorização, em uma única consulta.
+    """
+    termo = q.strip()
+    columns = (
+        models.Autorizacao.nome_aluno, models.Autorizacao.matricula_aluno, models.Autorizacao.nome_responsavel,
+        models.Autorizacao.email_aluno, models.Autorizacao.email_responsavel,
+    )
 
-    # Garante que o usuário só possa ver autorizações de seus próprios eventos (ou se for admin)
+    if db.get_bind().dialect.name == 'postgresql':
+        # Mesma expressão do índice GIN ix_autorizacoes_busca_trgm (migração 0002)
+        documento = func.autorizacao_busca_documento(*columns)
+        termo_normalizado = func.f_unaccent(func.lower(termo))
+        relevancia = func.word_similarity(termo_normalizado, documento)
+        condicao = termo_normalizado.op('<%')(documento)
+        db.execute(
+            text("SELECT set_config('pg_trgm.word_similarity_threshold', :limiar, true)"),
+            {"limiar": str(SEARCH_SIMILARITY_THRESHOLD)}
+        )
+    else:
+        # Sem pg_trgm (ex.: SQLite do benchmark) a busca é por substring, sem tolerância a erros
+        relevancia = literal(1.0)
+        condicao = or_(*[column.icontains(termo, autoescape=True) for column in columns])
+
+    query = db.query(models.Autorizacao, models.Evento, relevancia.label("relevancia")).join(
+        models.Evento, models.Autorizacao.evento_id == models.Evento.id
+    ).filter(condicao)
     if current_user.tipo != 'admin':
         query = query.filter(models.Evento.usuario_id == current_user.id)
 
-    authorizations = query.order_by(models.Autorizacao.nome_aluno).all()
-
-    # Verifica se o evento existe para o usuário
-    if not authorizations:
-        event = db.query(models.Evento).filter_by(id=evento_id).first()
-        if not event or (current_user.tipo != 'admin' and event.usuario_id != current_user.id):
-             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Evento não encontrado ou sem permissão de acesso.")
+    rows = query.order_by(
+        relevancia.desc(), models.Evento.data_inicio.desc(), models.Autorizacao.id
+    ).offset((pagina - 1) * limite).limit(limite + 1).all()
 
-    return authorizations
-    # --- FIM DA CORREÇÃO ---
+    itens = [
+        {
+            "id": autorizacao.id,
+            "nome_aluno": autorizacao.nome_aluno,
+            "matricula_aluno": autorizacao.matricula_aluno,
+            "nome_responsavel": autorizacao.nome_responsavel,
+            "email_aluno": autorizacao.email_aluno,
+            "email_responsavel": autorizacao.email_responsavel,
+            "status": autorizacao.status,
+            "evento": evento,
+            "relevancia": round(float(score), 4),
+        }
+        for autorizacao, evento, score in rows[:limite]
+    ]
+    return {"itens": itens, "pagina": pagina, "limite": limite, "tem_mais": len(rows) > limite}
 
 
-# ... (o resto do arquivo authorizations.py permanece o mesmo) ...
 @router.patch("/{autorizacao_id}/status", response_model=schemas.AuthorizationForProfessor)
 async def update_authorization_status(
     status_update: schemas.StatusUpdate,
     background_tasks: BackgroundTasks,
-    autorizacao: models.Autorizacao = Depends(get_authorization_by_id_for_user),
+    autorizacao: models.Autorizacao = Depends(get_authorization_by_id_for_update),
     db: Session = Depends(get_db)
 ):
     if status_update.status not in ['aprovado', 'rejeitado']:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Status inválido. Use 'aprovado' ou 'rejeitado'.")
 
+    status_anterior = autorizacao.status
     autorizacao.status = status_update.status
+    stats_service.register_status_change(db, autorizacao.evento_id, status_anterior, autorizacao.status)
+    realtime.notify_event_change(db, autorizacao.evento)
     db.commit()
     
     if autorizacao.status == 'aprovado':
@@ -105,15 +396,14 @@ async def update_authorization_status(
         background_tasks.add_task(EmailService.send_rejection_notification_to_student, autorizacao.id, status_update.motivo)
         logger.warning(f"Autorização {autorizacao.id} REJEITADA.")
     
-    db.refresh(autorizacao)
-    return autorizacao
+    return refresh_plan(db, autorizacao, AUTHORIZATION_WITH_ATTENDANCE)
 
 @router.patch("/{autorizacao_id}/presenca/{data_presenca}", response_model=schemas.Presenca)
 def mark_attendance(
     autorizacao_id: int,
     data_presenca: date,
     presenca_update: schemas.PresencaUpdate,
-    autorizacao: models.Autorizacao = Depends(get_authorization_by_id_for_user),
+    autorizacao: models.Autorizacao = Depends(get_authorization_by_id_for_update),
     db: Session = Depends(get_db)
 ):
     """Marca a presença de ida ou de volta de um aluno em uma data específica."""
@@ -126,9 +416,18 @@ def mark_attendance(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="A data da presença está fora do período do evento.")
 
     presenca = db.query(models.Presenca).filter_by(autorizacao_id=autorizacao_id, data_presenca=data_presenca).first()
+    # Presença na ida em outro dia do evento: define se o aluno já contava como presente nas estatísticas
+    presente_em_outro_dia = db.query(models.Presenca.id).filter(
+        models.Presenca.autorizacao_id == autorizacao_id,
+        models.Presenca.data_presenca != data_presenca,
+        models.Presenca.presente_ida.is_(True),
+    ).first() is not None
+    estava_presente = presente_em_outro_dia or bool(presenca and presenca.presente_ida)
 
     if not presenca:
-        presenca = models.Presenca(autorizacao_id=autorizacao_id, data_presenca=data_presenca)
+        presenca = models.Presenca(
+            autorizacao_id=autorizacao_id, autorizacao_submetido_em=autorizacao.submetido_em, data_presenca=data_presenca
+        )
         db.add(presenca)
 
     if presenca_update.presente_ida is not None:
@@ -139,6 +438,10 @@ def mark_attendance(
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Não é possível marcar o retorno sem ter marcado a presença na ida.")
         presenca.presente_volta = presenca_update.presente_volta
 
+    stats_service.register_attendance_change(
+        db, autorizacao.evento_id, estava_presente, presente_em_outro_dia or bool(presenca.presente_ida)
+    )
+    realtime.notify_event_change(db, autorizacao.evento)
     db.commit()
     db.refresh(presenca)
     logger.info(f"Presença do aluno (Auth ID: {autorizacao.id}) atualizada para a data {data_presenca}: Ida={presenca.presente_ida}, Volta={presenca.presente_volta}")
@@ -146,23 +449,48 @@ def mark_attendance(
     return presenca
 
 
+def presign_authorization_file(autorizacao: models.Autorizacao) -> schemas.PresignedTransfer:
+    if not autorizacao.caminho_arquivo:
+        raise HTTPException(status_code=404, detail="Nenhum arquivo associado a esta autorização.")
+    expires_in = settings.STORAGE_PRESIGN_EXPIRES_SECONDS
+    url = get_storage().presign_get(
+        autorizacao.caminho_arquivo, autorizacao.nome_arquivo_original, autorizacao.tipo_arquivo, expires_in
+    )
+    return schemas.PresignedTransfer(
+        url=url, metodo="GET", expira_em=datetime.fromtimestamp(time.time() + expires_in)
+    )
+
+
 @router.get("/{autorizacao_id}/arquivo", response_class=FileResponse)
 def get_authorization_file(autorizacao: models.Autorizacao = Depends(get_authorization_by_id_for_user)):
+    """No armazenamento local serve o arquivo; nos demais redireciona (307) para a URL pré-assinada."""
     if not autorizacao.caminho_arquivo:
         raise HTTPException(status_code=404, detail="Nenhum arquivo associado a esta autorização.")
-        
-    file_path = Path(settings.UPLOAD_DIRECTORY) / autorizacao.caminho_arquivo
+
+    file_path = get_storage().local_path(autorizacao.caminho_arquivo)
+    if file_path is None:
+        return RedirectResponse(presign_authorization_file(autorizacao).url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+
     if not file_path.is_file():
         logger.error(f"Arquivo não encontrado no disco: {file_path}, mas referenciado no DB.")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Arquivo não encontrado no servidor.")
         
     return FileResponse(path=file_path, filename=autorizacao.nome_arquivo_original, media_type=autorizacao.tipo_arquivo)
 
+
+@router.get("/{autorizacao_id}/arquivo/url", response_model=schemas.PresignedTransfer)
+def get_authorization_file_url(autorizacao: models.Autorizacao = Depends(get_authorization_by_id_for_user)):
+    """URL de curta duração para baixar o arquivo sem o token de acesso (direto do armazenamento)."""
+    return presign_authorization_file(autorizacao)
+
 # =================================================================
 # ROTAS PÚBLICAS
 # =================================================================
 @router.post("/evento/{evento_id}/inscrever-se", response_model=schemas.AuthorizationForProfessor, status_code=status.HTTP_201_CREATED)
+@limiter.limit(settings.RATE_LIMIT_UPLOAD, key_func=get_client_key)
+@upload_ip_limit
 async def student_self_register_and_submit(
+    request: Request,
     evento_id: int,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
@@ -171,81 +499,114 @@ async def student_self_register_and_submit(
     email_aluno: str = Form(...),
     nome_responsavel: str = Form(...),
     email_responsavel: str = Form(...),
-    arquivo: UploadFile = File(...)
+    arquivo: Optional[UploadFile] = File(None),
+    upload_id: Optional[str] = Form(None),
+    idempotency_key: Optional[str] = Header(None, alias=idempotency.HEADER)
 ):
-    if email_aluno.lower() == email_responsavel.lower():
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="O e-mail do aluno e do responsável não podem ser iguais.")
+    """O arquivo vem no próprio formulário (`arquivo`) ou de um upload retomável concluído (`upload_id`)."""
+    async def process():
+        validate_submission_emails(email_aluno, email_responsavel)
 
-    cleaned_matricula = clean_and_validate_matricula(matricula_aluno)
-    
-    db_event = db.query(models.Evento).filter(models.Evento.id == evento_id).first()
-    if not db_event:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Evento não encontrado.")
+        cleaned_matricula = clean_and_validate_matricula(matricula_aluno)
+        
+        db_event = db.query(models.Evento).filter(models.Evento.id == evento_id).first()
+        if not db_event:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Evento não encontrado.")
+        reject_archived_event(db_event)
 
-    saved_file_path = await save_upload_file(arquivo)
-    
-    new_auth_data = {
-        "evento_id": evento_id, "nome_aluno": nome_aluno, "matricula_aluno": cleaned_matricula,
-        "email_aluno": email_aluno, "nome_responsavel": nome_responsavel,
-        "email_responsavel": email_responsavel, "caminho_arquivo": saved_file_path,
-        "nome_arquivo_original": arquivo.filename, "tamanho_arquivo": arquivo.size,
-        "tipo_arquivo": arquivo.content_type, "status": 'submetido'
-    }
-    
-    db_auth = models.Autorizacao(**new_auth_data)
-    db.add(db_auth)
-    db.commit()
-    db.refresh(db_auth)
-    logger.info(f"Nova inscrição e submissão recebida para o aluno '{db_auth.nome_aluno}' (Auth ID: {db_auth.id}).")
-    
-    background_tasks.add_task(EmailService.send_submission_confirmation_to_student, db_auth.id)
-    background_tasks.add_task(EmailService.notify_teacher_of_new_submission, db_auth.id)
-    
-    return db_auth
+        file_data = await store_submission_file(arquivo, upload_id)
+        
+        new_auth_data = {
+            "evento_id": evento_id, "nome_aluno": nome_aluno, "matricula_aluno": cleaned_matricula,
+            "email_aluno": email_aluno, "nome_responsavel": nome_responsavel,
+            "email_responsavel": email_responsavel, **file_data, "status": 'submetido'
+        }
+        
+        db_auth = models.Autorizacao(**new_auth_data)
+        db.add(db_auth)
+        stats_service.register_status_change(db, evento_id, None, db_auth.status)
+        realtime.notify_event_change(db, db_event)
+        db.commit()
+        db_auth = refresh_plan(db, db_auth, AUTHORIZATION_WITH_ATTENDANCE)
+        logger.info(f"Nova inscrição e submissão recebida para o aluno '{db_auth.nome_aluno}' (Auth ID: {db_auth.id}).")
+        
+        background_tasks.add_task(EmailService.send_submission_confirmation_to_student, db_auth.id)
+        background_tasks.add_task(EmailService.notify_teacher_of_new_submission, db_auth.id)
+        
+        return orm_response(schemas.AuthorizationForProfessor, db_auth, status.HTTP_201_CREATED)
+
+    fingerprint = idempotency.request_fingerprint(
+        evento_id, nome_aluno, matricula_aluno, email_aluno, nome_responsavel, email_responsavel,
+        arquivo and arquivo.filename, arquivo and arquivo.size, upload_id,
+    )
+    return await idempotency.run_idempotent(db, "inscrever-se", idempotency_key, fingerprint, process)
 
 
 @router.get("/eventos/{evento_id}/pre-cadastrados", response_model=List[schemas.AuthorizationForStudentList])
-def get_preregistered_students(evento_id: int, db: Session = Depends(get_db)):
+@limiter.limit(settings.RATE_LIMIT_PUBLIC_READ)
+def get_preregistered_students(request: Request, evento_id: int, db: Session = Depends(get_read_db)):
     """Retorna a lista de alunos pré-cadastrados para o formulário público."""
-    students = db.query(models.Autorizacao).filter(
+    evento = db.query(models.Evento.versao, models.Evento.criado_em).filter(models.Evento.id == evento_id).first()
+    etag = event_etag(evento_id, evento.versao, "pre-cadastrados") if evento else None
+    if etag and etag_matches(request, etag):
+        return not_modified(etag)
+
+    # Busca apenas as colunas exibidas, sem instanciar objetos do ORM
+    students = db.query(models.Autorizacao.id, models.Autorizacao.nome_aluno).filter(
         models.Autorizacao.evento_id == evento_id,
-        models.Autorizacao.status == 'pré-cadastrado'
+        models.Autorizacao.status == 'pré-cadastrado',
+        since_event(evento.criado_em if evento else None),
     ).order_by(models.Autorizacao.nome_aluno).all()
-    return students
+    response = orm_list_response(schemas.AuthorizationForStudentList, students)
+    return set_etag(response, etag) if etag else response
 
 @router.put("/{autorizacao_id}/submeter", response_model=schemas.AuthorizationForProfessor)
+@limiter.limit(settings.RATE_LIMIT_UPLOAD, key_func=get_client_key)
+@upload_ip_limit
 async def student_submit_authorization(
+    request: Request,
     autorizacao_id: int,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     email_aluno: str = Form(...),
     nome_responsavel: str = Form(...),
     email_responsavel: str = Form(...),
-    arquivo: UploadFile = File(...)
+    arquivo: Optional[UploadFile] = File(None),
+    upload_id: Optional[str] = Form(None),
+    idempotency_key: Optional[str] = Header(None, alias=idempotency.HEADER)
 ):
-    if email_aluno.lower() == email_responsavel.lower():
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="O e-mail do aluno e do responsável não podem ser iguais.")
+    """O arquivo vem no próprio formulário (`arquivo`) ou de um upload retomável concluído (`upload_id`)."""
+    async def process():
+        validate_submission_emails(email_aluno, email_responsavel)
 
-    db_auth = db.query(models.Autorizacao).filter(models.Autorizacao.id == autorizacao_id).first()
-    if not db_auth or db_auth.status != 'pré-cadastrado':
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Cadastro de aluno não encontrado ou já submetido.")
+        db_auth = db.query(models.Autorizacao).options(*AUTHORIZATION_WITH_EVENT).filter(
+            models.Autorizacao.id == autorizacao_id
+        ).first()
+        if not db_auth or db_auth.status != 'pré-cadastrado':
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Cadastro de aluno não encontrado ou já submetido.")
 
-    saved_file_path = await save_upload_file(arquivo)
+        file_data = await store_submission_file(arquivo, upload_id)
 
-    db_auth.email_aluno = email_aluno
-    db_auth.nome_responsavel = nome_responsavel
-    db_auth.email_responsavel = email_responsavel
-    db_auth.caminho_arquivo = saved_file_path
-    db_auth.nome_arquivo_original = arquivo.filename
-    db_auth.tamanho_arquivo = arquivo.size
-    db_auth.tipo_arquivo = arquivo.content_type
-    db_auth.status = 'submetido'
-    
-    db.commit()
-    db.refresh(db_auth)
-    logger.info(f"Submissão recebida para o aluno '{db_auth.nome_aluno}' (Auth ID: {db_auth.id}).")
-    
-    background_tasks.add_task(EmailService.send_submission_confirmation_to_student, db_auth.id)
-    background_tasks.add_task(EmailService.notify_teacher_of_new_submission, db_auth.id)
-    
-    return db_auth
\ No newline at end of file
+        db_auth.email_aluno = email_aluno
+        db_auth.nome_responsavel = nome_responsavel
+        db_auth.email_responsavel = email_responsavel
+        for field, value in file_data.items():
+            setattr(db_auth, field, value)
+        db_auth.status = 'submetido'
+        stats_service.register_status_change(db, db_auth.evento_id, 'pré-cadastrado', db_auth.status)
+        realtime.notify_event_change(db, db_auth.evento)
+        
+        db.commit()
+        db_auth = refresh_plan(db, db_auth, AUTHORIZATION_WITH_ATTENDANCE)
+        logger.info(f"Submissão recebida para o aluno '{db_auth.nome_aluno}' (Auth ID: {db_auth.id}).")
+        
+        background_tasks.add_task(EmailService.send_submission_confirmation_to_student, db_auth.id)
+        background_tasks.add_task(EmailService.notify_teacher_of_new_submission, db_auth.id)
+        
+        return orm_response(schemas.AuthorizationForProfessor, db_auth)
+
+    fingerprint = idempotency.request_fingerprint(
+        autorizacao_id, email_aluno, nome_responsavel, email_responsavel,
+        arquivo and arquivo.filename, arquivo and arquivo.size, upload_id,
+    )
+    return await idempotency.run_idempotent(db, "submeter", idempotency_key, fingerprint, process)
\ No newline at end of file
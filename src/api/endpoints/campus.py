@@ -1,11 +1,17 @@
 # ifroautoriza-backend/src/api/endpoints/campus.py
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
 from src.db import models, schemas
 from src.api import deps
+from src.core.config import settings
+from src.core.rate_limit import limiter
+from src.services.campus_registry import registry as campus_registry
+from src.utils.http_cache import etag_matches, not_modified, resource_etag, set_etag
+from src.utils.serialization import JSON_MEDIA_TYPE, list_adapter
 
 router = APIRouter()
 
@@ -36,6 +42,7 @@ def create_campus(
     new_campus = models.Campus(nome=campus_in.nome)
     db.add(new_campus)
     db.commit()
+    campus_registry.invalidate()
     db.refresh(new_campus)
     return new_campus
 
@@ -45,16 +52,27 @@ def create_campus(
     summary="Lista todos os Campi",
     description="Retorna uma lista de todos os campi cadastrados no sistema. Este é um endpoint público."
 )
+@limiter.limit(settings.RATE_LIMIT_PUBLIC_READ)
 def read_campuses(
-    db: Session = Depends(deps.get_db),
+    request: Request,
+    db: Session = Depends(deps.get_read_db),
     skip: int = 0,
     limit: int = 100
 ):
     """
-    Endpoint para listar todos os campi com paginação.
+    Endpoint para listar todos os campi com paginação. Servido do cadastro em memória: a listagem
+    completa já está serializada e o ETag muda com a versão do cadastro.
     """
-    campuses = db.query(models.Campus).order_by(models.Campus.nome).offset(skip).limit(limit).all()
-    return campuses
+    snapshot = campus_registry.current(db)
+    etag = resource_etag("campus", snapshot.versao, skip, limit)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    if skip <= 0 and limit >= len(snapshot.ordenados):
+        content = snapshot.corpo
+    else:
+        content = list_adapter(schemas.Campus).dump_json(snapshot.ordenados[max(skip, 0):max(skip, 0) + max(limit, 0)])
+    return set_etag(Response(content=content, media_type=JSON_MEDIA_TYPE), etag)
 
 @router.put(
     "/{campus_id}",
@@ -89,6 +107,7 @@ def update_campus(
 
     campus.nome = campus_in.nome
     db.commit()
+    campus_registry.invalidate()
     db.refresh(campus)
     return campus
 
@@ -117,7 +136,11 @@ def delete_campus(
             detail="Campus não encontrado.",
         )
     
-    if campus.usuarios or campus.eventos:
+    # EXISTS em cada tabela, sem carregar as coleções (write_only)
+    em_uso = db.query(
+        or_(campus.usuarios.select().exists(), campus.eventos.select().exists())
+    ).scalar()
+    if em_uso:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Não é possível excluir o campus pois existem usuários ou eventos associados a ele.",
@@ -125,4 +148,5 @@ def delete_campus(
 
     db.delete(campus)
     db.commit()
+    campus_registry.invalidate()
     return
\ No newline at end of file
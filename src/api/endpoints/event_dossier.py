@@ -0,0 +1,85 @@
+# src/api/endpoints/event_dossier.py
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, RedirectResponse
+from sqlalchemy.orm import Session
+
+from src.api.deps import get_db, get_event_by_id_for_user
+from src.core.config import settings
+from src.db import models, schemas
+from src.services import dossier
+from src.services.campus_registry import registry as campus_registry
+from src.services.partitions import since_event
+from src.services.storage import get_storage
+from .event_model_generator import format_event_date_for_doc
+
+router = APIRouter()
+
+# Intervalo sugerido ao cliente para consultar de novo enquanto o dossiê é gerado
+DOSSIER_RETRY_SECONDS = 5
+
+
+def load_dossier_data(db: Session, evento: models.Evento) -> dict:
+    """Tudo o que o processo de geração precisa, em tipos simples (o pool não acessa o banco)."""
+    campus = campus_registry.get(db, evento.campus_id)
+    professor = db.query(models.Usuario.nome).filter(models.Usuario.id == evento.usuario_id).scalar()
+    alunos = db.query(
+        models.Autorizacao.id, models.Autorizacao.nome_aluno, models.Autorizacao.matricula_aluno,
+        models.Autorizacao.status, models.Autorizacao.versao, models.Autorizacao.caminho_arquivo,
+        models.Autorizacao.tipo_arquivo,
+    ).filter(
+        models.Autorizacao.evento_id == evento.id, since_event(evento.criado_em)
+    ).order_by(models.Autorizacao.nome_aluno, models.Autorizacao.id).all()
+    return {
+        "evento": {
+            "id": evento.id, "titulo": evento.titulo, "periodo": format_event_date_for_doc(evento),
+            "local_evento": evento.local_evento, "observacoes": evento.observacoes,
+            "campus": campus.nome if campus else None, "professor": professor,
+        },
+        "alunos": [aluno._asdict() for aluno in alunos],
+    }
+
+
+@router.get(
+    "/", response_class=FileResponse,
+    responses={status.HTTP_202_ACCEPTED: {"model": schemas.DossierStatus}},
+)
+async def get_event_dossier(
+    evento: models.Evento = Depends(get_event_by_id_for_user),
+    db: Session = Depends(get_db)
+):
+    """
+    PDF único do evento para impressão: capa com os dados do evento e a lista de alunos, seguida
+    dos documentos das autorizações aprovadas. Na primeira chamada (ou depois de qualquer alteração
+    nas autorizações) a geração é enfileirada e a resposta é 202 com o andamento; repita a chamada
+    até receber o PDF. Uma falha na geração é devolvida (500) uma vez; a chamada seguinte enfileira
+    de novo.
+    """
+    if evento.arquivado_em:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Evento arquivado: as autorizações estão em /arquivo/eventos/{id}.",
+        )
+
+    dados = await run_in_threadpool(load_dossier_data, db, evento)
+    atual = await run_in_threadpool(dossier.request_dossier, dados)
+    if atual["estado"] == "erro":
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Não foi possível gerar o dossiê: {atual.get('erro')}",
+        )
+    if atual["estado"] != "pronto":
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content=schemas.DossierStatus(**atual).model_dump(mode="json"),
+            headers={"Retry-After": str(DOSSIER_RETRY_SECONDS)},
+        )
+
+    key = dossier.pdf_key(evento.id, atual["chave"])
+    filename = f"dossie-evento-{evento.id}.pdf"
+    storage = get_storage()
+    path = storage.local_path(key)
+    if path is None:
+        url = storage.presign_get(key, filename, "application/pdf", settings.STORAGE_PRESIGN_EXPIRES_SECONDS)
+        return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+    return FileResponse(path=path, filename=filename, media_type="application/pdf")
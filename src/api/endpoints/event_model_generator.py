@@ -1,11 +1,12 @@
 # src/api/endpoints/event_model_generator.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 import io
-from docx import Document
 
 from src.api.deps import get_db
+from src.core.config import settings
+from src.core.rate_limit import limiter
 from src.db import models
 
 router = APIRouter()
@@ -26,7 +27,9 @@ def format_event_date_for_doc(evento: models.Evento) -> str:
     return date_str
 
 @router.get("/", response_class=StreamingResponse)
+@limiter.limit(settings.RATE_LIMIT_PUBLIC_READ)
 def get_dynamic_authorization_model(
+    request: Request,
     evento_id: int,
     db: Session = Depends(get_db)
 ):
@@ -34,6 +37,9 @@ def get_dynamic_authorization_model(
     if not evento:
         raise HTTPException(status_code=404, detail="Evento não encontrado")
 
+    # python-docx (e o lxml) só são carregados quando alguém baixa o modelo
+    from docx import Document
+
     document = Document()
     document.add_heading('AUTORIZAÇÃO PARA PARTICIPAÇÃO EM EVENTO', level=1)
     
@@ -1,55 +1,92 @@
 # src/api/endpoints/events.py
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_, and_
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy.orm import Session
+from sqlalchemy import or_, and_, case, func, select
 import uuid
 from typing import List, Optional
-from datetime import date
+from datetime import date, timedelta
 
-from src.api.deps import get_db, get_current_active_user, get_event_by_id_for_user
+from src.api.deps import (get_db, get_read_db, get_current_active_user, get_current_active_reader,
+                          get_event_by_id_for_user, get_event_version_for_user)
+from src.core.compression import BodyCache
+from src.core.config import settings
+from src.core.rate_limit import limiter
 from src.db import models, schemas
+from src.db.load_plans import EVENT_FOR_DELETE, EVENT_WITH_CAMPUS, refresh_plan
 from src.services.file_service import delete_file
+from src.services import archive_service
+from src.services import stats_service
+from src.services.partitions import since_event
+from src.services.campus_registry import registry as campus_registry
+from src.utils.http_cache import etag_matches, not_modified, resource_etag, set_etag
 from src.utils.logger import logger
-from . import event_model_generator
+from src.utils.serialization import JSON_MEDIA_TYPE, dump_orm_list, stream_orm_list
+from . import event_dossier, event_model_generator
 
 router = APIRouter()
 
+# Limite de colunas do pivô da chamada (duas por dia)
+MAX_ATTENDANCE_DAYS = 366
+# Listas públicas de eventos já serializadas, por ETag (uma por filtro de campus)
+_public_events_cache = BodyCache(4 * 1024 * 1024)
+
 # =================================================================
 # ROTAS PÚBLICAS (Sem alteração nesta correção)
 # =================================================================
 
 @router.get("/publicos", response_model=List[schemas.EventPublicList])
+@limiter.limit(settings.RATE_LIMIT_PUBLIC_READ)
 def read_public_events(
+    request: Request,
     campus_id: Optional[int] = Query(None, description="Filtra eventos por ID do campus. Se não fornecido, retorna de todos os campi."),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Retorna uma lista simplificada de eventos futuros.
     Pode ser filtrada por campus.
+
+    O ETag sai de um agregado dos eventos listados (quantidade, ids e versões) e da versão do
+    cadastro de campi: a revalidação não carrega os eventos, e enquanto nada muda a lista
+    serializada (e a forma comprimida, no middleware de compressão) sai da memória.
     """
     today = date.today()
     
-    query = db.query(models.Evento).options(joinedload(models.Evento.campus)).filter(
-        or_(
-            models.Evento.data_fim >= today,
-            and_(models.Evento.data_fim.is_(None), models.Evento.data_inicio >= today)
-        )
-    )
-
+    filtros = [or_(
+        models.Evento.data_fim >= today,
+        and_(models.Evento.data_fim.is_(None), models.Evento.data_inicio >= today)
+    )]
     if campus_id is not None:
-        query = query.filter(models.Evento.campus_id == campus_id)
+        filtros.append(models.Evento.campus_id == campus_id)
 
-    events = query.order_by(models.Evento.data_inicio.asc()).all()
-    
-    return events
+    total, soma_ids, soma_versoes = db.query(
+        func.count(models.Evento.id),
+        func.coalesce(func.sum(models.Evento.id), 0),
+        func.coalesce(func.sum(models.Evento.versao), 0),
+    ).filter(*filtros).one()
+    etag = resource_etag(
+        "eventos-publicos", today.isoformat(), campus_id or "todos",
+        campus_registry.current(db).versao, total, soma_ids, soma_versoes,
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    content = _public_events_cache.get(etag)
+    if content is None:
+        events = db.query(models.Evento).options(*EVENT_WITH_CAMPUS).filter(*filtros).order_by(
+            models.Evento.data_inicio.asc(), models.Evento.id.asc()
+        ).all()
+        content = dump_orm_list(schemas.EventPublicList, events)
+        _public_events_cache.put(etag, content)
+    return set_etag(Response(content=content, media_type=JSON_MEDIA_TYPE), etag)
 
 
 @router.get("/publico/{link_unico}", response_model=schemas.EventPublicDetail)
-def read_public_event_by_link(link_unico: str, db: Session = Depends(get_db)):
+@limiter.limit(settings.RATE_LIMIT_PUBLIC_READ)
+def read_public_event_by_link(request: Request, link_unico: str, db: Session = Depends(get_read_db)):
     """
     Busca os detalhes públicos de um evento pelo seu link único.
     """
-    event = db.query(models.Evento).options(joinedload(models.Evento.campus)).filter(models.Evento.link_unico == link_unico).first()
+    event = db.query(models.Evento).options(*EVENT_WITH_CAMPUS).filter(models.Evento.link_unico == link_unico).first()
     if not event:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Evento não encontrado")
     return event
@@ -67,7 +104,7 @@ def create_event(
     """
     Cria um novo evento. O evento será associado ao campus_id fornecido.
     """
-    campus = db.query(models.Campus).filter(models.Campus.id == event_in.campus_id).first()
+    campus = campus_registry.get(db, event_in.campus_id)
     if not campus:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -80,24 +117,29 @@ def create_event(
         event_data['data_fim'] = None
 
     db_event = models.Evento(**event_data, usuario_id=current_user.id, link_unico=link_unico)
+    stats_service.register_event_created(db_event)
     db.add(db_event)
     db.commit()
-    db.refresh(db_event)
+    db_event = refresh_plan(db, db_event, EVENT_WITH_CAMPUS)
     logger.info(f"Usuário '{current_user.email}' criou o evento '{db_event.titulo}' (ID: {db_event.id})")
     return db_event
 
 @router.get("/", response_model=List[schemas.Event])
 def read_events(
     campus_id: Optional[int] = Query(None, description="Filtra eventos por ID do campus (Apenas para Admins)."),
-    db: Session = Depends(get_db),
-    current_user: models.Usuario = Depends(get_current_active_user)
+    db: Session = Depends(get_read_db),
+    current_user: models.Usuario = Depends(get_current_active_reader)
 ):
     """
     Lista eventos:
     - Admin: Vê todos os eventos, podendo filtrar por campus.
     - Professor: Vê APENAS os seus próprios eventos.
     """
-    query = db.query(models.Evento).options(joinedload(models.Evento.campus))
+    # A contagem de autorizações vem de uma subconsulta, em vez de carregar todas as autorizações de cada evento
+    autorizacoes_count = select(func.count(models.Autorizacao.id)).where(
+        models.Autorizacao.evento_id == models.Evento.id
+    ).correlate(models.Evento).scalar_subquery()
+    query = db.query(models.Evento, autorizacoes_count).options(*EVENT_WITH_CAMPUS)
 
     # --- CORREÇÃO DE SEGURANÇA AQUI ---
     if current_user.tipo == 'admin':
@@ -109,16 +151,143 @@ def read_events(
         query = query.filter(models.Evento.usuario_id == current_user.id)
     # --- FIM DA CORREÇÃO ---
 
-    events = query.order_by(models.Evento.data_inicio.desc()).all()
+    rows = query.order_by(models.Evento.data_inicio.desc(), models.Evento.id.desc()).yield_per(500)
+
+    def events_with_count():
+        for event, count in rows:
+            event.autorizacoes_count = count
+            yield event
+
+    return stream_orm_list(schemas.Event, events_with_count(), on_close=db.close)
+
+
+@router.get("/estatisticas", response_model=schemas.StatsOverview)
+def read_event_stats(
+    campus_id: Optional[int] = Query(None, description="Filtra por ID do campus."),
+    data_inicial: Optional[date] = Query(None, description="Eventos com início a partir desta data."),
+    data_final: Optional[date] = Query(None, description="Eventos com início até esta data."),
+    incluir_eventos: bool = Query(True, description="Inclui a lista por evento, além dos totais por campus."),
+    db: Session = Depends(get_read_db),
+    current_user: models.Usuario = Depends(get_current_active_reader)
+):
+    """
+    Contagens por status e de alunos presentes, por evento e por campus, lidas da tabela
+    EstatisticasEventos (mantida a cada alteração) em vez de agregar todas as autorizações.
+    - Admin: todos os eventos.
+    - Professor: apenas os seus próprios eventos.
+    """
+    if data_inicial and data_final and data_inicial > data_final:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="A data inicial deve ser anterior à data final.")
 
-    for event in events:
-        event.autorizacoes_count = len(event.autorizacoes)
-    return events
+    stats = models.EstatisticaEvento
+    counters = [stats.pre_cadastrados, stats.submetidos, stats.aprovados, stats.rejeitados, stats.presentes]
+
+    filters = []
+    if current_user.tipo != 'admin':
+        filters.append(models.Evento.usuario_id == current_user.id)
+    if campus_id is not None:
+        filters.append(models.Evento.campus_id == campus_id)
+    if data_inicial:
+        filters.append(models.Evento.data_inicio >= data_inicial)
+    if data_final:
+        filters.append(models.Evento.data_inicio <= data_final)
+
+    campus_rows = db.query(
+        models.Campus.id.label("campus_id"),
+        models.Campus.nome.label("campus_nome"),
+        func.count(models.Evento.id).label("eventos"),
+        *[func.sum(counter).label(counter.key) for counter in counters],
+    ).join(models.Evento, models.Evento.campus_id == models.Campus.id).join(
+        stats, stats.evento_id == models.Evento.id
+    ).filter(*filters).group_by(models.Campus.id, models.Campus.nome).order_by(models.Campus.nome).all()
+
+    campi = [dict(row._mapping) for row in campus_rows]
+    total = {counter.key: sum(campus[counter.key] for campus in campi) for counter in counters}
+
+    eventos = []
+    if incluir_eventos:
+        event_rows = db.query(
+            models.Evento.id.label("evento_id"), models.Evento.titulo, models.Evento.data_inicio,
+            models.Evento.campus_id, *counters,
+        ).join(stats, stats.evento_id == models.Evento.id).filter(*filters).order_by(
+            models.Evento.data_inicio.desc(), models.Evento.id.desc()
+        ).all()
+        eventos = [dict(row._mapping) for row in event_rows]
+
+    return {"total": total, "campi": campi, "eventos": eventos}
 
 
 @router.get("/{event_id}", response_model=schemas.Event)
-def read_event(event: models.Evento = Depends(get_event_by_id_for_user)):
-    return event
+def read_event(
+    event_id: int,
+    request: Request,
+    response: Response,
+    versao: int = Depends(get_event_version_for_user),
+    db: Session = Depends(get_db)
+):
+    # Revalidação (If-None-Match) responde 304 só com a leitura da versão; a resposta traz o campus,
+    # então a versão do cadastro de campi (em memória) também entra no ETag
+    etag = resource_etag("evento", event_id, versao, campus_registry.current(db).versao)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    return db.query(models.Evento).options(*EVENT_WITH_CAMPUS).filter(models.Evento.id == event_id).first()
+
+@router.get("/{event_id}/chamada", response_model=schemas.AttendanceMatrix)
+def read_attendance_matrix(
+    event: models.Evento = Depends(get_event_by_id_for_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Matriz aluno x dia de presenças (ida/volta) das autorizações aprovadas, em todo o período do evento.
+    Uma única consulta faz o pivô: uma coluna agregada por dia e sentido, uma linha por aluno.
+    """
+    dias = []
+    dia, fim = event.data_inicio, event.data_fim or event.data_inicio
+    while dia <= fim:
+        dias.append(dia)
+        dia += timedelta(days=1)
+    if len(dias) > MAX_ATTENDANCE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A chamada está disponível apenas para eventos de até {MAX_ATTENDANCE_DAYS} dias.",
+        )
+
+    def pivot(column):
+        return [
+            func.max(case((and_(models.Presenca.data_presenca == dia, column.is_(True)), 1), else_=0))
+            for dia in dias
+        ]
+
+    rows = db.query(
+        models.Autorizacao.id, models.Autorizacao.nome_aluno, models.Autorizacao.matricula_aluno,
+        *pivot(models.Presenca.presente_ida), *pivot(models.Presenca.presente_volta),
+    ).outerjoin(models.Presenca, and_(
+        models.Presenca.autorizacao_id == models.Autorizacao.id,
+        models.Presenca.data_presenca.between(dias[0], dias[-1]),
+        since_event(event.criado_em, models.Presenca.autorizacao_submetido_em),
+    )).filter(
+        models.Autorizacao.evento_id == event.id,
+        models.Autorizacao.status == 'aprovado',
+        since_event(event.criado_em),
+    ).group_by(
+        models.Autorizacao.id, models.Autorizacao.nome_aluno, models.Autorizacao.matricula_aluno
+    ).order_by(models.Autorizacao.nome_aluno, models.Autorizacao.id).all()
+
+    total_dias = len(dias)
+
+    def bits(offset: int) -> List[str]:
+        return ["".join("1" if row[offset + i] else "0" for row in rows) for i in range(total_dias)]
+
+    return {
+        "evento_id": event.id,
+        "dias": dias,
+        "autorizacao_ids": [row[0] for row in rows],
+        "nomes": [row[1] for row in rows],
+        "matriculas": [row[2] for row in rows],
+        "ida": bits(3),
+        "volta": bits(3 + total_dias),
+    }
 
 @router.put("/{event_id}", response_model=schemas.Event)
 def update_event(
@@ -132,7 +301,7 @@ def update_event(
     update_data = event_in.model_dump(exclude_unset=True)
 
     if "campus_id" in update_data:
-        campus = db.query(models.Campus).filter(models.Campus.id == update_data["campus_id"]).first()
+        campus = campus_registry.get(db, update_data["campus_id"])
         if not campus:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -143,7 +312,7 @@ def update_event(
         setattr(db_event, key, value)
     
     db.commit()
-    db.refresh(db_event)
+    db_event = refresh_plan(db, db_event, EVENT_WITH_CAMPUS)
     logger.info(f"Evento {db_event.id} atualizado.")
     return db_event
 
@@ -153,16 +322,23 @@ def delete_event(
     db: Session = Depends(get_db)
 ):
     event_id = db_event.id
+    db_event = refresh_plan(db, db_event, EVENT_FOR_DELETE)
     for autorizacao in db_event.autorizacoes:
         if autorizacao.caminho_arquivo:
             try:
                 delete_file(autorizacao.caminho_arquivo)
             except Exception as e:
                 logger.error(f"Erro ao deletar arquivo {autorizacao.caminho_arquivo}: {e}")
+    if db_event.arquivado_em:
+        try:
+            archive_service.remove_archived_event(event_id)
+        except Exception as e:
+            logger.error(f"Erro ao remover o evento {event_id} do arquivo: {e}")
 
     db.delete(db_event)
     db.commit()
     logger.warning(f"Evento {event_id} e todos os seus dados foram DELETADOS.")
     return
 
-router.include_router(event_model_generator.router, prefix="/{event_id}/modelo")
\ No newline at end of file
+router.include_router(event_model_generator.router, prefix="/{event_id}/modelo")
+router.include_router(event_dossier.router, prefix="/{event_id}/dossie")
\ No newline at end of file
@@ -0,0 +1,81 @@
+# src/api/endpoints/files.py
+"""
+Destino das URLs pré-assinadas do armazenamento local (STORAGE_BACKEND=local). O token na URL,
+emitido pela API depois das verificações de permissão, é a única autorização exigida; com o
+armazenamento em S3 essas URLs apontam direto para o bucket e estas rotas não são usadas.
+"""
+import os
+import uuid
+
+import aiofiles
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from fastapi.responses import FileResponse
+from jose import JWTError
+from starlette.requests import ClientDisconnect
+
+from src.core.rate_limit import limiter
+from src.core.security import decode_transfer_token
+from src.services.storage import get_storage
+from src.utils.logger import logger
+
+router = APIRouter()
+
+
+def _claims(token: str, operacao: str) -> dict:
+    try:
+        return decode_transfer_token(token, operacao)
+    except JWTError:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Link de arquivo inválido ou expirado.")
+
+
+def _local_path(key: str):
+    path = get_storage().local_path(key)
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Armazenamento local desativado.")
+    return path
+
+
+@router.get("/{token}", response_class=FileResponse)
+def download_file(token: str):
+    claims = _claims(token, "get")
+    path = _local_path(claims["k"])
+    if not path.is_file():
+        logger.error(f"Arquivo não encontrado no disco: {path}, mas referenciado no DB.")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Arquivo não encontrado no servidor.")
+    return FileResponse(path=path, filename=claims.get("fn"), media_type=claims.get("ct"))
+
+
+# Cada URL de envio sai de /uploads/direto, que já é limitado; com S3 este PUT nem passa pela API
+@router.put("/{token}", status_code=status.HTTP_204_NO_CONTENT)
+@limiter.exempt
+async def upload_file(token: str, request: Request):
+    """Recebe o corpo do envio direto; tipo e tamanho precisam ser os declarados ao pedir a URL."""
+    claims = _claims(token, "put")
+    if request.headers.get("content-type") != claims["ct"]:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Content-Type diferente do declarado.")
+
+    path = _local_path(claims["k"])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    received = 0
+    try:
+        async with aiofiles.open(tmp_path, "wb") as f:
+            async for chunk in request.stream():
+                received += len(chunk)
+                if received > claims["len"]:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+                        detail="O arquivo ultrapassa o tamanho declarado.",
+                    )
+                await f.write(chunk)
+        if received != claims["len"]:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="O arquivo não tem o tamanho declarado.")
+        os.replace(tmp_path, path)
+    except HTTPException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    except ClientDisconnect:
+        tmp_path.unlink(missing_ok=True)
+        logger.info(f"Envio direto de '{claims['k']}' interrompido pelo cliente em {received} bytes.")
+        return Response(status_code=status.HTTP_400_BAD_REQUEST)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
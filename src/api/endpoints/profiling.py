@@ -0,0 +1,80 @@
+# src/api/endpoints/profiling.py
+"""
+Profiling sob demanda (src/core/profiling.py). Apenas para administradores.
+
+O token (de uso único) perfila uma requisição em qualquer worker do host; a amostragem contínua e o relatório de alocações
+valem para o worker que atender a chamada (o pid vem na resposta).
+"""
+import time
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from src.api.deps import get_current_active_admin
+from src.core import profiling
+from src.core.config import settings
+from src.db import models, schemas
+
+router = APIRouter()
+
+
+def _check_enabled():
+    if not settings.PROFILING_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profiling desabilitado.")
+
+
+@router.post("/token", response_model=schemas.ProfileToken)
+def create_profile_token(
+    pedido: schemas.ProfileTokenRequest,
+    current_user: models.Usuario = Depends(get_current_active_admin)
+):
+    """Token que perfila uma única requisição ao caminho informado, dentro da validade."""
+    _check_enabled()
+    minutos = min(pedido.minutos, settings.PROFILING_TOKEN_MAX_MINUTES)
+    return schemas.ProfileToken(
+        token=profiling.create_profile_token(pedido.caminho, current_user.id, minutos),
+        caminho=pedido.caminho,
+        expira_em=datetime.fromtimestamp(time.time() + minutos * 60),
+        cabecalho=profiling.PROFILE_HEADER,
+        parametro=profiling.PROFILE_QUERY_PARAM,
+    )
+
+
+@router.get("/continuo", response_model=schemas.ContinuousProfileStatus)
+def read_continuous_profile(current_user: models.Usuario = Depends(get_current_active_admin)):
+    return profiling.continuous.status()
+
+
+@router.post("/continuo/iniciar", response_model=schemas.ContinuousProfileStatus)
+def start_continuous_profile(
+    memoria: bool = Query(False, description="Liga também o tracemalloc (mais custo de CPU e memória)."),
+    current_user: models.Usuario = Depends(get_current_active_admin)
+):
+    _check_enabled()
+    if not profiling.continuous.start(memoria):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A amostragem contínua já está ligada neste worker.")
+    return profiling.continuous.status()
+
+
+@router.post("/continuo/parar", response_model=schemas.ContinuousProfileResult)
+def stop_continuous_profile(current_user: models.Usuario = Depends(get_current_active_admin)):
+    """Desliga a amostragem e salva o perfil em PROFILING_DIRECTORY."""
+    resultado = profiling.continuous.stop()
+    if resultado is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A amostragem contínua não está ligada neste worker.")
+    return resultado
+
+
+@router.get("/alocacoes", response_model=schemas.AllocationReport)
+def read_allocations(
+    limite: int = Query(30, ge=1, le=500),
+    current_user: models.Usuario = Depends(get_current_active_admin)
+):
+    """Maiores locais de alocação do worker, ordenados pelo crescimento desde o início da amostragem."""
+    relatorio = profiling.continuous.allocations(limite)
+    if relatorio is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="O tracemalloc não está ligado neste worker; inicie a amostragem contínua com memoria=true.",
+        )
+    return relatorio
@@ -0,0 +1,43 @@
+# src/api/endpoints/scheduled_jobs.py
+"""Acompanhamento das tarefas periódicas (src/services/scheduler.py). Apenas para administradores."""
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from src.api.deps import get_db, get_current_active_admin
+from src.db import models, schemas
+from src.services import scheduler
+from src.services.jobs import JOBS
+from src.utils.serialization import orm_list_response
+
+router = APIRouter()
+
+
+@router.get("/", response_model=List[schemas.ScheduledJob])
+def read_scheduled_jobs(
+    dias: int = Query(7, ge=1, le=365, description="Período das métricas, em dias."),
+    db: Session = Depends(get_db),
+    current_user: models.Usuario = Depends(get_current_active_admin)
+):
+    """Agenda, próxima execução, contagem de sucessos e erros e duração das execuções de cada tarefa."""
+    metricas = scheduler.job_metrics(db, desde=datetime.now() - timedelta(days=dias))
+    return orm_list_response(schemas.ScheduledJob, metricas)
+
+
+@router.get("/{nome}/execucoes", response_model=List[schemas.JobRun])
+def read_job_runs(
+    nome: str,
+    status_execucao: Optional[str] = Query(None, alias="status", pattern="^(executando|sucesso|erro)$"),
+    limite: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: models.Usuario = Depends(get_current_active_admin)
+):
+    """Histórico da tarefa, da execução mais recente para a mais antiga."""
+    if nome not in JOBS:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tarefa não encontrada.")
+    query = db.query(models.ExecucaoTarefa).filter(models.ExecucaoTarefa.tarefa == nome)
+    if status_execucao:
+        query = query.filter(models.ExecucaoTarefa.status == status_execucao)
+    return orm_list_response(schemas.JobRun, query.order_by(models.ExecucaoTarefa.id.desc()).limit(limite).all())
@@ -0,0 +1,104 @@
+# src/api/endpoints/uploads.py
+"""
+Uploads retomáveis (protocolo tus 1.0, extensões creation, expiration e termination).
+
+O aluno cria o upload informando o tamanho, envia o arquivo em blocos com PATCH e, se a conexão
+cair, pergunta o offset com HEAD e continua dali. Concluído, o `id` vai no campo `upload_id` de
+`inscrever-se` ou `submeter` no lugar do arquivo.
+
+`POST /uploads/direto` é a alternativa sem blocos: devolve uma URL pré-assinada para enviar o
+arquivo direto ao armazenamento (S3/MinIO) e o `upload_id` a usar na submissão.
+"""
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+
+from src.core.config import settings
+from src.core.rate_limit import get_client_key, limiter, upload_ip_limit
+from src.db import schemas
+from src.services import upload_staging
+
+router = APIRouter()
+
+
+def tus_headers(meta: dict, offset: int) -> dict:
+    return {
+        "Tus-Resumable": upload_staging.TUS_VERSION,
+        "Upload-Offset": str(offset),
+        "Upload-Length": str(meta["tamanho"]),
+        "Upload-Expires": format_datetime(datetime.fromtimestamp(meta["expira_em"], timezone.utc), usegmt=True),
+        "Cache-Control": "no-store",
+    }
+
+
+def upload_status(meta: dict, offset: int) -> schemas.UploadStatus:
+    return schemas.UploadStatus(
+        id=meta["id"], offset=offset, tamanho=meta["tamanho"], nome_arquivo=meta["nome_arquivo"],
+        expira_em=datetime.fromtimestamp(meta["expira_em"]),
+    )
+
+
+@router.post("/", response_model=schemas.UploadStatus, status_code=status.HTTP_201_CREATED)
+@limiter.limit(settings.RATE_LIMIT_UPLOAD, key_func=get_client_key)
+@upload_ip_limit
+def create_upload(
+    request: Request,
+    response: Response,
+    upload_length: int = Header(..., alias="Upload-Length"),
+    upload_metadata: Optional[str] = Header(None, alias="Upload-Metadata"),
+):
+    """Cria o upload; `Upload-Metadata` deve trazer `filename` e `filetype` (valores em base64)."""
+    metadata = upload_staging.parse_metadata(upload_metadata)
+    nome_arquivo = metadata.get("filename")
+    if not nome_arquivo:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Informe o nome do arquivo (filename) no Upload-Metadata.")
+
+    meta = upload_staging.create_upload(upload_length, nome_arquivo, metadata.get("filetype"))
+    response.headers.update(tus_headers(meta, 0))
+    response.headers["Location"] = f"{settings.API_V1_STR}/uploads/{meta['id']}"
+    return upload_status(meta, 0)
+
+
+@router.post("/direto", response_model=schemas.DirectUpload, status_code=status.HTTP_201_CREATED)
+@limiter.limit(settings.RATE_LIMIT_UPLOAD, key_func=get_client_key)
+@upload_ip_limit
+def create_direct_upload(request: Request, upload_in: schemas.DirectUploadCreate):
+    """Envie o arquivo com o `metodo` e os `cabecalhos` indicados; o Content-Length deve ser o `tamanho` declarado."""
+    return upload_staging.create_direct_upload(upload_in.tamanho, upload_in.nome_arquivo, upload_in.tipo_arquivo)
+
+
+# Pedaços, offset e cancelamento só existem para um upload já criado (limitado acima); um envio
+# grande pela rede do campus passaria fácil do limite padrão
+@router.head("/{upload_id}")
+@limiter.exempt
+def get_upload_offset(upload_id: str):
+    meta, offset = upload_staging.get_upload(upload_id)
+    return Response(status_code=status.HTTP_200_OK, headers=tus_headers(meta, offset))
+
+
+@router.patch("/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+@limiter.exempt
+async def upload_chunk(
+    request: Request,
+    upload_id: str,
+    upload_offset: int = Header(..., alias="Upload-Offset"),
+    content_type: Optional[str] = Header(None),
+):
+    """Grava o corpo a partir de `Upload-Offset`, que precisa ser igual ao offset atual (senão 409)."""
+    if content_type != upload_staging.OFFSET_CONTENT_TYPE:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Use Content-Type: {upload_staging.OFFSET_CONTENT_TYPE}.",
+        )
+    meta, offset = await upload_staging.append_chunk(upload_id, upload_offset, request.stream())
+    return Response(status_code=status.HTTP_204_NO_CONTENT, headers=tus_headers(meta, offset))
+
+
+@router.delete("/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+@limiter.exempt
+async def cancel_upload(upload_id: str):
+    await run_in_threadpool(upload_staging.delete_upload, upload_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT, headers={"Tus-Resumable": upload_staging.TUS_VERSION})
@@ -1,12 +1,15 @@
 # src/api/endpoints/users.py
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session
 from typing import List, Optional
 
 from src.api.deps import get_db, get_current_active_admin
 from src.core.security import get_password_hash
 from src.db import models, schemas
+from src.db.load_plans import USER_WITH_CAMPUS, refresh_plan
+from src.services.campus_registry import registry as campus_registry
 from src.utils.logger import logger
+from src.utils.serialization import orm_list_response
 
 router = APIRouter()
 
@@ -18,9 +21,8 @@ def read_users(
     """
     Retorna todos os usuários. Apenas para administradores.
     """
-    # Usando joinedload para carregar os dados do campus e evitar N+1 queries
-    users = db.query(models.Usuario).options(joinedload(models.Usuario.campus)).order_by(models.Usuario.nome).all()
-    return users
+    users = db.query(models.Usuario).options(*USER_WITH_CAMPUS).order_by(models.Usuario.nome).all()
+    return orm_list_response(schemas.User, users)
 
 @router.post("/", response_model=schemas.User, status_code=status.HTTP_201_CREATED)
 def create_user_by_admin(
@@ -40,7 +42,7 @@ def create_user_by_admin(
     
     # --- ALTERAÇÃO: Validar Campus ---
     if user_in.campus_id:
-        campus = db.query(models.Campus).filter(models.Campus.id == user_in.campus_id).first()
+        campus = campus_registry.get(db, user_in.campus_id)
         if not campus:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -60,7 +62,7 @@ def create_user_by_admin(
     
     db.add(db_user)
     db.commit()
-    db.refresh(db_user)
+    db_user = refresh_plan(db, db_user, USER_WITH_CAMPUS)
     
     logger.info(f"Admin '{current_user.email}' criou o usuário '{user_in.email}' com tipo '{user_in.tipo}'.")
     return db_user
@@ -86,7 +88,7 @@ def update_user_by_admin(
     
     # --- ALTERAÇÃO: Validar Campus se ele for alterado ---
     if "campus_id" in update_data and update_data["campus_id"]:
-        campus = db.query(models.Campus).filter(models.Campus.id == update_data["campus_id"]).first()
+        campus = campus_registry.get(db, update_data["campus_id"])
         if not campus:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -103,7 +105,7 @@ def update_user_by_admin(
             setattr(user_to_update, key, value)
             
     db.commit()
-    db.refresh(user_to_update)
+    user_to_update = refresh_plan(db, user_to_update, USER_WITH_CAMPUS)
     
     logger.info(f"Admin '{current_user.email}' atualizou o usuário '{user_to_update.email}' (ID: {user_id}).")
     return user_to_update
@@ -0,0 +1,248 @@
+# src/core/compression.py
+"""
+Compressão das respostas (no lugar do GZipMiddleware do Starlette).
+
+- Negocia Brotli ou gzip pelo Accept-Encoding (Brotli só se o pacote `brotli` estiver instalado).
+- Não recomprime o que já é comprimido: PDFs, imagens, .docx/.xlsx (ZIP) e afins passam direto,
+  assim como streams SSE, respostas parciais e respostas que já têm Content-Encoding.
+- Respostas 200 com ETag (listas públicas de eventos e de campi, dados do evento...) têm a forma
+  comprimida guardada em memória por (URL, ETag, codificação): a repetição custa uma cópia. O cache
+  é por worker e limitado a COMPRESSION_CACHE_MB, descartando os menos usados.
+"""
+import gzip
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+import anyio
+
+from src.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # Brotli é opcional: sem ele só gzip é oferecido
+    brotli = None
+
+# Tipos que já chegam comprimidos (ou que não ganham nada com a compressão)
+INCOMPRESSIBLE_TYPES = {
+    "application/pdf", "application/zip", "application/gzip", "application/x-gzip", "application/x-7z-compressed",
+    "application/x-rar-compressed", "application/octet-stream", "application/vnd.rar",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    "application/vnd.oasis.opendocument.text", "application/vnd.oasis.opendocument.spreadsheet",
+    "text/event-stream",
+}
+INCOMPRESSIBLE_PREFIXES = ("image/", "video/", "audio/", "font/woff")
+# SVG é texto
+COMPRESSIBLE_EXCEPTIONS = {"image/svg+xml"}
+
+# Níveis pensados para conteúdo dinâmico: quase a taxa dos níveis máximos por uma fração da CPU
+BROTLI_QUALITY = 5
+GZIP_LEVEL = 6
+# Corpos maiores que isto são comprimidos em uma thread para não travar o event loop
+THREAD_THRESHOLD = 256 * 1024
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """'br', 'gzip' ou None, pelo maior q aceito (Brotli no empate)."""
+    oferecidas = ("br", "gzip") if brotli is not None else ("gzip",)
+    pesos = {}
+    for item in accept_encoding.split(","):
+        nome, _, parametros = item.strip().partition(";")
+        nome = nome.strip().lower()
+        q = 1.0
+        parametro = parametros.strip()
+        if parametro.startswith("q="):
+            try:
+                q = float(parametro[2:])
+            except ValueError:
+                q = 0.0
+        if nome:
+            pesos[nome] = q
+    escolhida, melhor = None, 0.0
+    for codificacao in oferecidas:
+        q = pesos.get(codificacao, pesos.get("*", 0.0))
+        if q > melhor:
+            escolhida, melhor = codificacao, q
+    return escolhida
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    if not content_type:
+        return False
+    tipo = content_type.split(";", 1)[0].strip().lower()
+    if tipo in COMPRESSIBLE_EXCEPTIONS:
+        return True
+    return tipo not in INCOMPRESSIBLE_TYPES and not tipo.startswith(INCOMPRESSIBLE_PREFIXES)
+
+
+def compress(body: bytes, codificacao: str) -> bytes:
+    if codificacao == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class _StreamCompressor:
+    def __init__(self, codificacao: str):
+        if codificacao == "br":
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+            self._process, self._finish = self._compressor.process, self._compressor.finish
+        else:
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self._process, self._finish = self._compressor.compress, self._compressor.flush
+
+    def process(self, chunk: bytes) -> bytes:
+        return self._process(chunk)
+
+    def finish(self) -> bytes:
+        return self._finish()
+
+
+class BodyCache:
+    """Corpos de resposta por chave, descartando os menos usados acima de `max_bytes` (um por worker)."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        # Também usado pelas rotas síncronas, que rodam no threadpool
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, key: Hashable, body: bytes):
+        if len(body) > self.max_bytes // 4:
+            return
+        with self._lock:
+            anterior = self._entries.pop(key, None)
+            if anterior is not None:
+                self.bytes -= len(anterior)
+            self._entries[key] = body
+            self.bytes += len(body)
+            while self.bytes > self.max_bytes:
+                _, removido = self._entries.popitem(last=False)
+                self.bytes -= len(removido)
+
+
+def _header(headers: list, nome: bytes) -> Optional[str]:
+    for chave, valor in headers:
+        if chave.lower() == nome:
+            return valor.decode("latin-1")
+    return None
+
+
+def _replace_headers(headers: list, codificacao: str, tamanho: Optional[int]) -> list:
+    novos = [(chave, valor) for chave, valor in headers if chave.lower() not in (b"content-length", b"vary")]
+    vary = [valor.decode("latin-1") for chave, valor in headers if chave.lower() == b"vary"]
+    if not any("accept-encoding" in valor.lower() for valor in vary):
+        vary.append("Accept-Encoding")
+    novos.append((b"vary", ", ".join(vary).encode("latin-1")))
+    novos.append((b"content-encoding", codificacao.encode("latin-1")))
+    if tamanho is not None:
+        novos.append((b"content-length", str(tamanho).encode("latin-1")))
+    return novos
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = None, cache_bytes: int = None):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MINIMUM_SIZE if minimum_size is None else minimum_size
+        self.cache = BodyCache(settings.COMPRESSION_CACHE_MB * 1024 * 1024 if cache_bytes is None else cache_bytes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        accept = ""
+        for chave, valor in scope["headers"]:
+            if chave == b"accept-encoding":
+                accept = valor.decode("latin-1")
+                break
+        codificacao = negotiate_encoding(accept) if accept else None
+        if codificacao is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressedResponse(self, scope, codificacao, send).run(receive)
+
+
+class _CompressedResponse:
+    def __init__(self, middleware: CompressionMiddleware, scope, codificacao: str, send):
+        self.middleware = middleware
+        self.scope = scope
+        self.codificacao = codificacao
+        self.send = send
+        self.start: Optional[dict] = None
+        # None: ainda não decidido; False: passa direto; True: comprimindo em stream
+        self.comprimindo: Optional[bool] = None
+        self.stream: Optional[_StreamCompressor] = None
+
+    async def run(self, receive):
+        await self.middleware.app(self.scope, receive, self.handle)
+
+    def _cache_key(self) -> Optional[Tuple]:
+        etag = _header(self.start["headers"], b"etag")
+        if etag is None or self.start["status"] != 200 or self.scope["method"] != "GET":
+            return None
+        return (self.scope["path"], self.scope.get("query_string", b""), etag, self.codificacao)
+
+    async def handle(self, message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            headers = message["headers"]
+            status = message["status"]
+            if (
+                status < 200 or status in (204, 206, 304)
+                or _header(headers, b"content-encoding") is not None
+                or not is_compressible(_header(headers, b"content-type"))
+            ):
+                self.comprimindo = False
+                await self.send(message)
+            return
+
+        if message["type"] != "http.response.body" or self.comprimindo is False:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.comprimindo is None and not more_body:
+            # Corpo inteiro em uma mensagem (JSON das rotas): comprime de uma vez, com cache por ETag
+            self.comprimindo = False
+            if len(body) < self.middleware.minimum_size:
+                await self.send(self.start)
+                await self.send(message)
+                return
+            chave = self._cache_key()
+            comprimido = self.middleware.cache.get(chave) if chave else None
+            if comprimido is None:
+                if len(body) >= THREAD_THRESHOLD:
+                    comprimido = await anyio.to_thread.run_sync(compress, body, self.codificacao)
+                else:
+                    comprimido = compress(body, self.codificacao)
+                if chave:
+                    self.middleware.cache.put(chave, comprimido)
+            self.start["headers"] = _replace_headers(self.start["headers"], self.codificacao, len(comprimido))
+            await self.send(self.start)
+            await self.send({"type": "http.response.body", "body": comprimido})
+            return
+
+        if self.comprimindo is None:
+            # Stream (StreamingResponse, FileResponse de texto): comprime pedaço a pedaço, sem cache
+            self.comprimindo = True
+            self.stream = _StreamCompressor(self.codificacao)
+            self.start["headers"] = _replace_headers(self.start["headers"], self.codificacao, None)
+            await self.send(self.start)
+
+        dados = self.stream.process(body) if body else b""
+        if not more_body:
+            dados += self.stream.finish()
+        if dados or not more_body:
+            await self.send({"type": "http.response.body", "body": dados, "more_body": more_body})
@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
 from pydantic import EmailStr
-from typing import List
+from typing import Dict, List, Optional
 
 class Settings(BaseSettings):
     PROJECT_NAME: str
@@ -28,10 +28,120 @@ class Settings(BaseSettings):
     SMTP_USER: str
     SMTP_PASS: str
     FROM_EMAIL: EmailStr
+    # Permitem apontar o envio para um servidor SMTP local (ex.: sink do benchmark)
+    SMTP_STARTTLS: bool = True
+    SMTP_USE_CREDENTIALS: bool = True
+    SMTP_VALIDATE_CERTS: bool = True
     
     UPLOAD_DIRECTORY: str
     MAX_FILE_SIZE: int
     ALLOWED_FILE_TYPES: List[str]
+    # Uploads retomáveis não concluídos são descartados após este prazo
+    UPLOAD_STAGING_TTL_HOURS: int = 24
+
+    # Retenção das autorizações (e arquivos) e partições semestrais criadas com antecedência
+    AUTHORIZATION_RETENTION_DAYS: int = 730
+    PARTITIONS_AHEAD_SEMESTERS: int = 2
+    # Arquivo frio: eventos encerrados há mais de ARCHIVE_AFTER_DAYS saem das tabelas quentes para
+    # segmentos JSONL.gz em ARCHIVE_DIRECTORY (a retenção acima continua valendo para eles)
+    ARCHIVE_DIRECTORY: str = "arquivo"
+    ARCHIVE_AFTER_DAYS: int = 183
+
+    # Dossiê em PDF por evento: processos do pool em cada worker da API, prazo após o qual uma
+    # geração sem progresso é refeita e validade dos dossiês guardados no armazenamento
+    DOSSIER_WORKERS: int = 1
+    DOSSIER_STALE_MINUTES: int = 30
+    DOSSIER_TTL_HOURS: int = 72
+
+    # Tarefas periódicas (src/services/scheduler.py): cada worker confere a cada SCHEDULER_TICK_SECONDS
+    # quais estão vencidas e só um deles executa cada uma. SCHEDULER_SCHEDULES troca a agenda padrão
+    # de uma tarefa (ex.: {"retencao": "0 3 * * 0"}); o histórico é mantido por SCHEDULER_HISTORY_DAYS
+    SCHEDULER_ENABLED: bool = True
+    SCHEDULER_TICK_SECONDS: int = 30
+    SCHEDULER_SCHEDULES: Dict[str, str] = {}
+    SCHEDULER_HISTORY_DAYS: int = 90
+
+    # Armazenamento dos arquivos: "local" (UPLOAD_DIRECTORY) ou "s3" (AWS S3, MinIO ou compatível)
+    STORAGE_BACKEND: str = "local"
+    # Validade das URLs pré-assinadas de download e de envio direto
+    STORAGE_PRESIGN_EXPIRES_SECONDS: int = 300
+    S3_BUCKET: str = ""
+    S3_PREFIX: str = ""
+    S3_REGION: str = "us-east-1"
+    S3_ENDPOINT_URL: Optional[str] = None
+    # Endereço usado nas URLs entregues aos clientes, quando difere do interno (ex.: MinIO atrás de proxy)
+    S3_PUBLIC_ENDPOINT_URL: Optional[str] = None
+    S3_ACCESS_KEY_ID: Optional[str] = None
+    S3_SECRET_ACCESS_KEY: Optional[str] = None
+
+    RATE_LIMIT_ENABLED: bool = True
+    # Vazio: SQLite em var/rate_limit.sqlite3, compartilhado pelos workers da máquina. Com mais de uma
+    # máquina use "redis://host:6379/1"; "memory://" conta por worker (cada um com o limite inteiro)
+    RATE_LIMIT_STORAGE_URI: str = ""
+    RATE_LIMIT_DEFAULT: str = "200/minute"
+    # Login/cadastro/recuperação: RATE_LIMIT_LOGIN vale por IP + conta informada, _PER_ACCOUNT por conta
+    # vinda de qualquer IP. Envios anônimos (inscrição, submissão, criação de upload): RATE_LIMIT_UPLOAD
+    # vale por cliente (IP + Idempotency-Key ou navegador + URL). Os _PER_IP são o total de um IP,
+    # pensados para a turma inteira atrás do NAT do campus
+    RATE_LIMIT_LOGIN: str = "10/minute"
+    RATE_LIMIT_LOGIN_PER_ACCOUNT: str = "20/minute"
+    RATE_LIMIT_LOGIN_PER_IP: str = "200/minute"
+    RATE_LIMIT_UPLOAD: str = "20/minute"
+    RATE_LIMIT_UPLOAD_PER_IP: str = "600/minute"
+    RATE_LIMIT_PUBLIC_READ: str = "1000/minute"
+
+    # Compressão das respostas (src/core/compression.py): tamanho mínimo do corpo e memória, por
+    # worker, do cache das formas comprimidas das respostas com ETag
+    COMPRESSION_MINIMUM_SIZE: int = 1000
+    COMPRESSION_CACHE_MB: int = 32
+
+    # Tracing das requisições (src/core/tracing.py). Os traces ficam em memória até o fim e só são
+    # exportados os lentos (>= TRACING_SLOW_MS), os com erro e uma amostra de TRACING_SAMPLE_RATE dos
+    # demais. TRACING_EXPORTER: "file" (OTLP/JSON, um trace por linha em TRACING_FILE, padrão
+    # logs/traces.jsonl) ou "otlp" (POST em um coletor OTLP/HTTP, ex.: http://localhost:4318/v1/traces)
+    TRACING_ENABLED: bool = True
+    TRACING_EXPORTER: str = "file"
+    TRACING_FILE: str = ""
+    TRACING_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    TRACING_SLOW_MS: int = 1000
+    TRACING_SAMPLE_RATE: float = 0.01
+
+    # Profiling sob demanda (src/core/profiling.py): arquivos em PROFILING_DIRECTORY (padrão logs/profiles),
+    # intervalo da amostragem de uma requisição e da contínua (por worker) e validade máxima dos tokens,
+    # que são de uso único mas vão no cabeçalho ou na URL
+    PROFILING_ENABLED: bool = True
+    PROFILING_DIRECTORY: str = ""
+    PROFILING_REQUEST_INTERVAL_MS: int = 5
+    PROFILING_CONTINUOUS_INTERVAL_MS: int = 50
+    PROFILING_TOKEN_MAX_MINUTES: int = 5
+
+    # Comentário enviado nos streams SSE ociosos, abaixo do timeout de inatividade dos proxies
+    SSE_HEARTBEAT_SECONDS: int = 15
+
+    # Idempotency-Key das submissões públicas: validade da resposta guardada, espera máxima por uma
+    # requisição idêntica em andamento e prazo após o qual uma chave em processamento é considerada abandonada
+    IDEMPOTENCY_TTL_HOURS: int = 24
+    IDEMPOTENCY_WAIT_SECONDS: int = 30
+    IDEMPOTENCY_LOCK_SECONDS: int = 120
+
+    # Intervalo máximo entre as verificações da versão do cadastro de campi em memória
+    CAMPUS_REGISTRY_CHECK_SECONDS: int = 5
+
+    # Réplica de leitura (opcional) para as leituras públicas e os painéis. Depois de uma escrita o
+    # cliente lê do primário por REPLICA_READ_YOUR_WRITES_SECONDS; a réplica é conferida a cada
+    # REPLICA_CHECK_SECONDS e deixa de ser usada se cair ou atrasar mais que REPLICA_MAX_LAG_SECONDS
+    REPLICA_DATABASE_URL: str = ""
+    REPLICA_READ_YOUR_WRITES_SECONDS: int = 5
+    REPLICA_MAX_LAG_SECONDS: int = 30
+    REPLICA_CHECK_SECONDS: int = 10
+
+    # Aquecimento na subida de cada worker: conexões abertas no pool antes do primeiro request
+    WARMUP_ENABLED: bool = True
+    WARMUP_DB_CONNECTIONS: int = 5
+
+    # Modo estrito do ORM: relacionamento não carregado pela consulta levanta erro em vez de
+    # disparar um SELECT implícito (ligado no benchmark e nos smoke tests; opcional em homologação)
+    ORM_STRICT_LOADING: bool = False
 
     class Config:
         case_sensitive = True
@@ -0,0 +1,466 @@
+# src/core/profiling.py
+"""
+Profiling sob demanda em produção: CPU por amostragem das pilhas e alocações com tracemalloc, sem
+dependências externas.
+
+- Uma requisição: um administrador pede um token (POST /api/v1/profiling/token), válido por poucos
+  minutos, só para o caminho informado e para uma única requisição, e o envia no cabeçalho X-Profile
+  ou no parâmetro ?profile=. Os tokens usados ficam marcados em PROFILING_DIRECTORY/.tokens.
+  A requisição roda com o amostrador e o tracemalloc ligados e, ao fim, ficam em PROFILING_DIRECTORY
+  (padrão logs/profiles) o perfil para o speedscope (.speedscope.json), as pilhas agregadas para o
+  flamegraph.pl (.folded) e a diferença das alocações (.alocacoes.txt). O prefixo dos arquivos volta
+  no cabeçalho X-Profile-Id e o trace da requisição é sempre exportado.
+- Contínuo, por worker: amostragem com intervalo maior (PROFILING_CONTINUOUS_INTERVAL_MS), ligada e
+  desligada pelos endpoints de /profiling, opcionalmente com o tracemalloc para comparar as
+  alocações com as do início (vazamentos). Cada chamada atinge um só worker: a resposta traz o pid.
+
+O amostrador lê as pilhas de todas as threads do processo (sys._current_frames) e ignora as ociosas;
+o perfil de uma requisição inclui, portanto, o que outras requisições do mesmo worker fizeram no
+mesmo intervalo. Uma requisição perfilada por vez em cada worker.
+"""
+import json
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+import anyio
+from jose import JWTError
+
+from src.core import tracing
+from src.core.config import settings
+from src.core.security import create_transfer_token, decode_transfer_token
+from src.utils.logger import logger
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+PROFILE_QUERY_PARAM = "profile"
+# Operação dos tokens de profiling (src/core/security.py)
+PROFILE_TOKEN_OPERATION = "perfil"
+
+# Profundidade máxima guardada de cada pilha (amostrador) e de cada alocação (tracemalloc)
+MAX_STACK_DEPTH = 128
+TRACEMALLOC_FRAMES = 10
+# Pilhas distintas guardadas pela amostragem contínua; as novas além disso só entram na contagem
+MAX_UNIQUE_STACKS = 50000
+# Linhas dos relatórios de alocação
+ALLOCATION_REPORT_LINES = 50
+
+# Frame no topo da pilha de uma thread parada esperando trabalho (event loop, threadpool, filas)
+IDLE_FRAMES = {
+    ("selectors.py", "select"), ("threading.py", "wait"), ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"), ("socket.py", "accept"), ("socketserver.py", "serve_forever"),
+}
+
+_PROJECT_ROOT = str(Path(__file__).resolve().parents[2]) + os.sep
+_SITE_PACKAGES = "site-packages" + os.sep
+
+Frame = Tuple[str, str, int]
+
+
+def profile_directory() -> Path:
+    return Path(settings.PROFILING_DIRECTORY) if settings.PROFILING_DIRECTORY else Path(_PROJECT_ROOT) / "logs" / "profiles"
+
+
+def _short_path(caminho: str) -> str:
+    if caminho.startswith(_PROJECT_ROOT):
+        return caminho[len(_PROJECT_ROOT):]
+    _, separador, resto = caminho.rpartition(_SITE_PACKAGES)
+    return resto if separador else caminho
+
+
+def _profile_name(rotulo: str) -> str:
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", rotulo).strip("-")[:60]
+    return f"{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}-{slug}"
+
+
+# --- AMOSTRAGEM DA CPU ---
+class Sampler:
+    """Lê as pilhas das threads do processo a cada `intervalo` segundos, em uma thread própria."""
+
+    def __init__(self, intervalo: float, max_pilhas: int = MAX_UNIQUE_STACKS):
+        self.intervalo = intervalo
+        self.max_pilhas = max_pilhas
+        # (nome da thread, pilha da raiz para o topo) -> amostras
+        self.pilhas: Counter = Counter()
+        self.amostras = 0
+        self.descartadas = 0
+        self.inicio: Optional[float] = None
+        self.fim: Optional[float] = None
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self.inicio = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profiling-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._parar.set()
+        self._thread.join()
+        self.fim = time.perf_counter()
+
+    @property
+    def duracao_ms(self) -> float:
+        return ((self.fim or time.perf_counter()) - self.inicio) * 1000 if self.inicio else 0.0
+
+    def _run(self):
+        while not self._parar.wait(self.intervalo):
+            self._sample()
+
+    def _sample(self):
+        proprio = threading.get_ident()
+        nomes = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == proprio:
+                continue
+            code = frame.f_code
+            if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                continue
+            pilha: List[Frame] = []
+            while frame is not None and len(pilha) < MAX_STACK_DEPTH:
+                code = frame.f_code
+                pilha.append((getattr(code, "co_qualname", code.co_name), code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            pilha.reverse()
+            chave = (nomes.get(ident, str(ident)), tuple(pilha))
+            if chave in self.pilhas or len(self.pilhas) < self.max_pilhas:
+                self.pilhas[chave] += 1
+            else:
+                self.descartadas += 1
+        self.amostras += 1
+
+    def _peso_ms(self) -> float:
+        # Intervalo real entre as amostras (a leitura das pilhas também leva tempo)
+        return self.duracao_ms / self.amostras if self.amostras else self.intervalo * 1000
+
+    def to_speedscope(self, nome: str) -> dict:
+        """Formato 'sampled' do speedscope (https://www.speedscope.app), um perfil por thread."""
+        frames, indices = [], {}
+        perfis: Dict[str, dict] = {}
+        peso = self._peso_ms()
+        for (thread, pilha), amostras in self.pilhas.items():
+            ids = []
+            for frame in pilha:
+                indice = indices.get(frame)
+                if indice is None:
+                    indice = indices[frame] = len(frames)
+                    frames.append({"name": frame[0], "file": _short_path(frame[1]), "line": frame[2]})
+                ids.append(indice)
+            perfil = perfis.setdefault(thread, {"samples": [], "weights": []})
+            perfil["samples"].append(ids)
+            perfil["weights"].append(round(amostras * peso, 3))
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": nome,
+            "exporter": "src.core.profiling",
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled", "name": thread, "unit": "milliseconds",
+                    "startValue": 0, "endValue": round(sum(perfil["weights"]), 3),
+                    "samples": perfil["samples"], "weights": perfil["weights"],
+                }
+                for thread, perfil in sorted(perfis.items())
+            ],
+        }
+
+    def to_folded(self) -> str:
+        """Pilhas agregadas ("thread;raiz;...;topo amostras"), entrada do flamegraph.pl e afins."""
+        linhas = []
+        for (thread, pilha), amostras in sorted(self.pilhas.items(), key=lambda item: -item[1]):
+            quadros = ";".join(f"{nome} ({_short_path(arquivo)}:{linha})" for nome, arquivo, linha in pilha)
+            linhas.append(f"{thread};{quadros} {amostras}")
+        return "\n".join(linhas) + "\n"
+
+    def save(self, nome: str) -> List[str]:
+        diretorio = profile_directory()
+        diretorio.mkdir(parents=True, exist_ok=True)
+        (diretorio / f"{nome}.speedscope.json").write_text(json.dumps(self.to_speedscope(nome)), encoding="utf-8")
+        (diretorio / f"{nome}.folded").write_text(self.to_folded(), encoding="utf-8")
+        return [f"{nome}.speedscope.json", f"{nome}.folded"]
+
+
+# --- ALOCAÇÕES (tracemalloc) ---
+# O tracemalloc é global ao processo: fica ligado enquanto houver quem o use (requisição ou contínuo)
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+
+
+def _acquire_tracemalloc():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        _tracemalloc_users += 1
+
+
+def _release_tracemalloc():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0:
+            tracemalloc.stop()
+
+
+def _snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ))
+
+
+def _site(traceback: tracemalloc.Traceback) -> str:
+    frame = traceback[0]
+    return f"{_short_path(frame.filename)}:{frame.lineno}"
+
+
+def allocation_sites(atual: tracemalloc.Snapshot, base: Optional[tracemalloc.Snapshot], limite: int) -> List[dict]:
+    """Maiores locais de alocação; com `base`, ordenados pelo crescimento desde ela."""
+    if base is None:
+        return [
+            {"local": _site(estatistica.traceback), "tamanho_kb": round(estatistica.size / 1024, 1),
+             "blocos": estatistica.count, "crescimento_kb": None}
+            for estatistica in atual.statistics("lineno")[:limite]
+        ]
+    return [
+        {"local": _site(diferenca.traceback), "tamanho_kb": round(diferenca.size / 1024, 1),
+         "blocos": diferenca.count, "crescimento_kb": round(diferenca.size_diff / 1024, 1)}
+        for diferenca in atual.compare_to(base, "lineno")[:limite]
+    ]
+
+
+def _allocation_report(titulo: str, atual: tracemalloc.Snapshot, base: Optional[tracemalloc.Snapshot]) -> str:
+    linhas = [titulo, ""]
+    for site in allocation_sites(atual, base, ALLOCATION_REPORT_LINES):
+        crescimento = "" if site["crescimento_kb"] is None else f" ({site['crescimento_kb']:+.1f} KiB)"
+        linhas.append(f"{site['tamanho_kb']:>10.1f} KiB {site['blocos']:>8} blocos{crescimento}  {site['local']}")
+    # Pilhas completas dos maiores responsáveis, para achar quem chamou o local da alocação
+    estatisticas = atual.compare_to(base, "traceback") if base is not None else atual.statistics("traceback")
+    for estatistica in estatisticas[:5]:
+        linhas += ["", f"{estatistica.size / 1024:.1f} KiB em {estatistica.count} blocos:"]
+        linhas += [f"  {linha}" for linha in estatistica.traceback.format(most_recent_first=True)]
+    return "\n".join(linhas) + "\n"
+
+
+def _save_text(nome: str, sufixo: str, texto: str) -> str:
+    diretorio = profile_directory()
+    diretorio.mkdir(parents=True, exist_ok=True)
+    (diretorio / f"{nome}{sufixo}").write_text(texto, encoding="utf-8")
+    return f"{nome}{sufixo}"
+
+
+# --- UMA REQUISIÇÃO ---
+_request_lock = threading.Lock()
+
+
+class _RequestProfile:
+    def __init__(self, nome: str):
+        self.nome = nome
+        self.sampler = Sampler(settings.PROFILING_REQUEST_INTERVAL_MS / 1000)
+
+    def start(self):
+        _acquire_tracemalloc()
+        tracemalloc.reset_peak()
+        self.antes = _snapshot()
+        self.sampler.start()
+
+    def stop(self):
+        self.sampler.stop()
+        try:
+            self.depois = _snapshot()
+            _, self.pico = tracemalloc.get_traced_memory()
+        finally:
+            _release_tracemalloc()
+
+    def save(self):
+        self.sampler.save(self.nome)
+        titulo = (
+            f"{self.nome}: {self.sampler.duracao_ms:.1f} ms, {self.sampler.amostras} amostras; "
+            f"pico rastreado {self.pico / 1024:.1f} KiB. Alocações vivas ao fim, comparadas com o início:"
+        )
+        _save_text(self.nome, ".alocacoes.txt", _allocation_report(titulo, self.depois, self.antes))
+
+
+def create_profile_token(caminho: str, usuario_id: int, minutos: int) -> str:
+    claims = {"op": PROFILE_TOKEN_OPERATION, "p": caminho, "uid": usuario_id, "jti": uuid.uuid4().hex}
+    return create_transfer_token(claims, minutos * 60)
+
+
+def _consume_token(jti: str) -> bool:
+    """
+    Marca o token como usado, um arquivo por jti (O_EXCL: vale entre os workers do host); False se
+    ele já tinha sido usado. Remove as marcas mais antigas que a validade máxima dos tokens.
+    """
+    diretorio = profile_directory() / ".tokens"
+    diretorio.mkdir(parents=True, exist_ok=True)
+    limite = time.time() - settings.PROFILING_TOKEN_MAX_MINUTES * 60
+    for arquivo in diretorio.iterdir():
+        try:
+            if arquivo.stat().st_mtime < limite:
+                arquivo.unlink()
+        except FileNotFoundError:
+            pass
+    try:
+        os.close(os.open(diretorio / jti, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600))
+    except FileExistsError:
+        return False
+    return True
+
+
+def _request_token(scope) -> Optional[str]:
+    for chave, valor in scope["headers"]:
+        if chave == PROFILE_HEADER.lower().encode():
+            return valor.decode("latin-1")
+    consulta = scope.get("query_string", b"").decode("latin-1")
+    if f"{PROFILE_QUERY_PARAM}=" in consulta:
+        valores = parse_qs(consulta).get(PROFILE_QUERY_PARAM)
+        if valores:
+            return valores[0]
+    return None
+
+
+class ProfilingMiddleware:
+    """Perfila a requisição que trouxer um token de profiling válido para o caminho dela."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        token = _request_token(scope) if scope["type"] == "http" and settings.PROFILING_ENABLED else None
+        if token is None:
+            await self.app(scope, receive, send)
+            return
+        try:
+            claims = decode_transfer_token(token, PROFILE_TOKEN_OPERATION)
+            if claims.get("p") != scope["path"]:
+                raise JWTError("Token de profiling emitido para outro caminho.")
+            if not re.fullmatch(r"[0-9a-f]{32}", claims.get("jti") or ""):
+                raise JWTError("Token de profiling sem identificador.")
+        except JWTError as e:
+            logger.warning(f"Profiling: token recusado para {scope['path']}: {e}")
+            await self.app(scope, receive, send)
+            return
+        if not _request_lock.acquire(blocking=False):
+            logger.warning(f"Profiling: já há uma requisição sendo perfilada neste worker; {scope['path']} segue sem profiling.")
+            await self.app(scope, receive, send)
+            return
+        if not await anyio.to_thread.run_sync(_consume_token, claims["jti"]):
+            _request_lock.release()
+            logger.warning(f"Profiling: token já usado recusado para {scope['path']}.")
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            perfil = _RequestProfile(_profile_name(f"{scope['method']} {scope['path']}"))
+            raiz = tracing.current_span()
+            if raiz is not None:
+                raiz.trace.manter = True
+                raiz.set(**{"profiling.id": perfil.nome})
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (PROFILE_ID_HEADER.lower().encode(), perfil.nome.encode())
+                    ]
+                await send(message)
+
+            await anyio.to_thread.run_sync(perfil.start)
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                await anyio.to_thread.run_sync(perfil.stop)
+            await anyio.to_thread.run_sync(perfil.save)
+            logger.info(
+                f"Profiling: {scope['method']} {scope['path']} (usuário {claims.get('uid')}) salvo em "
+                f"{profile_directory() / perfil.nome}.* ({perfil.sampler.amostras} amostras)."
+            )
+        finally:
+            _request_lock.release()
+
+
+# --- CONTÍNUO (POR WORKER) ---
+class ContinuousProfiler:
+    """Amostragem de baixo custo ligada e desligada pela API; uma por processo."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.sampler: Optional[Sampler] = None
+        self.memoria = False
+        self.base: Optional[tracemalloc.Snapshot] = None
+        self.iniciado_em: Optional[datetime] = None
+
+    def status(self) -> dict:
+        return {
+            "pid": os.getpid(),
+            "ativo": self.sampler is not None,
+            "memoria": self.memoria,
+            "iniciado_em": self.iniciado_em,
+            "amostras": self.sampler.amostras if self.sampler else 0,
+            "intervalo_ms": settings.PROFILING_CONTINUOUS_INTERVAL_MS,
+        }
+
+    def start(self, memoria: bool) -> bool:
+        """False se já estiver ligado neste worker."""
+        with self._lock:
+            if self.sampler is not None:
+                return False
+            if memoria:
+                _acquire_tracemalloc()
+                self.base = _snapshot()
+            self.memoria = memoria
+            self.iniciado_em = datetime.now()
+            self.sampler = Sampler(settings.PROFILING_CONTINUOUS_INTERVAL_MS / 1000)
+            self.sampler.start()
+            logger.info(f"Profiling: amostragem contínua ligada (memória: {'sim' if memoria else 'não'}).")
+            return True
+
+    def stop(self) -> Optional[dict]:
+        """Desliga e salva o perfil (e as alocações comparadas com o início); None se não estava ligado."""
+        with self._lock:
+            if self.sampler is None:
+                return None
+            sampler, self.sampler = self.sampler, None
+            sampler.stop()
+            nome = _profile_name("continuo")
+            arquivos = sampler.save(nome)
+            if self.memoria:
+                try:
+                    titulo = f"{nome}: alocações vivas comparadas com as de {self.iniciado_em:%Y-%m-%d %H:%M:%S}:"
+                    arquivos.append(_save_text(nome, ".alocacoes.txt", _allocation_report(titulo, _snapshot(), self.base)))
+                finally:
+                    self.base = None
+                    self.memoria = False
+                    _release_tracemalloc()
+            self.iniciado_em = None
+            logger.info(f"Profiling: amostragem contínua desligada ({sampler.amostras} amostras) e salva em {nome}.*")
+            return {"pid": os.getpid(), "amostras": sampler.amostras, "descartadas": sampler.descartadas,
+                    "duracao_ms": round(sampler.duracao_ms, 1), "arquivos": arquivos}
+
+    def allocations(self, limite: int) -> Optional[dict]:
+        """Maiores locais de alocação agora (e o crescimento desde o início); None sem o tracemalloc ligado."""
+        with self._lock:
+            if not self.memoria:
+                return None
+            atual = _snapshot()
+            sites = allocation_sites(atual, self.base, limite)
+            nome = _profile_name("alocacoes")
+            titulo = f"{nome}: alocações vivas comparadas com as de {self.iniciado_em:%Y-%m-%d %H:%M:%S}:"
+            arquivo = _save_text(nome, ".alocacoes.txt", _allocation_report(titulo, atual, self.base))
+            total = sum(estatistica.size for estatistica in atual.statistics("filename"))
+            return {"pid": os.getpid(), "desde": self.iniciado_em, "total_kb": round(total / 1024, 1),
+                    "arquivo": arquivo, "sitios": sites}
+
+
+continuous = ContinuousProfiler()
@@ -0,0 +1,194 @@
+# src/core/rate_limit.py
+import hashlib
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from fastapi import Request
+from jose import JWTError, jwt
+from limits.storage import Storage
+from slowapi import Limiter
+from slowapi.util import get_remote_address
+
+from .config import settings
+from src.utils.logger import logger
+
+# Fração dos incrementos que também apagam os contadores vencidos do SQLite
+SQLITE_PURGE_PROBABILITY = 0.01
+
+
+def get_rate_limit_key(request: Request) -> str:
+    """
+    Chave do rate limit: o usuário autenticado quando houver um token válido, senão o IP.
+    Assim os professores não dividem o orçamento com todos os alunos atrás do NAT do campus.
+    """
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+        except JWTError:
+            payload = {}
+        user_key = payload.get("uid") or payload.get("sub")
+        if user_key:
+            return f"usuario:{user_key}"
+    return f"ip:{get_remote_address(request)}"
+
+
+def get_client_key(request: Request) -> str:
+    """
+    Chave das rotas anônimas de envio, onde só o IP juntaria a turma inteira atrás do NAT do campus:
+    o IP mais o cliente (a Idempotency-Key do formulário ou, sem ela, o User-Agent) e o alvo da URL
+    (evento ou autorização). Os cabeçalhos são do cliente; quem os troca a cada envio só esbarra no
+    orçamento do IP (get_ip_key), por isso o login usa get_account_key.
+    """
+    chave = get_rate_limit_key(request)
+    if chave.startswith("usuario:"):
+        return chave
+    cliente = request.headers.get("idempotency-key") or request.headers.get("user-agent", "")
+    resumo = hashlib.sha256(f"{request.url.path}|{cliente}".encode()).hexdigest()[:16]
+    return f"{chave}:{resumo}"
+
+
+def get_ip_key(request: Request) -> str:
+    return f"ip:{get_remote_address(request)}"
+
+
+def _submitted_account(request: Request) -> str:
+    """
+    Conta informada no corpo (`username` do formulário do login, `email` do JSON do cadastro e da
+    recuperação). O FastAPI já leu o corpo neste mesmo Request antes de chamar o endpoint, e o
+    Starlette guarda o resultado em _form/_json.
+    """
+    form = getattr(request, "_form", None)
+    dados = form if form is not None else getattr(request, "_json", None)
+    if not hasattr(dados, "get"):
+        return ""
+    conta = dados.get("username") or dados.get("email") or ""
+    return conta.strip().lower() if isinstance(conta, str) else ""
+
+
+def get_account_key(request: Request) -> str:
+    """Chave das rotas de login, cadastro e recuperação de senha: IP + conta informada."""
+    conta = hashlib.sha256(_submitted_account(request).encode()).hexdigest()[:16]
+    return f"ip:{get_remote_address(request)}:conta:{conta}"
+
+
+def get_account_only_key(request: Request) -> str:
+    """A conta informada, de qualquer IP: tentativas distribuídas contra uma mesma conta."""
+    return f"conta:{hashlib.sha256(_submitted_account(request).encode()).hexdigest()[:16]}"
+
+
+class SQLiteStorage(Storage):
+    """
+    Contadores do rate limit em um arquivo SQLite (modo WAL) compartilhado pelos workers da máquina:
+    `sqlite:////caminho/absoluto.db`. Cada incremento é um único UPSERT atômico. Atende a estratégia
+    fixed-window, a padrão do slowapi.
+    """
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri: str, wrap_exceptions: bool = False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.caminho = uri.split("://", 1)[1]
+        Path(self.caminho).parent.mkdir(parents=True, exist_ok=True)
+        # Uma conexão por thread e por processo (o limiter é criado no master, antes do fork)
+        self._local = threading.local()
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _conexao(self) -> sqlite3.Connection:
+        conexao = getattr(self._local, "conexao", None)
+        if conexao is None or self._local.pid != os.getpid():
+            conexao = sqlite3.connect(self.caminho, timeout=5, isolation_level=None, check_same_thread=False)
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute("PRAGMA synchronous=NORMAL")
+            conexao.execute(
+                "CREATE TABLE IF NOT EXISTS contadores (chave TEXT PRIMARY KEY, valor INTEGER NOT NULL, expira REAL NOT NULL)"
+            )
+            self._local.conexao, self._local.pid = conexao, os.getpid()
+        return conexao
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        agora = time.time()
+        conexao = self._conexao()
+        # Janela vencida recomeça do zero; senão soma (o SET enxerga os valores antigos da linha)
+        valor = conexao.execute(
+            "INSERT INTO contadores (chave, valor, expira) VALUES (?, ?, ?) "
+            "ON CONFLICT (chave) DO UPDATE SET "
+            "valor = CASE WHEN expira <= ? THEN excluded.valor ELSE valor + excluded.valor END, "
+            "expira = CASE WHEN expira <= ? THEN excluded.expira ELSE expira END "
+            "RETURNING valor",
+            (key, amount, agora + expiry, agora, agora),
+        ).fetchone()[0]
+        if random.random() < SQLITE_PURGE_PROBABILITY:
+            conexao.execute("DELETE FROM contadores WHERE expira <= ?", (agora,))
+        return valor
+
+    def get(self, key: str) -> int:
+        linha = self._conexao().execute(
+            "SELECT valor FROM contadores WHERE chave = ? AND expira > ?", (key, time.time())
+        ).fetchone()
+        return linha[0] if linha else 0
+
+    def get_expiry(self, key: str) -> float:
+        linha = self._conexao().execute("SELECT expira FROM contadores WHERE chave = ?", (key,)).fetchone()
+        return max(linha[0], time.time()) if linha else time.time()
+
+    def check(self) -> bool:
+        try:
+            self._conexao().execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self) -> int:
+        return self._conexao().execute("DELETE FROM contadores").rowcount
+
+    def clear(self, key: str) -> None:
+        self._conexao().execute("DELETE FROM contadores WHERE chave = ?", (key,))
+
+
+def rate_limit_storage_uri() -> str:
+    """RATE_LIMIT_STORAGE_URI ou, por padrão, o SQLite em var/ da aplicação (compartilhado pelos workers)."""
+    if settings.RATE_LIMIT_STORAGE_URI:
+        return settings.RATE_LIMIT_STORAGE_URI
+    return f"sqlite:///{Path(__file__).resolve().parents[2] / 'var' / 'rate_limit.sqlite3'}"
+
+
+storage_uri = rate_limit_storage_uri()
+limiter = Limiter(
+    key_func=get_rate_limit_key,
+    default_limits=[settings.RATE_LIMIT_DEFAULT],
+    storage_uri=storage_uri,
+    # Os contadores são por rota (função), não por URL, para que IDs no caminho não os fragmentem
+    key_style="endpoint",
+    key_prefix="ifroautoriza",
+    # Só para o Redis: se ele cair, continua limitando em memória (por worker) e avisa no log em vez de
+    # derrubar as requisições. O SQLite local não tem esse modo de falha
+    in_memory_fallback_enabled=storage_uri.startswith("redis"),
+    enabled=settings.RATE_LIMIT_ENABLED,
+)
+
+
+# Orçamento por IP, do tamanho de um NAT de campus, dividido entre as rotas de cada grupo
+upload_ip_limit = limiter.shared_limit(settings.RATE_LIMIT_UPLOAD_PER_IP, scope="envios", key_func=get_ip_key)
+login_ip_limit = limiter.shared_limit(settings.RATE_LIMIT_LOGIN_PER_IP, scope="login", key_func=get_ip_key)
+login_account_limit = limiter.shared_limit(
+    settings.RATE_LIMIT_LOGIN_PER_ACCOUNT, scope="login-conta", key_func=get_account_only_key
+)
+
+
+class _StorageWarnings(logging.Handler):
+    """Repassa ao log da aplicação os avisos do armazenamento do slowapi (fora do ar, troca para a memória), não cada 429."""
+
+    def emit(self, record):
+        if "exceeded at endpoint" not in record.getMessage():
+            logger.handle(record)
+
+
+limiter.logger.addHandler(_StorageWarnings())
@@ -16,6 +16,27 @@ def get_password_hash(password: str) -> str:
 def create_access_token(data: dict, user: Usuario) -> str:
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire, "tipo": user.tipo, "campus_id": user.campus_id})
+    to_encode.update({"exp": expire, "tipo": user.tipo, "campus_id": user.campus_id, "uid": user.id})
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
-    return encoded_jwt
\ No newline at end of file
+    return encoded_jwt
+
+# Tokens das URLs pré-assinadas do armazenamento local: curtos, com finalidade própria
+# (um token de acesso não serve como token de arquivo, nem o contrário)
+TRANSFER_TOKEN_PURPOSE = "arquivo"
+
+
+def create_transfer_token(claims: dict, expires_in: int) -> str:
+    to_encode = claims.copy()
+    to_encode.update({
+        "exp": datetime.now(timezone.utc) + timedelta(seconds=expires_in),
+        "finalidade": TRANSFER_TOKEN_PURPOSE,
+    })
+    return jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+
+
+def decode_transfer_token(token: str, operacao: str) -> dict:
+    """Claims do token, ou JWTError se for inválido, expirado ou de outra operação."""
+    claims = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+    if claims.get("finalidade") != TRANSFER_TOKEN_PURPOSE or claims.get("op") != operacao:
+        raise JWTError("Token de transferência inválido para esta operação.")
+    return claims
@@ -0,0 +1,524 @@
+# src/core/tracing.py
+"""
+Tracing leve das requisições e das tarefas agendadas, sem dependências externas.
+
+Cada requisição (ou execução de tarefa) abre um trace com um span raiz; o span corrente fica em
+uma ContextVar, que o threadpool do FastAPI, as background tasks e o `logger` (campo trace_id)
+enxergam. Spans automáticos:
+
+- dependências do FastAPI (instrument_dependencies, chamado no main depois dos routers);
+- comandos SQL de todos os engines (eventos before/after_cursor_execute);
+- operações do armazenamento (traced_methods nos backends) e gravação dos uploads;
+- envios de e-mail (SMTP);
+- background tasks, que rodam depois da resposta e não contam para a lentidão dela.
+
+Amostragem na cauda: os spans ficam em memória até o trace terminar; só então se decide exportar.
+Traces com erro ou com algum span acima de TRACING_SLOW_MS sempre são mantidos, os demais com
+probabilidade TRACING_SAMPLE_RATE. Um `traceparent` (W3C) recebido é continuado, e o id do trace
+volta no cabeçalho X-Trace-Id. A exportação roda em uma thread, no formato OTLP/JSON, para um
+arquivo (um trace por linha) ou para um coletor OTLP/HTTP.
+"""
+import functools
+import inspect
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from starlette.background import BackgroundTask
+from sqlalchemy.engine import Engine
+
+from src.core.config import settings
+from src.utils.logger import logger, trace_id_var
+
+# Limite de spans guardados por trace (ex.: um loop com milhares de SELECTs)
+MAX_SPANS_PER_TRACE = 2000
+# Tamanho máximo do SQL guardado no span
+MAX_STATEMENT_LENGTH = 1000
+# Traces aguardando exportação; acima disso são descartados (o exportador não segura as requisições)
+EXPORT_QUEUE_SIZE = 1000
+EXPORT_BATCH_SIZE = 50
+EXPORT_TIMEOUT_SECONDS = 5
+TRACE_ID_HEADER = "X-Trace-Id"
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+# Tipos de span do OTLP
+SPAN_KIND_INTERNAL, SPAN_KIND_SERVER, SPAN_KIND_CLIENT = 1, 2, 3
+
+
+class Trace:
+    def __init__(self, trace_id: str, manter: bool = False):
+        self.trace_id = trace_id
+        self.spans: List["Span"] = []
+        self.descartados = 0
+        self.erro = False
+        # Sempre exportado (ex.: traceparent com a flag de amostragem)
+        self.manter = manter
+        # Depois da decisão da amostragem (finish) não entram mais spans (ex.: o resto de um stream SSE)
+        self.fechado = False
+        self._lock = threading.Lock()
+
+    def add(self, span: "Span"):
+        with self._lock:
+            if self.fechado:
+                return
+            if len(self.spans) < MAX_SPANS_PER_TRACE:
+                self.spans.append(span)
+            else:
+                self.descartados += 1
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns", "attributes", "error",
+                 "segundo_plano")
+
+    def __init__(self, trace: Trace, name: str, parent_id: Optional[str], kind: int = SPAN_KIND_INTERNAL,
+                 attributes: Optional[Dict[str, Any]] = None, segundo_plano: bool = False):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes or {}
+        self.error: Optional[str] = None
+        # Background task (ou dentro de uma): não conta para a lentidão da requisição
+        self.segundo_plano = segundo_plano
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def record_error(self, error):
+        self.error = f"{type(error).__name__}: {error}" if isinstance(error, BaseException) else str(error)
+        self.trace.erro = True
+
+    def record_exception(self, error: BaseException):
+        # HTTPException 4xx (login inválido, 404...) é resposta esperada, não erro do trace
+        status_code = getattr(error, "status_code", None)
+        if isinstance(status_code, int) and status_code < 500:
+            self.set(**{"http.exception_status": status_code})
+        else:
+            self.record_error(error)
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.trace.add(self)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("tracing_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def current_trace_id() -> Optional[str]:
+    span = _current_span.get()
+    return span.trace.trace_id if span else None
+
+
+# --- SPANS ---
+@contextmanager
+def span(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes):
+    """Span filho do corrente; fora de um trace não faz nada (e entrega None)."""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    atual = Span(parent.trace, name, parent.span_id, kind, attributes, parent.segundo_plano)
+    token = _current_span.set(atual)
+    try:
+        yield atual
+    except BaseException as e:
+        atual.record_exception(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        atual.end()
+
+
+@contextmanager
+def trace(name: str, kind: int = SPAN_KIND_INTERNAL, traceparent: Optional[str] = None, **attributes):
+    """Abre um trace novo (ou continua o do `traceparent`) com o span raiz; exporta ao sair."""
+    if not settings.TRACING_ENABLED:
+        yield None
+        return
+    trace_id, parent_id, manter = None, None, False
+    match = _TRACEPARENT.match(traceparent.strip().lower()) if traceparent else None
+    if match:
+        trace_id, parent_id, manter = match.group(1), match.group(2), match.group(3) == "01"
+    raiz = Span(Trace(trace_id or os.urandom(16).hex(), manter=manter), name, parent_id, kind, attributes)
+    token = _current_span.set(raiz)
+    log_token = trace_id_var.set(raiz.trace.trace_id)
+    try:
+        yield raiz
+    except BaseException as e:
+        raiz.record_exception(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        trace_id_var.reset(log_token)
+        raiz.end()
+        finish(raiz.trace)
+
+
+def traced(name: str = None, **attributes):
+    """Decorador: a função (síncrona ou async) vira um span."""
+    def decorator(func):
+        nome = name or func.__qualname__
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(nome, **attributes):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(nome, **attributes):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _traced_method(original, nome: str):
+    @functools.wraps(original)
+    def wrapper(self, *args, **kwargs):
+        if _current_span.get() is None:
+            return original(self, *args, **kwargs)
+        with span(nome, **{"storage.backend": self.name}) as atual:
+            if args:
+                atual.set(**{"storage.key": str(args[0])})
+            return original(self, *args, **kwargs)
+    return wrapper
+
+
+def traced_methods(prefixo: str, metodos: tuple):
+    """Decorador de classe: spans `<prefixo>.<método>` com a chave (primeiro argumento) como atributo."""
+    def decorator(cls):
+        for metodo in metodos:
+            setattr(cls, metodo, _traced_method(getattr(cls, metodo), f"{prefixo}.{metodo}"))
+        return cls
+    return decorator
+
+
+# --- DEPENDÊNCIAS DO FASTAPI ---
+def _wrap_dependency(call, wrapped: dict):
+    if call in wrapped:
+        return wrapped[call]
+    nome = f"dependência {getattr(call, '__name__', type(call).__name__)}"
+    if inspect.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def wrapper(*args, **kwargs):
+            with span(nome):
+                return await call(*args, **kwargs)
+    elif inspect.isgeneratorfunction(call):
+        # Mede só a preparação (até o yield); a finalização continua com o FastAPI
+        @functools.wraps(call)
+        def wrapper(*args, **kwargs):
+            with span(nome):
+                gen = call(*args, **kwargs)
+                valor = next(gen)
+            try:
+                yield valor
+            except BaseException as e:
+                try:
+                    gen.throw(e)
+                except StopIteration:
+                    return
+                raise
+            else:
+                next(gen, None)
+    elif inspect.isfunction(call):
+        @functools.wraps(call)
+        def wrapper(*args, **kwargs):
+            with span(nome):
+                return call(*args, **kwargs)
+    else:
+        # Classes, esquemas de segurança (OAuth2PasswordBearer) e geradores async ficam como estão
+        wrapper = call
+    wrapped[call] = wrapper
+    return wrapper
+
+
+# Rota original -> caminho completo, com o prefixo do include_router (nome dos spans raiz)
+_route_paths: dict = {}
+
+
+def instrument_dependencies(app):
+    """Troca as dependências das rotas por versões com span (o mesmo wrapper por função, para o cache do FastAPI)."""
+    from fastapi.routing import APIRoute
+
+    wrapped = {}
+    vistos = set()
+
+    def visit(dependant):
+        for dependencia in dependant.dependencies:
+            if id(dependencia) in vistos:
+                continue
+            vistos.add(id(dependencia))
+            if dependencia.call is not None:
+                dependencia.call = _wrap_dependency(dependencia.call, wrapped)
+            visit(dependencia)
+
+    for route in app.routes:
+        if isinstance(route, APIRoute):
+            visit(route.dependant)
+            _route_paths[id(route)] = route.path
+        elif hasattr(route, "effective_route_contexts"):
+            # Routers incluídos: cada inclusão monta o próprio dependant, com as dependências do prefixo
+            for contexto in route.effective_route_contexts():
+                if isinstance(contexto.original_route, APIRoute):
+                    visit(contexto.dependant)
+                    _route_paths[id(contexto.original_route)] = contexto.path
+    return len(wrapped)
+
+
+# --- BACKGROUND TASKS ---
+_background_call = BackgroundTask.__call__
+
+
+async def _traced_background_call(self):
+    # Rodam depois de a resposta ir para o cliente: span filho da requisição, fora da lentidão dela
+    parent = _current_span.get()
+    if parent is None:
+        await _background_call(self)
+        return
+    nome = getattr(self.func, "__qualname__", type(self.func).__name__)
+    atual = Span(parent.trace, f"segundo plano {nome}", parent.span_id, SPAN_KIND_INTERNAL, None, True)
+    token = _current_span.set(atual)
+    try:
+        await _background_call(self)
+    except BaseException as e:
+        atual.record_exception(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        atual.end()
+
+
+BackgroundTask.__call__ = _traced_background_call
+
+
+# --- SQL ---
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    parent = _current_span.get()
+    if parent is None or context is None:
+        return
+    verbo = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "SQL"
+    context._tracing_span = Span(parent.trace, f"db {verbo}", parent.span_id, SPAN_KIND_CLIENT, {
+        "db.system": conn.dialect.name,
+        "db.statement": statement[:MAX_STATEMENT_LENGTH],
+        "db.executemany": executemany,
+    }, parent.segundo_plano)
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    atual = getattr(context, "_tracing_span", None)
+    if atual is not None:
+        if cursor.rowcount is not None and cursor.rowcount >= 0:
+            atual.set(**{"db.rows": cursor.rowcount})
+        atual.end()
+        context._tracing_span = None
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    context = exception_context.execution_context
+    atual = getattr(context, "_tracing_span", None) if context is not None else None
+    if atual is not None:
+        atual.record_error(exception_context.original_exception)
+        atual.end()
+        context._tracing_span = None
+
+
+# --- AMOSTRAGEM E EXPORTAÇÃO ---
+def finish(trace: Trace):
+    """Decisão da amostragem na cauda, com o trace completo (uma vez só; depois o trace fica fechado)."""
+    with trace._lock:
+        if trace.fechado:
+            return
+        trace.fechado = True
+    lento = any(s.duration_ms >= settings.TRACING_SLOW_MS for s in trace.spans if not s.segundo_plano)
+    if trace.erro or lento or trace.manter or random.random() < settings.TRACING_SAMPLE_RATE:
+        exporter.submit(trace)
+
+
+def _attribute(chave: str, valor) -> dict:
+    if isinstance(valor, bool):
+        return {"key": chave, "value": {"boolValue": valor}}
+    if isinstance(valor, int):
+        return {"key": chave, "value": {"intValue": str(valor)}}
+    if isinstance(valor, float):
+        return {"key": chave, "value": {"doubleValue": valor}}
+    return {"key": chave, "value": {"stringValue": str(valor)}}
+
+
+def to_otlp(traces: List[Trace]) -> dict:
+    spans = []
+    for trace_ in traces:
+        for s in trace_.spans:
+            registro = {
+                "traceId": trace_.trace_id,
+                "spanId": s.span_id,
+                "name": s.name,
+                "kind": s.kind,
+                "startTimeUnixNano": str(s.start_ns),
+                "endTimeUnixNano": str(s.end_ns),
+                "attributes": [_attribute(chave, valor) for chave, valor in s.attributes.items()],
+                "status": {"code": 2, "message": s.error} if s.error else {"code": 0},
+            }
+            if s.parent_id:
+                registro["parentSpanId"] = s.parent_id
+            spans.append(registro)
+    return {"resourceSpans": [{
+        "resource": {"attributes": [
+            _attribute("service.name", settings.PROJECT_NAME),
+            _attribute("process.pid", os.getpid()),
+        ]},
+        "scopeSpans": [{"scope": {"name": "src.core.tracing"}, "spans": spans}],
+    }]}
+
+
+class TraceExporter:
+    """Fila e thread de exportação (criada no primeiro uso em cada processo, depois do fork)."""
+
+    def __init__(self):
+        self._queue: "queue.Queue[Trace]" = queue.Queue(maxsize=EXPORT_QUEUE_SIZE)
+        self._thread: Optional[threading.Thread] = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._ultimo_aviso = 0.0
+
+    def submit(self, trace_: Trace):
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=EXPORT_QUEUE_SIZE)
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name="tracing-export", daemon=True)
+                self._thread.start()
+        try:
+            self._queue.put_nowait(trace_)
+        except queue.Full:
+            self._warn("fila de exportação cheia; trace descartado")
+
+    def flush(self, timeout: float = 5.0):
+        """Espera a fila esvaziar (testes e desligamento)."""
+        limite = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < limite:
+            time.sleep(0.01)
+
+    def _warn(self, mensagem: str):
+        # No máximo um aviso por minuto: um coletor fora do ar não inunda o log
+        if time.monotonic() - self._ultimo_aviso > 60:
+            self._ultimo_aviso = time.monotonic()
+            logger.warning(f"Tracing: {mensagem}")
+
+    def _run(self):
+        fila = self._queue
+        while True:
+            lote = [fila.get()]
+            while len(lote) < EXPORT_BATCH_SIZE:
+                try:
+                    lote.append(fila.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.export(lote)
+            except Exception as e:
+                self._warn(f"falha ao exportar {len(lote)} traces: {e}")
+            finally:
+                for _ in lote:
+                    fila.task_done()
+
+    def export(self, traces: List[Trace]):
+        if settings.TRACING_EXPORTER == "otlp":
+            corpo = json.dumps(to_otlp(traces)).encode()
+            requisicao = urllib.request.Request(
+                settings.TRACING_OTLP_ENDPOINT, data=corpo, method="POST",
+                headers={"Content-Type": "application/json"},
+            )
+            with urllib.request.urlopen(requisicao, timeout=EXPORT_TIMEOUT_SECONDS) as resposta:
+                resposta.read()
+            return
+        caminho = Path(settings.TRACING_FILE) if settings.TRACING_FILE else Path(__file__).resolve().parents[2] / "logs" / "traces.jsonl"
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        linhas = "".join(json.dumps(to_otlp([trace_]), ensure_ascii=False) + "\n" for trace_ in traces)
+        with open(caminho, "a", encoding="utf-8") as f:
+            f.write(linhas)
+
+
+exporter = TraceExporter()
+
+
+# --- MIDDLEWARE ---
+class TracingMiddleware:
+    """
+    Span raiz de cada requisição HTTP. Termina quando o último pedaço do corpo é enviado; as background
+    tasks que rodam depois entram no trace como spans filhos, sem contar para a lentidão. Streams SSE
+    (text/event-stream) ficam abertos por horas: o trace é fechado ao enviar os cabeçalhos.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.TRACING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        traceparent = None
+        for chave, valor in scope["headers"]:
+            if chave == b"traceparent":
+                traceparent = valor.decode("latin-1")
+                break
+
+        with trace(
+            f"{scope['method']} {scope['path']}", SPAN_KIND_SERVER, traceparent=traceparent,
+            **{"http.method": scope["method"], "http.target": scope["path"]},
+        ) as raiz:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    raiz.set(**{"http.status_code": status})
+                    if status >= 500:
+                        raiz.record_error(f"HTTP {status}")
+                    headers = list(message.get("headers", []))
+                    message["headers"] = headers + [(TRACE_ID_HEADER.lower().encode(), raiz.trace.trace_id.encode())]
+                    _name_root(raiz, scope)
+                    if any(chave.lower() == b"content-type" and valor.startswith(b"text/event-stream") for chave, valor in headers):
+                        raiz.set(**{"http.streaming": True})
+                        raiz.end()
+                        finish(raiz.trace)
+                await send(message)
+                if message["type"] == "http.response.body" and not message.get("more_body", False):
+                    # Duração vista pelo cliente; o que vem depois são as background tasks
+                    raiz.set(**{"http.response_ms": round(raiz.duration_ms, 2)})
+                    raiz.end()
+
+            await self.app(scope, receive, send_wrapper)
+            _name_root(raiz, scope)
+
+
+def _name_root(raiz: Span, scope):
+    route = scope.get("route")
+    caminho = _route_paths.get(id(route)) or getattr(route, "path", None)
+    if caminho:
+        raiz.name = f"{scope['method']} {caminho}"
+        raiz.set(**{"http.route": caminho})
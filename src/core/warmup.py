@@ -0,0 +1,115 @@
+# src/core/warmup.py
+"""
+Aquecimento do worker antes de aceitar requests: o custo de abrir conexões, compilar templates
+e carregar o backend do bcrypt sai do primeiro usuário após cada deploy e vai para a subida.
+Cada etapa é independente; uma falha é registrada no log e não impede o worker de subir.
+"""
+import time
+
+from sqlalchemy import text
+
+from src.core.config import settings
+from src.utils.logger import logger
+
+
+def _open_connections(engine) -> str:
+    quantidade = settings.WARMUP_DB_CONNECTIONS
+    # Acima do tamanho do pool as conexões extras (overflow) seriam fechadas na devolução
+    if hasattr(engine.pool, "size"):
+        quantidade = min(quantidade, engine.pool.size())
+    connections = []
+    try:
+        for _ in range(quantidade):
+            connection = engine.connect()
+            connection.execute(text("SELECT 1"))
+            connections.append(connection)
+    finally:
+        # Devolvidas ao pool, continuam abertas para os primeiros requests
+        for connection in connections:
+            connection.close()
+    return f"{len(connections)} conexões"
+
+
+def _open_pool_connections() -> str:
+    from src.db.session import engine
+
+    return _open_connections(engine)
+
+
+def _open_replica_connections() -> str:
+    from src.db.routing import router
+    from src.db.session import replica_engine
+
+    if replica_engine is None:
+        return "não configurada"
+    # A primeira verificação também mede o atraso; fora do ar, as leituras começam no primário
+    if not router.available():
+        return "indisponível"
+    return _open_connections(replica_engine)
+
+
+def _load_campus_registry() -> str:
+    from src.db.session import SessionLocal
+    from src.services.campus_registry import registry
+
+    db = SessionLocal()
+    try:
+        snapshot = registry.load(db)
+    finally:
+        db.close()
+    return f"{len(snapshot.ordenados)} campi, versão {snapshot.versao}"
+
+
+def _compile_email_templates() -> str:
+    # Só o jinja2: o fastapi_mail continua sob demanda (o envio roda em background, após a resposta)
+    from src.services.email_service import EmailService
+
+    return f"{EmailService.compile_templates()} templates"
+
+
+def _load_password_backend() -> str:
+    from src.core.security import pwd_context
+
+    # Carrega o backend (módulo bcrypt e autoteste) sem pagar um hash completo
+    handler = pwd_context.handler()
+    handler.get_backend()
+    return handler.name
+
+
+def _prime_serializers() -> str:
+    from src.db import schemas
+    from src.utils.serialization import list_adapter
+
+    listed = [
+        schemas.AuthorizationForProfessor,
+        schemas.AuthorizationForProfessorBase,
+        schemas.Event,
+    ]
+    for schema in listed:
+        list_adapter(schema)
+    return f"{len(listed)} adaptadores"
+
+
+STEPS = [
+    ("pool do banco", _open_pool_connections),
+    ("pool da réplica", _open_replica_connections),
+    ("cadastro de campi", _load_campus_registry),
+    ("templates de e-mail", _compile_email_templates),
+    ("backend de senhas", _load_password_backend),
+    ("serializadores", _prime_serializers),
+]
+
+
+def warm_up():
+    if not settings.WARMUP_ENABLED:
+        logger.info("Aquecimento desativado (WARMUP_ENABLED=false).")
+        return
+    start = time.perf_counter()
+    for name, step in STEPS:
+        step_start = time.perf_counter()
+        try:
+            detail = step()
+            logger.info(f"Aquecimento: {name} ({detail}) em {(time.perf_counter() - step_start) * 1000:.1f}ms")
+        except Exception as e:
+            logger.error(f"Aquecimento: falha em '{name}' após {(time.perf_counter() - step_start) * 1000:.1f}ms: {e}")
+    logger.info(f"Aquecimento concluído em {(time.perf_counter() - start) * 1000:.1f}ms")
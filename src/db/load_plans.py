@@ -0,0 +1,43 @@
+# src/db/load_plans.py
+"""
+Planos de carregamento dos relacionamentos, por caso de uso.
+
+Nenhum relacionamento é carregado sob demanda de forma deliberada (ver `models.LAZY`): cada
+endpoint declara aqui o que a resposta ou a regra de negócio vai ler, e usa
+`query.options(*PLANO)`. Com ORM_STRICT_LOADING ligado, um acesso fora do plano levanta erro.
+
+Para objetos recém-gravados, `refresh_plan(db, obj, PLANO)` recarrega o objeto já com os
+relacionamentos do plano.
+"""
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from src.db import models
+
+# Evento com o campus (respostas `Event`, `EventPublicList` e `EventPublicDetail`)
+EVENT_WITH_CAMPUS = (joinedload(models.Evento.campus),)
+
+# Exclusão do evento: as autorizações são percorridas para limpar os arquivos e registrar as exclusões
+EVENT_FOR_DELETE = (selectinload(models.Evento.autorizacoes),)
+
+# Usuário com o campus (resposta `User`)
+USER_WITH_CAMPUS = (joinedload(models.Usuario.campus),)
+
+# Autorização com as presenças (resposta `AuthorizationForProfessor`); SELECT IN evita multiplicar as linhas
+AUTHORIZATION_WITH_ATTENDANCE = (selectinload(models.Autorizacao.presencas),)
+
+# Autorização com o evento (verificação de dono, período do evento e avisos em tempo real)
+AUTHORIZATION_WITH_EVENT = (joinedload(models.Autorizacao.evento),)
+
+# Resposta ao professor que também precisa do evento
+AUTHORIZATION_FULL = AUTHORIZATION_WITH_EVENT + AUTHORIZATION_WITH_ATTENDANCE
+
+# E-mails de notificação: evento e professor criador
+AUTHORIZATION_FOR_EMAIL = (joinedload(models.Autorizacao.evento).joinedload(models.Evento.criador),)
+
+
+def refresh_plan(db: Session, obj, plan):
+    """Recarrega `obj` aplicando o plano (após commit, para montar a resposta sem acessos implícitos)."""
+    mapper = type(obj)
+    return db.query(mapper).options(*plan).populate_existing().filter(
+        mapper.id == obj.id
+    ).one()
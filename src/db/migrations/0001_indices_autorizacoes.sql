@@ -0,0 +1,4 @@
+-- migracao: sem-transacao
+-- Índices da listagem paginada de autorizações por evento (keyset em nome_aluno, id e contagem por status)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_autorizacoes_evento_nome_id ON "Autorizacoes" (evento_id, nome_aluno, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_autorizacoes_evento_status ON "Autorizacoes" (evento_id, status);
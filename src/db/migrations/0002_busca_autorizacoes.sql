@@ -0,0 +1,21 @@
+-- Busca de alunos entre eventos: sem acentos e tolerante a erros de digitação (pg_trgm)
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- unaccent() é STABLE; o wrapper IMMUTABLE permite usá-la em índices de expressão
+CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT public.unaccent('public.unaccent', $1) $$;
+
+-- Documento de busca de uma autorização; a mesma expressão é usada no índice e na consulta
+CREATE OR REPLACE FUNCTION autorizacao_busca_documento(text, text, text, text, text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE
+    AS $$ SELECT f_unaccent(lower(
+        coalesce($1, '') || ' ' || coalesce($2, '') || ' ' || coalesce($3, '') || ' ' ||
+        coalesce($4, '') || ' ' || coalesce($5, '')
+    )) $$;
+
+CREATE INDEX IF NOT EXISTS ix_autorizacoes_busca_trgm ON "Autorizacoes" USING gin (
+    autorizacao_busca_documento(nome_aluno, matricula_aluno, nome_responsavel, email_aluno, email_responsavel)
+    gin_trgm_ops
+);
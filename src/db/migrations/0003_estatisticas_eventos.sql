@@ -0,0 +1,26 @@
+-- Contadores por evento para os painéis (models.EstatisticaEvento), mantidos pela aplicação
+CREATE TABLE IF NOT EXISTS "EstatisticasEventos" (
+    evento_id INTEGER PRIMARY KEY REFERENCES "Eventos" (id) ON DELETE CASCADE,
+    pre_cadastrados INTEGER NOT NULL DEFAULT 0,
+    submetidos INTEGER NOT NULL DEFAULT 0,
+    aprovados INTEGER NOT NULL DEFAULT 0,
+    rejeitados INTEGER NOT NULL DEFAULT 0,
+    presentes INTEGER NOT NULL DEFAULT 0,
+    atualizado_em TIMESTAMP DEFAULT now()
+);
+
+-- Preenchimento inicial a partir dos dados existentes (mesma regra de stats_service.recalculate_event_stats)
+INSERT INTO "EstatisticasEventos" (evento_id, pre_cadastrados, submetidos, aprovados, rejeitados, presentes)
+SELECT
+    e.id,
+    count(a.id) FILTER (WHERE a.status = 'pré-cadastrado'),
+    count(a.id) FILTER (WHERE a.status = 'submetido'),
+    count(a.id) FILTER (WHERE a.status = 'aprovado'),
+    count(a.id) FILTER (WHERE a.status = 'rejeitado'),
+    count(a.id) FILTER (WHERE EXISTS (
+        SELECT 1 FROM "Presencas" p WHERE p.autorizacao_id = a.id AND p.presente_ida
+    ))
+FROM "Eventos" e
+LEFT JOIN "Autorizacoes" a ON a.evento_id = e.id
+GROUP BY e.id
+ON CONFLICT (evento_id) DO NOTHING;
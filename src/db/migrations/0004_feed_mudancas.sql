@@ -0,0 +1,19 @@
+-- Feed de mudanças: versão por linha (ID da transação que a alterou) e marcas de exclusão.
+-- Com DEFAULT constante o ADD COLUMN não reescreve a tabela (PostgreSQL 11+); linhas antigas ficam na versão 0.
+ALTER TABLE "Autorizacoes" ADD COLUMN IF NOT EXISTS versao BIGINT NOT NULL DEFAULT 0;
+ALTER TABLE "Presencas" ADD COLUMN IF NOT EXISTS versao BIGINT NOT NULL DEFAULT 0;
+
+DO $$ BEGIN
+    CREATE TYPE mudanca_tipo AS ENUM ('autorizacao', 'presenca');
+EXCEPTION WHEN duplicate_object THEN NULL;
+END $$;
+
+CREATE TABLE IF NOT EXISTS "MudancasExcluidas" (
+    id SERIAL PRIMARY KEY,
+    tipo mudanca_tipo NOT NULL,
+    registro_id INTEGER NOT NULL,
+    evento_id INTEGER NOT NULL,
+    versao BIGINT NOT NULL,
+    excluido_em TIMESTAMP DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS ix_mudancas_excluidas_evento_versao ON "MudancasExcluidas" (evento_id, versao);
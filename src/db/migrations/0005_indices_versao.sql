@@ -0,0 +1,4 @@
+-- migracao: sem-transacao
+-- Índices do feed de mudanças, criados sem bloquear as escritas
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_autorizacoes_evento_versao ON "Autorizacoes" (evento_id, versao);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_presencas_versao ON "Presencas" (versao);
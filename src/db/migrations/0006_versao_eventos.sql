@@ -0,0 +1,2 @@
+-- Versão por evento para o ETag das rotas do professor; DEFAULT constante não reescreve a tabela
+ALTER TABLE "Eventos" ADD COLUMN IF NOT EXISTS versao INTEGER NOT NULL DEFAULT 1;
@@ -0,0 +1,13 @@
+-- Respostas das submissões públicas por Idempotency-Key (repetições devolvem a resposta original)
+CREATE TABLE IF NOT EXISTS "ChavesIdempotencia" (
+    id SERIAL PRIMARY KEY,
+    escopo VARCHAR(50) NOT NULL,
+    chave VARCHAR(255) NOT NULL,
+    hash_requisicao VARCHAR(64) NOT NULL,
+    status_code INTEGER,
+    corpo TEXT,
+    bloqueada_em TIMESTAMP NOT NULL,
+    expira_em TIMESTAMP NOT NULL,
+    CONSTRAINT uq_chaves_idempotencia_escopo_chave UNIQUE (escopo, chave)
+);
+CREATE INDEX IF NOT EXISTS "ix_ChavesIdempotencia_expira_em" ON "ChavesIdempotencia" (expira_em);
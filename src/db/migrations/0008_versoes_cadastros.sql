@@ -0,0 +1,6 @@
+-- Versão das tabelas de referência mantidas em memória pelos workers (ex.: Campi)
+CREATE TABLE IF NOT EXISTS "VersoesCadastros" (
+    nome VARCHAR(50) PRIMARY KEY,
+    versao BIGINT NOT NULL DEFAULT 0
+);
+INSERT INTO "VersoesCadastros" (nome, versao) VALUES ('campus', 1) ON CONFLICT (nome) DO NOTHING;
@@ -0,0 +1,95 @@
+-- Autorizacoes e Presencas particionadas por semestre de submissão (Autorizacoes.submetido_em).
+-- A retenção passa a ser DETACH + DROP de partições inteiras (scripts/partitions.py) em vez de
+-- DELETE linha a linha. As presenças ficam na partição do semestre da sua autorização
+-- (autorizacao_submetido_em), e a chave estrangeira passa a ser composta.
+-- Reescreve as duas tabelas sob bloqueio exclusivo: aplicar em janela de manutenção.
+-- migracao: manual
+
+-- Cria (se ainda não existirem) as partições das duas tabelas para o semestre que contém `dia`.
+-- Nomes: "Autorizacoes_2025_1" (jan-jun) e "Autorizacoes_2025_2" (jul-dez), idem para Presencas.
+CREATE OR REPLACE FUNCTION criar_particoes_semestre(dia date) RETURNS text
+    LANGUAGE plpgsql
+    AS $$
+DECLARE
+    inicio date := make_date(extract(year FROM dia)::int, CASE WHEN extract(month FROM dia) <= 6 THEN 1 ELSE 7 END, 1);
+    fim date := (inicio + interval '6 months')::date;
+    sufixo text := to_char(inicio, 'YYYY') || '_' || CASE WHEN extract(month FROM inicio) = 1 THEN '1' ELSE '2' END;
+BEGIN
+    EXECUTE 'CREATE TABLE IF NOT EXISTS ' || quote_ident('Autorizacoes_' || sufixo)
+        || ' PARTITION OF "Autorizacoes" FOR VALUES FROM (' || quote_literal(inicio) || ') TO (' || quote_literal(fim) || ')';
+    EXECUTE 'CREATE TABLE IF NOT EXISTS ' || quote_ident('Presencas_' || sufixo)
+        || ' PARTITION OF "Presencas" FOR VALUES FROM (' || quote_literal(inicio) || ') TO (' || quote_literal(fim) || ')';
+    RETURN sufixo;
+END $$;
+
+DO $$
+DECLARE
+    dia date;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = '"Autorizacoes"'::regclass) = 'p' THEN
+        RAISE NOTICE 'Autorizacoes já é particionada';
+        RETURN;
+    END IF;
+
+    -- A chave de partição não pode ser nula
+    UPDATE "Autorizacoes" a SET submetido_em = coalesce(e.criado_em, now())
+    FROM "Eventos" e WHERE e.id = a.evento_id AND a.submetido_em IS NULL;
+
+    -- As consultas por evento filtram submetido_em >= criado_em do evento para descartar partições
+    -- antigas; dados importados que não seguem essa regra têm o criado_em do evento ajustado
+    UPDATE "Eventos" e SET criado_em = m.primeira
+    FROM (SELECT evento_id, min(submetido_em) AS primeira FROM "Autorizacoes" GROUP BY evento_id) m
+    WHERE m.evento_id = e.id AND (e.criado_em IS NULL OR e.criado_em > m.primeira);
+
+    ALTER TABLE "Presencas" ADD COLUMN IF NOT EXISTS autorizacao_submetido_em TIMESTAMP;
+    UPDATE "Presencas" p SET autorizacao_submetido_em = a.submetido_em
+    FROM "Autorizacoes" a WHERE a.id = p.autorizacao_id AND p.autorizacao_submetido_em IS DISTINCT FROM a.submetido_em;
+
+    -- As sequências dos IDs continuam as mesmas (o DEFAULT copiado pelo LIKE aponta para elas)
+    ALTER TABLE "Autorizacoes" RENAME TO "Autorizacoes_antiga";
+    ALTER TABLE "Presencas" RENAME TO "Presencas_antiga";
+    ALTER SEQUENCE "Autorizacoes_id_seq" OWNED BY NONE;
+    ALTER SEQUENCE "Presencas_id_seq" OWNED BY NONE;
+
+    CREATE TABLE "Autorizacoes" (LIKE "Autorizacoes_antiga" INCLUDING DEFAULTS) PARTITION BY RANGE (submetido_em);
+    ALTER TABLE "Autorizacoes" ALTER COLUMN submetido_em SET NOT NULL;
+    CREATE TABLE "Presencas" (LIKE "Presencas_antiga" INCLUDING DEFAULTS) PARTITION BY RANGE (autorizacao_submetido_em);
+    ALTER TABLE "Presencas" ALTER COLUMN autorizacao_submetido_em SET NOT NULL;
+
+    -- Do semestre mais antigo até um ano à frente; depois disso, scripts/partitions.py cria as próximas
+    dia := coalesce((SELECT min(submetido_em) FROM "Autorizacoes_antiga")::date, current_date);
+    WHILE dia <= current_date + 365 LOOP
+        PERFORM criar_particoes_semestre(dia);
+        dia := (dia + interval '6 months')::date;
+    END LOOP;
+    -- Rede de segurança: sem partição para a data, a submissão não falha (a manutenção avisa)
+    CREATE TABLE "Autorizacoes_padrao" PARTITION OF "Autorizacoes" DEFAULT;
+    CREATE TABLE "Presencas_padrao" PARTITION OF "Presencas" DEFAULT;
+
+    INSERT INTO "Autorizacoes" SELECT * FROM "Autorizacoes_antiga";
+    INSERT INTO "Presencas" SELECT * FROM "Presencas_antiga";
+    DROP TABLE "Presencas_antiga";
+    DROP TABLE "Autorizacoes_antiga";
+    ALTER SEQUENCE "Autorizacoes_id_seq" OWNED BY "Autorizacoes".id;
+    ALTER SEQUENCE "Presencas_id_seq" OWNED BY "Presencas".id;
+
+    -- Restrições e índices depois da cópia (criados em cada partição)
+    ALTER TABLE "Autorizacoes" ADD CONSTRAINT "Autorizacoes_pkey" PRIMARY KEY (id, submetido_em);
+    ALTER TABLE "Autorizacoes" ADD CONSTRAINT "Autorizacoes_evento_id_fkey" FOREIGN KEY (evento_id) REFERENCES "Eventos" (id);
+    ALTER TABLE "Presencas" ADD CONSTRAINT "Presencas_pkey" PRIMARY KEY (id, autorizacao_submetido_em);
+    ALTER TABLE "Presencas" ADD CONSTRAINT "_autorizacao_data_uc" UNIQUE (autorizacao_id, data_presenca, autorizacao_submetido_em);
+    ALTER TABLE "Presencas" ADD CONSTRAINT fk_presencas_autorizacao FOREIGN KEY (autorizacao_id, autorizacao_submetido_em)
+        REFERENCES "Autorizacoes" (id, submetido_em);
+
+    CREATE INDEX ix_autorizacoes_evento_nome_id ON "Autorizacoes" (evento_id, nome_aluno, id);
+    CREATE INDEX ix_autorizacoes_evento_status ON "Autorizacoes" (evento_id, status);
+    CREATE INDEX ix_autorizacoes_evento_versao ON "Autorizacoes" (evento_id, versao);
+    CREATE INDEX ix_presencas_versao ON "Presencas" (versao);
+    -- Índice da busca (migração 0002), se as extensões estiverem disponíveis
+    IF to_regproc('autorizacao_busca_documento') IS NOT NULL THEN
+        CREATE INDEX ix_autorizacoes_busca_trgm ON "Autorizacoes" USING gin (
+            autorizacao_busca_documento(nome_aluno, matricula_aluno, nome_responsavel, email_aluno, email_responsavel)
+            gin_trgm_ops
+        );
+    END IF;
+END $$;
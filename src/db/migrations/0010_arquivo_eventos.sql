@@ -0,0 +1,3 @@
+-- Arquivo frio: eventos cujas autorizações foram exportadas para ARCHIVE_DIRECTORY e removidas
+-- das tabelas quentes (src/services/archive_service.py, scripts/archive.py).
+ALTER TABLE "Eventos" ADD COLUMN IF NOT EXISTS arquivado_em TIMESTAMP;
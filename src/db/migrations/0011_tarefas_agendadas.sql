@@ -0,0 +1,29 @@
+-- Agendador de tarefas dentro da aplicação (src/services/scheduler.py): estado e concessão de cada
+-- tarefa e histórico das execuções
+CREATE TABLE IF NOT EXISTS "TarefasAgendadas" (
+    nome VARCHAR(50) PRIMARY KEY,
+    agenda VARCHAR(100) NOT NULL,
+    proxima_execucao TIMESTAMP NOT NULL,
+    bloqueada_ate TIMESTAMP,
+    executor VARCHAR(255)
+);
+
+DO $$
+BEGIN
+    CREATE TYPE execucao_status AS ENUM ('executando', 'sucesso', 'erro');
+EXCEPTION
+    WHEN duplicate_object THEN NULL;
+END $$;
+
+CREATE TABLE IF NOT EXISTS "ExecucoesTarefas" (
+    id SERIAL PRIMARY KEY,
+    tarefa VARCHAR(50) NOT NULL,
+    executor VARCHAR(255) NOT NULL,
+    iniciada_em TIMESTAMP NOT NULL,
+    finalizada_em TIMESTAMP,
+    duracao_ms INTEGER,
+    status execucao_status NOT NULL,
+    itens INTEGER,
+    erro TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_execucoes_tarefas_tarefa_iniciada ON "ExecucoesTarefas" (tarefa, iniciada_em);
@@ -1,20 +1,86 @@
 # src/db/models.py
 
-from sqlalchemy import (Column, Integer, String, Boolean, DateTime, Date,
-                        ForeignKey, Enum, Text, UniqueConstraint)
+from sqlalchemy import (Column, Integer, BigInteger, String, Boolean, DateTime, Date, ForeignKey,
+                        ForeignKeyConstraint, Enum, Text, UniqueConstraint, Index, event, delete, insert, select, update)
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.orm import relationship
+from sqlalchemy.exc import CompileError
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
+from sqlalchemy.sql.functions import FunctionElement
+
+from src.core.config import settings
 
 Base = declarative_base()
 
+# Estratégia dos relacionamentos que só são lidos quando a consulta os carrega (planos em
+# src/db/load_plans.py). No modo estrito um acesso não planejado levanta erro em vez de
+# disparar um SELECT por objeto (N+1).
+LAZY = "raise_on_sql" if settings.ORM_STRICT_LOADING else "select"
+
+# Chave das partições (Autorizacoes.submetido_em e a cópia em Presencas). No SQLite as datas são
+# comparadas como texto e o CURRENT_TIMESTAMP não tem fração de segundo: sem microssegundos, os
+# valores gravados pelo banco e os enviados pela aplicação ficam no mesmo formato.
+PartitionKey = DateTime().with_variant(sqlite.DATETIME(truncate_microseconds=True), "sqlite")
+
+
+# --- VERSÕES DO FEED DE MUDANÇAS ---
+class change_version(FunctionElement):
+    """
+    Versão gravada a cada INSERT/UPDATE de Autorizacoes e Presencas (e em cada exclusão registrada).
+    No PostgreSQL é o ID da transação que fez a alteração.
+    """
+    type = BigInteger()
+    inherit_cache = True
+
+
+class change_watermark(FunctionElement):
+    """
+    Limite superior (exclusivo) das versões que o feed pode entregar. No PostgreSQL é o xmin do
+    snapshot: nenhuma transação com ID menor ainda está em andamento, então nada abaixo dele
+    pode aparecer depois e o cursor nunca pula um commit atrasado.
+    """
+    type = BigInteger()
+    inherit_cache = True
+
+
+@compiles(change_version)
+@compiles(change_watermark)
+def _compile_unsupported(element, compiler, **kw):
+    raise CompileError(f"O feed de mudanças não suporta o banco '{compiler.dialect.name}'.")
+
+
+# SQLite (benchmark): a escrita é serializada, então o relógio em milissegundos basta; linhas
+# gravadas no mesmo milissegundo do limite ficam para a consulta seguinte, que começa nele
+_SQLITE_NOW_MS = "CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER)"
+
+
+@compiles(change_version, 'sqlite')
+@compiles(change_watermark, 'sqlite')
+def _compile_sqlite_change_version(element, compiler, **kw):
+    return _SQLITE_NOW_MS
+
+
+@compiles(change_version, 'postgresql')
+def _compile_pg_change_version(element, compiler, **kw):
+    return 'txid_current()'
+
+
+@compiles(change_watermark, 'postgresql')
+def _compile_pg_change_watermark(element, compiler, **kw):
+    return 'txid_snapshot_xmin(txid_current_snapshot())'
+
+
 # --- NOVA TABELA ---
 class Campus(Base):
     __tablename__ = "Campi"
     id = Column(Integer, primary_key=True, index=True)
     nome = Column(String(255), unique=True, index=True, nullable=False)
-    usuarios = relationship("Usuario", back_populates="campus")
-    eventos = relationship("Evento", back_populates="campus")
+    # Coleções grandes e nunca serializadas: só consultas explícitas (campus.usuarios.select()).
+    # A exclusão de um campus com vínculos é recusada antes, então o ORM não precisa carregá-las.
+    usuarios = relationship("Usuario", back_populates="campus", lazy="write_only", passive_deletes="all")
+    eventos = relationship("Evento", back_populates="campus", lazy="write_only", passive_deletes="all")
 
 
 class Usuario(Base):
@@ -31,9 +97,9 @@ class Usuario(Base):
     codigo_verificacao = Column(String(6), nullable=True)
     codigo_verificacao_expira_em = Column(DateTime, nullable=True)
     campus_id = Column(Integer, ForeignKey("Campi.id"), nullable=True) 
-    campus = relationship("Campus", back_populates="usuarios")
+    campus = relationship("Campus", back_populates="usuarios", lazy=LAZY)  # USER_WITH_CAMPUS
     
-    eventos = relationship("Evento", back_populates="criador", cascade="all, delete-orphan")
+    eventos = relationship("Evento", back_populates="criador", cascade="all, delete-orphan", lazy=LAZY)
 
 
 class Evento(Base):
@@ -50,9 +116,15 @@ class Evento(Base):
     usuario_id = Column(Integer, ForeignKey("Usuarios.id"), nullable=False)
     criado_em = Column(DateTime, server_default=func.now())
     campus_id = Column(Integer, ForeignKey("Campi.id"), nullable=False)
-    campus = relationship("Campus", back_populates="eventos")    
-    criador = relationship("Usuario", back_populates="eventos")
-    autorizacoes = relationship("Autorizacao", back_populates="evento", cascade="all, delete-orphan")
+    # Incrementada a cada escrita no evento, nas autorizações ou nas presenças dele (ETag das listagens)
+    versao = Column(Integer, default=1, server_default="1", nullable=False)
+    # Preenchido quando as autorizações saem para o arquivo frio (src/services/archive_service.py)
+    arquivado_em = Column(DateTime, nullable=True)
+    campus = relationship("Campus", back_populates="eventos", lazy=LAZY)  # EVENT_WITH_CAMPUS
+    criador = relationship("Usuario", back_populates="eventos", lazy=LAZY)
+    # Percorrida só na exclusão do evento (EVENT_FOR_DELETE)
+    autorizacoes = relationship("Autorizacao", back_populates="evento", cascade="all, delete-orphan", lazy=LAZY)
+    estatisticas = relationship("EstatisticaEvento", uselist=False, cascade="all, delete-orphan", lazy=LAZY)
 
 
 class Autorizacao(Base):
@@ -69,17 +141,186 @@ class Autorizacao(Base):
     tipo_arquivo = Column(String(50), nullable=True)
     status = Column(Enum('pré-cadastrado', 'submetido', 'aprovado', 'rejeitado', name='auth_status'), default='pré-cadastrado', nullable=False)
     evento_id = Column(Integer, ForeignKey("Eventos.id"), nullable=False)
-    submetido_em = Column(DateTime, server_default=func.now())
-    evento = relationship("Evento", back_populates="autorizacoes")
-    presencas = relationship("Presenca", back_populates="autorizacao", cascade="all, delete-orphan")
+    # Chave das partições semestrais no PostgreSQL (migração 0009): gravada pelo banco na criação e
+    # nunca alterada, portanto sempre >= criado_em do evento (ver services/partitions.since_event)
+    submetido_em = Column(PartitionKey, server_default=func.now(), nullable=False)
+    versao = Column(BigInteger, default=change_version(), onupdate=change_version(), server_default="0", nullable=False)
+    evento = relationship("Evento", back_populates="autorizacoes", lazy=LAZY)  # AUTHORIZATION_WITH_EVENT
+    presencas = relationship("Presenca", back_populates="autorizacao", cascade="all, delete-orphan", lazy=LAZY)  # AUTHORIZATION_WITH_ATTENDANCE
+    __table_args__ = (
+        # Paginação por (nome_aluno, id) e contagem por status dentro de um evento
+        Index('ix_autorizacoes_evento_nome_id', 'evento_id', 'nome_aluno', 'id'),
+        Index('ix_autorizacoes_evento_status', 'evento_id', 'status'),
+        # Feed de mudanças por evento (versao > cursor)
+        Index('ix_autorizacoes_evento_versao', 'evento_id', 'versao'),
+        # Alvo da chave estrangeira das presenças; na tabela particionada é a própria chave primária
+        UniqueConstraint('id', 'submetido_em', name='uq_autorizacoes_id_submetido_em'),
+    )
 
 
 class Presenca(Base):
     __tablename__ = "Presencas"
     id = Column(Integer, primary_key=True, index=True)
-    autorizacao_id = Column(Integer, ForeignKey("Autorizacoes.id"), nullable=False)
+    autorizacao_id = Column(Integer, nullable=False)
+    # Cópia de Autorizacao.submetido_em: as presenças ficam na partição do mesmo semestre da autorização
+    autorizacao_submetido_em = Column(PartitionKey, nullable=False)
     data_presenca = Column(Date, nullable=False)
     presente_ida = Column(Boolean, default=False, nullable=False)
     presente_volta = Column(Boolean, default=False, nullable=False) 
-    autorizacao = relationship("Autorizacao", back_populates="presencas")
-    __table_args__ = (UniqueConstraint('autorizacao_id', 'data_presenca', name='_autorizacao_data_uc'),)
\ No newline at end of file
+    versao = Column(BigInteger, default=change_version(), onupdate=change_version(), server_default="0", nullable=False)
+    autorizacao = relationship("Autorizacao", back_populates="presencas", lazy=LAZY)
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ['autorizacao_id', 'autorizacao_submetido_em'], ['Autorizacoes.id', 'Autorizacoes.submetido_em'],
+            name='fk_presencas_autorizacao',
+        ),
+        # Restrições únicas de tabelas particionadas precisam incluir a chave de partição
+        UniqueConstraint('autorizacao_id', 'data_presenca', 'autorizacao_submetido_em', name='_autorizacao_data_uc'),
+        Index('ix_presencas_versao', 'versao'),
+    )
+
+
+class EstatisticaEvento(Base):
+    """
+    Contadores por evento mantidos de forma incremental (src/services/stats_service.py),
+    para que os painéis leiam uma linha por evento em vez de agregar Autorizacoes e Presencas.
+    """
+    __tablename__ = "EstatisticasEventos"
+    evento_id = Column(Integer, ForeignKey("Eventos.id", ondelete="CASCADE"), primary_key=True)
+    pre_cadastrados = Column(Integer, default=0, server_default="0", nullable=False)
+    submetidos = Column(Integer, default=0, server_default="0", nullable=False)
+    aprovados = Column(Integer, default=0, server_default="0", nullable=False)
+    rejeitados = Column(Integer, default=0, server_default="0", nullable=False)
+    # Alunos com presença na ida marcada em pelo menos um dia do evento
+    presentes = Column(Integer, default=0, server_default="0", nullable=False)
+    atualizado_em = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class MudancaExcluida(Base):
+    """Marcas de exclusão do feed de mudanças: o registro some da tabela, mas o cliente precisa saber."""
+    __tablename__ = "MudancasExcluidas"
+    id = Column(Integer, primary_key=True)
+    tipo = Column(Enum('autorizacao', 'presenca', name='mudanca_tipo'), nullable=False)
+    registro_id = Column(Integer, nullable=False)
+    evento_id = Column(Integer, nullable=False)
+    versao = Column(BigInteger, default=change_version(), nullable=False)
+    excluido_em = Column(DateTime, server_default=func.now())
+    __table_args__ = (Index('ix_mudancas_excluidas_evento_versao', 'evento_id', 'versao'),)
+
+
+@event.listens_for(Autorizacao, "after_delete")
+def _register_deleted_authorization(mapper, connection, target):
+    connection.execute(insert(MudancaExcluida.__table__).values(
+        tipo='autorizacao', registro_id=target.id, evento_id=target.evento_id
+    ))
+
+
+@event.listens_for(Presenca, "after_delete")
+def _register_deleted_attendance(mapper, connection, target):
+    # As presenças são excluídas antes da autorização na mesma flush, então o evento ainda é encontrado
+    evento_id = select(Autorizacao.evento_id).where(Autorizacao.id == target.autorizacao_id).scalar_subquery()
+    connection.execute(insert(MudancaExcluida.__table__).values(
+        tipo='presenca', registro_id=target.id, evento_id=evento_id
+    ))
+
+
+@event.listens_for(Evento, "after_delete")
+def _discard_deleted_event_tombstones(mapper, connection, target):
+    # Roda depois das exclusões em cascata: com o evento removido, as marcas dele não têm mais leitor
+    connection.execute(delete(MudancaExcluida.__table__).where(MudancaExcluida.evento_id == target.id))
+
+
+# --- VERSÃO DOS EVENTOS (ETag) ---
+def _bump_event_version(connection, evento_id):
+    eventos = Evento.__table__
+    connection.execute(update(eventos).where(eventos.c.id == evento_id).values(versao=eventos.c.versao + 1))
+
+
+def _bump_on_event_write(mapper, connection, target):
+    _bump_event_version(connection, target.id)
+
+
+def _bump_on_authorization_write(mapper, connection, target):
+    _bump_event_version(connection, target.evento_id)
+
+
+def _bump_on_attendance_write(mapper, connection, target):
+    _bump_event_version(
+        connection, select(Autorizacao.evento_id).where(Autorizacao.id == target.autorizacao_id).scalar_subquery()
+    )
+
+
+event.listen(Evento, "after_update", _bump_on_event_write)
+for _event_name in ("after_insert", "after_update", "after_delete"):
+    event.listen(Autorizacao, _event_name, _bump_on_authorization_write)
+    event.listen(Presenca, _event_name, _bump_on_attendance_write)
+
+
+# --- IDEMPOTÊNCIA DAS SUBMISSÕES PÚBLICAS ---
+class ChaveIdempotencia(Base):
+    """
+    Resposta guardada por Idempotency-Key. Sem status_code, a requisição original ainda está em
+    processamento (bloqueada_em marca quando foi assumida, para retomar chaves de um worker que caiu).
+    """
+    __tablename__ = "ChavesIdempotencia"
+    id = Column(Integer, primary_key=True)
+    escopo = Column(String(50), nullable=False)
+    chave = Column(String(255), nullable=False)
+    hash_requisicao = Column(String(64), nullable=False)
+    status_code = Column(Integer)
+    corpo = Column(Text)
+    bloqueada_em = Column(DateTime, nullable=False)
+    expira_em = Column(DateTime, nullable=False, index=True)
+    __table_args__ = (UniqueConstraint('escopo', 'chave', name='uq_chaves_idempotencia_escopo_chave'),)
+
+
+# --- VERSÃO DOS CADASTROS DE REFERÊNCIA (cache em memória dos workers) ---
+class VersaoCadastro(Base):
+    """Versão de uma tabela de referência; os workers comparam com a do cache para saber se recarregam."""
+    __tablename__ = "VersoesCadastros"
+    nome = Column(String(50), primary_key=True)
+    versao = Column(BigInteger, nullable=False, default=0)
+
+
+def _bump_reference_version(nome):
+    def bump(mapper, connection, target):
+        versoes = VersaoCadastro.__table__
+        result = connection.execute(
+            update(versoes).where(versoes.c.nome == nome).values(versao=versoes.c.versao + 1)
+        )
+        if result.rowcount == 0:
+            connection.execute(insert(versoes).values(nome=nome, versao=1))
+    return bump
+
+
+for _event_name in ("after_insert", "after_update", "after_delete"):
+    event.listen(Campus, _event_name, _bump_reference_version("campus"))
+
+
+# --- TAREFAS AGENDADAS (src/services/scheduler.py) ---
+class TarefaAgendada(Base):
+    """
+    Estado de cada tarefa periódica. Quem executa é o worker que consegue o UPDATE condicional de
+    `bloqueada_ate` (concessão com prazo): uma execução por vez entre todos os workers e servidores.
+    """
+    __tablename__ = "TarefasAgendadas"
+    nome = Column(String(50), primary_key=True)
+    agenda = Column(String(100), nullable=False)
+    proxima_execucao = Column(DateTime, nullable=False)
+    bloqueada_ate = Column(DateTime, nullable=True)
+    executor = Column(String(255), nullable=True)
+
+
+class ExecucaoTarefa(Base):
+    """Histórico das execuções: duração, itens processados e erro (métricas de falha por tarefa)."""
+    __tablename__ = "ExecucoesTarefas"
+    id = Column(Integer, primary_key=True)
+    tarefa = Column(String(50), nullable=False)
+    executor = Column(String(255), nullable=False)
+    iniciada_em = Column(DateTime, nullable=False)
+    finalizada_em = Column(DateTime, nullable=True)
+    duracao_ms = Column(Integer, nullable=True)
+    status = Column(Enum('executando', 'sucesso', 'erro', name='execucao_status'), nullable=False)
+    itens = Column(Integer, nullable=True)
+    erro = Column(Text, nullable=True)
+    __table_args__ = (Index('ix_execucoes_tarefas_tarefa_iniciada', 'tarefa', 'iniciada_em'),)
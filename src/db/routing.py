@@ -0,0 +1,140 @@
+# src/db/routing.py
+"""
+Roteamento das leituras para a réplica (REPLICA_DATABASE_URL).
+
+Só as rotas que usam `get_read_db` vão para a réplica, e a sessão cai para o primário quando:
+- o cliente escreveu há menos de REPLICA_READ_YOUR_WRITES_SECONDS (cookie ou cabeçalho
+  X-Escrita-Ate devolvidos pelo middleware `remember_write`), para que ele veja a própria alteração;
+- a réplica não respondeu na última verificação ou está atrasada mais que REPLICA_MAX_LAG_SECONDS;
+- a conexão com a réplica falha na abertura da sessão (ela é marcada fora do ar até a próxima
+  verificação).
+
+O front-end é de outra origem: o cookie é SameSite=None e Secure (só volta por HTTPS e com
+`credentials: "include"`, que o CORS já permite) e pode ser bloqueado como cookie de terceiros. Por
+isso o mesmo prazo vem também no cabeçalho X-Escrita-Ate, que o cliente reenvia nas leituras seguintes.
+
+Teste local com duas instâncias: uma réplica de streaming do banco de desenvolvimento com
+    pg_basebackup -h localhost -p 5432 -D /tmp/replica -R -X stream
+    pg_ctl -D /tmp/replica -o "-p 5433" start
+e REPLICA_DATABASE_URL apontando para a porta 5433. `SELECT pg_wal_replay_pause()` na réplica
+simula atraso; parar a réplica simula a queda.
+"""
+import threading
+import time
+from typing import Optional
+
+from fastapi import Request, Response
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from src.core.config import settings
+from src.db.session import ReplicaSessionLocal, SessionLocal, replica_engine
+from src.utils.logger import logger
+
+WRITE_COOKIE = "ifro_escrita"
+WRITE_HEADER = "X-Escrita-Ate"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Atraso de replicação em segundos; zero quando a réplica já aplicou tudo o que recebeu (sem
+# escritas no primário o horário da última transação aplicada envelhece sem haver atraso real)
+_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class ReplicaRouter:
+    """Estado da réplica neste worker; a verificação roda em uma das requisições, sem bloquear as demais."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._available = True
+        self._checked_at = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return ReplicaSessionLocal is not None
+
+    def _check(self):
+        try:
+            with replica_engine.connect() as connection:
+                lag = float(connection.execute(_LAG_SQL).scalar()) if replica_engine.dialect.name == 'postgresql' else 0.0
+        except DBAPIError as e:
+            self._set_available(False, f"sem conexão ({type(e.orig or e).__name__})")
+            return
+        if lag > settings.REPLICA_MAX_LAG_SECONDS:
+            self._set_available(False, f"atraso de {lag:.1f}s")
+        else:
+            self._set_available(True, f"atraso de {lag:.1f}s")
+
+    def _set_available(self, available: bool, motivo: str):
+        if available != self._available:
+            if available:
+                logger.info(f"Réplica de leitura disponível novamente ({motivo}).")
+            else:
+                logger.warning(f"Réplica de leitura fora de uso ({motivo}); leituras no primário.")
+        self._available = available
+        self._checked_at = time.monotonic()
+
+    def available(self) -> bool:
+        if time.monotonic() - self._checked_at >= settings.REPLICA_CHECK_SECONDS and self._lock.acquire(blocking=False):
+            try:
+                self._check()
+            finally:
+                self._lock.release()
+        return self._available
+
+    def mark_down(self, error: Exception):
+        self._set_available(False, f"falha ao conectar: {type(getattr(error, 'orig', None) or error).__name__}")
+
+    def open_session(self) -> Optional[Session]:
+        """Sessão na réplica já com a conexão aberta, ou None se ela não puder ser usada agora."""
+        if not self.enabled or not self.available():
+            return None
+        db = ReplicaSessionLocal()
+        try:
+            db.connection()
+        except DBAPIError as e:
+            db.close()
+            self.mark_down(e)
+            return None
+        db.info["replica"] = True
+        return db
+
+
+router = ReplicaRouter()
+
+
+def pinned_to_primary(request: Request) -> bool:
+    """O cliente escreveu há pouco (cabeçalho ou cookie com o instante até o qual as leituras ficam no primário)."""
+    try:
+        ate = float(request.headers.get(WRITE_HEADER) or request.cookies.get(WRITE_COOKIE, 0))
+    except ValueError:
+        return False
+    # Um valor adulterado não fixa o cliente no primário além do prazo configurado
+    agora = time.time()
+    return agora < ate <= agora + settings.REPLICA_READ_YOUR_WRITES_SECONDS
+
+
+def read_session(request: Request) -> Session:
+    if not pinned_to_primary(request):
+        db = router.open_session()
+        if db is not None:
+            return db
+    return SessionLocal()
+
+
+def remember_write(request: Request, response: Response):
+    """Após uma escrita bem-sucedida, fixa as leituras do cliente no primário pelo prazo configurado."""
+    if not router.enabled or request.method in SAFE_METHODS or response.status_code >= 400:
+        return
+    prazo = settings.REPLICA_READ_YOUR_WRITES_SECONDS
+    ate = f"{time.time() + prazo:.3f}"
+    response.headers[WRITE_HEADER] = ate
+    response.set_cookie(
+        WRITE_COOKIE, ate, max_age=prazo, httponly=True, secure=True, samesite="none",
+        path=settings.API_V1_STR,
+    )
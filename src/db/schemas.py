@@ -1,6 +1,6 @@
 # src/db/schemas.py
 from pydantic import BaseModel, EmailStr, Field, validator
-from typing import Optional, Literal, List
+from typing import Optional, Literal, List, Dict
 from datetime import datetime, date
 import re
 
@@ -63,6 +63,8 @@ class UserUpdate(BaseModel):
     campus_id: Optional[int] = None
 
 class User(UserBase):
+    # Na resposta o e-mail já foi validado na escrita; revalidar EmailStr a cada listagem é caro
+    email: str
     id: int
     tipo: str
     ativo: bool
@@ -107,6 +109,8 @@ class Event(EventBase):
     link_unico: str
     usuario_id: int
     autorizacoes_count: int = 0
+    # Eventos arquivados não têm mais autorizações nas tabelas: consulta em /arquivo/eventos/{id}
+    arquivado_em: Optional[datetime] = None
     
     # --- CORREÇÃO AQUI ---
     # Sobrescrevemos o campus_id de EventBase para que ele seja opcional na resposta
@@ -115,6 +119,29 @@ class Event(EventBase):
     class Config:
         from_attributes = True
 
+class StatsCounts(BaseModel):
+    pre_cadastrados: int = 0
+    submetidos: int = 0
+    aprovados: int = 0
+    rejeitados: int = 0
+    presentes: int = 0
+
+class EventStats(StatsCounts):
+    evento_id: int
+    titulo: str
+    data_inicio: date
+    campus_id: Optional[int] = None
+
+class CampusStats(StatsCounts):
+    campus_id: int
+    campus_nome: str
+    eventos: int
+
+class StatsOverview(BaseModel):
+    total: StatsCounts
+    campi: List[CampusStats]
+    eventos: List[EventStats]
+
 class EventPublicList(BaseModel):
     titulo: str
     data_inicio: date
@@ -151,6 +178,19 @@ class Presenca(PresencaBase):
     class Config:
         from_attributes = True
 
+class AttendanceMatrix(BaseModel):
+    """
+    Chamada em formato colunar: as listas de alunos são paralelas e, para cada dia de `dias`,
+    `ida`/`volta` trazem uma string de '0'/'1' com um caractere por aluno, na mesma ordem.
+    """
+    evento_id: int
+    dias: List[date]
+    autorizacao_ids: List[int]
+    nomes: List[str]
+    matriculas: List[Optional[str]]
+    ida: List[str]
+    volta: List[str]
+
 # --- Schemas de Autorização (Sem alterações) ---
 class AuthorizationPreRegister(BaseModel):
     nome_aluno: str
@@ -169,21 +209,74 @@ class AuthorizationStudentUpdate(BaseModel):
     nome_responsavel: str
     email_responsavel: EmailStr
 
-class AuthorizationForProfessor(BaseModel):
+class AuthorizationForProfessorBase(BaseModel):
     id: int
     nome_aluno: str
     matricula_aluno: Optional[str]
-    email_aluno: Optional[EmailStr]
+    # Os e-mails são validados na submissão (validate_submission_emails), não a cada listagem
+    email_aluno: Optional[str]
     nome_responsavel: Optional[str]
-    email_responsavel: Optional[EmailStr]
+    email_responsavel: Optional[str]
     status: str
     submetido_em: datetime
     caminho_arquivo: Optional[str] = None
     nome_arquivo_original: Optional[str] = None
+    class Config:
+        from_attributes = True
+
+class AuthorizationForProfessor(AuthorizationForProfessorBase):
+    presencas: List[Presenca] = []
+
+class AuthorizationPage(BaseModel):
+    itens: List[AuthorizationForProfessor]
+    proximo_cursor: Optional[str] = None
+    total: int
+    contagem_status: Dict[str, int]
+
+class DeletedRecord(BaseModel):
+    tipo: Literal['autorizacao', 'presenca']
+    id: int
+
+class ChangeFeed(BaseModel):
+    """Alterações desde o cursor. As presenças vêm à parte, identificadas por `autorizacao_id`."""
+    autorizacoes: List[AuthorizationForProfessorBase]
+    presencas: List[Presenca]
+    excluidos: List[DeletedRecord]
+    proximo_cursor: str
+
+class EventChanges(BaseModel):
+    """Mudanças de um evento enviadas pelo stream SSE (evento `mudancas`)."""
+    evento_id: int
+    autorizacoes: List[AuthorizationForProfessorBase] = []
     presencas: List[Presenca] = []
+    excluidos: List[DeletedRecord] = []
+
+class EventSearchInfo(BaseModel):
+    id: int
+    titulo: str
+    data_inicio: date
+    data_fim: Optional[date] = None
+    campus_id: Optional[int] = None
     class Config:
         from_attributes = True
 
+class AuthorizationSearchHit(BaseModel):
+    id: int
+    nome_aluno: str
+    matricula_aluno: Optional[str] = None
+    nome_responsavel: Optional[str] = None
+    email_aluno: Optional[str] = None
+    email_responsavel: Optional[str] = None
+    status: str
+    evento: EventSearchInfo
+    relevancia: float
+
+class AuthorizationSearchPage(BaseModel):
+    itens: List[AuthorizationSearchHit]
+    pagina: int
+    limite: int
+    tem_mais: bool
+
 class AuthorizationForStudentList(BaseModel):
     id: int
     nome_aluno: str
@@ -196,4 +289,164 @@ class StatusUpdate(BaseModel):
 
 class PresencaUpdate(BaseModel):
     presente_ida: Optional[bool] = None
-    presente_volta: Optional[bool] = None
\ No newline at end of file
+    presente_volta: Optional[bool] = None
+class UploadStatus(BaseModel):
+    """Estado de um upload retomável; `offset` é quantos bytes já foram recebidos."""
+    id: str
+    offset: int
+    tamanho: int
+    nome_arquivo: str
+    expira_em: datetime
+
+class PresignedTransfer(BaseModel):
+    """URL de curta duração para baixar ou enviar um arquivo direto no armazenamento."""
+    url: str
+    metodo: Literal['GET', 'PUT']
+    cabecalhos: Dict[str, str] = {}
+    expira_em: datetime
+
+class DirectUploadCreate(BaseModel):
+    nome_arquivo: str = Field(..., min_length=1, max_length=255)
+    tipo_arquivo: str
+    tamanho: int = Field(..., gt=0)
+
+class DirectUpload(PresignedTransfer):
+    """Envio direto: após o PUT na `url`, a submissão usa o `upload_id`."""
+    upload_id: str
+
+class DossierStatus(BaseModel):
+    """Andamento da geração do dossiê do evento (o PDF é devolvido quando `estado` é 'pronto')."""
+    estado: Literal['na_fila', 'gerando', 'pronto', 'erro']
+    chave: str
+    documentos: int = 0
+    processados: int = 0
+    paginas: int = 0
+    falhas: int = 0
+    atualizado_em: Optional[datetime] = None
+    erro: Optional[str] = None
+
+# --- Arquivo frio (eventos arquivados) ---
+class ArchivedEventInfo(BaseModel):
+    id: int
+    titulo: str
+    data_inicio: date
+    data_fim: Optional[date] = None
+    campus_id: Optional[int] = None
+    usuario_id: int
+    total_autorizacoes: int
+    arquivado_em: datetime
+
+class ArchiveSearchHit(BaseModel):
+    id: int
+    nome_aluno: str
+    matricula_aluno: Optional[str] = None
+    nome_responsavel: Optional[str] = None
+    status: str
+    evento: ArchivedEventInfo
+
+class ArchiveSearchPage(BaseModel):
+    itens: List[ArchiveSearchHit]
+    pagina: int
+    limite: int
+    tem_mais: bool
+
+class ArchivedFile(BaseModel):
+    """Manifesto do arquivo no prefixo frio; `download` só quando ele ainda existe no armazenamento."""
+    nome_original: Optional[str] = None
+    tipo: Optional[str] = None
+    tamanho: Optional[int] = None
+    presente: bool
+    download: Optional[PresignedTransfer] = None
+
+class ArchivedAttendance(PresencaBase):
+    pass
+
+class ArchivedAuthorization(BaseModel):
+    id: int
+    nome_aluno: str
+    matricula_aluno: Optional[str] = None
+    email_aluno: Optional[str] = None
+    nome_responsavel: Optional[str] = None
+    email_responsavel: Optional[str] = None
+    status: str
+    submetido_em: datetime
+    presencas: List[ArchivedAttendance] = []
+    arquivo: Optional[ArchivedFile] = None
+
+class ArchivedEvent(ArchivedEventInfo):
+    descricao: Optional[str] = None
+    horario: Optional[str] = None
+    local_evento: Optional[str] = None
+    observacoes: Optional[str] = None
+    autorizacoes: List[ArchivedAuthorization]
+
+# --- Tarefas periódicas (agendador) ---
+class ScheduledJob(BaseModel):
+    """Situação de uma tarefa e métricas das execuções no período consultado."""
+    nome: str
+    agenda: str
+    proxima_execucao: Optional[datetime] = None
+    executor: Optional[str] = None
+    execucoes: int
+    sucessos: int
+    erros: int
+    duracao_media_ms: Optional[float] = None
+    duracao_maxima_ms: Optional[int] = None
+    ultima_execucao: Optional[datetime] = None
+    ultimo_status: Optional[str] = None
+    ultimo_erro: Optional[str] = None
+
+class JobRun(BaseModel):
+    id: int
+    tarefa: str
+    executor: str
+    iniciada_em: datetime
+    finalizada_em: Optional[datetime] = None
+    duracao_ms: Optional[int] = None
+    status: str
+    itens: Optional[int] = None
+    erro: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+# --- Profiling sob demanda ---
+class ProfileTokenRequest(BaseModel):
+    caminho: str = Field(..., pattern="^/", max_length=500, description="Caminho exato da requisição a perfilar.")
+    minutos: int = Field(2, ge=1, description="Validade do token (limitada por PROFILING_TOKEN_MAX_MINUTES).")
+
+class ProfileToken(BaseModel):
+    """Enviar no cabeçalho `cabecalho` (ou no parâmetro `parametro`) da requisição ao `caminho`; vale para uma requisição."""
+    token: str
+    caminho: str
+    expira_em: datetime
+    cabecalho: str
+    parametro: str
+
+class ContinuousProfileStatus(BaseModel):
+    pid: int
+    ativo: bool
+    memoria: bool
+    iniciado_em: Optional[datetime] = None
+    amostras: int
+    intervalo_ms: int
+
+class ContinuousProfileResult(BaseModel):
+    pid: int
+    amostras: int
+    descartadas: int
+    duracao_ms: float
+    arquivos: List[str]
+
+class AllocationSite(BaseModel):
+    local: str
+    tamanho_kb: float
+    blocos: int
+    crescimento_kb: Optional[float] = None
+
+class AllocationReport(BaseModel):
+    pid: int
+    desde: datetime
+    total_kb: float
+    arquivo: str
+    sitios: List[AllocationSite]
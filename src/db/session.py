@@ -2,5 +2,24 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from src.core.config import settings
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
\ No newline at end of file
+
+def _connect_args(url: str, connect_timeout: int = None) -> dict:
+    # SQLite (usado nas execuções rápidas de benchmark) precisa aceitar conexões de outras threads
+    if url.startswith("sqlite"):
+        return {"check_same_thread": False}
+    return {"connect_timeout": connect_timeout} if connect_timeout else {}
+
+
+engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True, connect_args=_connect_args(settings.DATABASE_URL))
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Réplica de leitura opcional (ver src/db/routing.py). Timeout de conexão curto: com a réplica
+# fora do ar a requisição volta para o primário em vez de esperar o timeout do TCP
+replica_engine = None
+ReplicaSessionLocal = None
+if settings.REPLICA_DATABASE_URL:
+    replica_engine = create_engine(
+        settings.REPLICA_DATABASE_URL, pool_pre_ping=True,
+        connect_args=_connect_args(settings.REPLICA_DATABASE_URL, connect_timeout=2),
+    )
+    ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
@@ -1,20 +1,46 @@
 # src/main.py
+import time
+
+# Medido a partir daqui: com preload_app, é o custo pago uma vez no master do gunicorn
+_import_start = time.perf_counter()
+
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.middleware.gzip import GZipMiddleware
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
+from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
-import time
+from slowapi.middleware import SlowAPIMiddleware
 from datetime import datetime
 
 from src.core.config import settings
+from src.core.compression import CompressionMiddleware
+from src.core import tracing
+from src.core.profiling import PROFILE_ID_HEADER, ProfilingMiddleware
+from src.core.rate_limit import limiter
 from src.utils.logger import logger
-from src.api.endpoints import auth, events, authorizations, users, campus # 1. IMPORTAR campus
+from src.core.warmup import warm_up
+from src.db.routing import WRITE_HEADER, remember_write
+from src.services import dossier
+from src.services.scheduler import runner as scheduler
+from src.api.endpoints import auth, events, authorizations, users, campus, uploads, files, archive, scheduled_jobs, profiling # 1. IMPORTAR campus
+
+logger.info(f"Aplicação importada em {(time.perf_counter() - _import_start) * 1000:.1f}ms")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Roda em cada worker (depois do fork), antes de aceitar conexões
+    await run_in_threadpool(warm_up)
+    scheduler.start()
+    yield
+    await run_in_threadpool(scheduler.stop)
+    dossier.shutdown()
+    await run_in_threadpool(tracing.exporter.flush)
 
-limiter = Limiter(key_func=get_remote_address, default_limits=["200/minute"])
 
-app = FastAPI(title=settings.PROJECT_NAME)
+app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
 
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
@@ -31,10 +57,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Cabeçalhos que o JavaScript do front-end precisa ler (uploads retomáveis, idempotência e read-your-writes)
+    expose_headers=["Location", "Tus-Resumable", "Upload-Offset", "Upload-Length", "Upload-Expires", "Idempotent-Replayed", tracing.TRACE_ID_HEADER, PROFILE_ID_HEADER, WRITE_HEADER],
 )
 # --- FIM DA CORREÇÃO ---
 
-app.add_middleware(GZipMiddleware, minimum_size=1000)
+# Brotli ou gzip conforme o cliente; PDFs, imagens e .docx passam sem recompressão
+app.add_middleware(CompressionMiddleware)
+# Sem o middleware os default_limits do limiter nunca eram aplicados
+app.add_middleware(SlowAPIMiddleware)
 
 @app.middleware("http")
 async def log_requests_and_add_headers(request: Request, call_next):
@@ -49,6 +80,18 @@ async def log_requests_and_add_headers(request: Request, call_next):
     logger.info(f'"{request.method} {request.url.path}" {response.status_code} - {formatted_process_time}ms')
     return response
 
+@app.middleware("http")
+async def pin_reads_after_writes(request: Request, call_next):
+    # Read-your-writes com réplica de leitura: quem acabou de escrever lê do primário por alguns segundos
+    response = await call_next(request)
+    remember_write(request, response)
+    return response
+
+# Requisições com token de profiling (admin): perfil de CPU e alocações em logs/profiles
+app.add_middleware(ProfilingMiddleware)
+# Por último: fica por fora de todos os outros middlewares e mede a requisição inteira
+app.add_middleware(tracing.TracingMiddleware)
+
 # Incluindo os routers na aplicação
 app.include_router(auth.router, prefix=f"{settings.API_V1_STR}/auth", tags=["Auth"])
 app.include_router(events.router, prefix=f"{settings.API_V1_STR}/eventos", tags=["Events"])
@@ -56,8 +99,18 @@ app.include_router(authorizations.router, prefix=f"{settings.API_V1_STR}/autoriz
 app.include_router(users.router, prefix=f"{settings.API_V1_STR}/usuarios", tags=["Users"])
 # 2. INCLUIR O NOVO ROTEADOR
 app.include_router(campus.router, prefix=f"{settings.API_V1_STR}/campus", tags=["Campus"])
+app.include_router(uploads.router, prefix=f"{settings.API_V1_STR}/uploads", tags=["Uploads"])
+app.include_router(files.router, prefix=f"{settings.API_V1_STR}/arquivos", tags=["Files"])
+app.include_router(archive.router, prefix=f"{settings.API_V1_STR}/arquivo", tags=["Archive"])
+app.include_router(scheduled_jobs.router, prefix=f"{settings.API_V1_STR}/tarefas", tags=["Scheduled jobs"])
+app.include_router(profiling.router, prefix=f"{settings.API_V1_STR}/profiling", tags=["Profiling"])
 
 
 @app.get(f"{settings.API_V1_STR}/health", tags=["System"])
+@limiter.exempt
 def health_check():
-    return {"status": "OK", "timestamp": datetime.now()}
\ No newline at end of file
+    return {"status": "OK", "timestamp": datetime.now()}
+
+
+# Depois de todas as rotas: cada dependência vira um span no trace da requisição
+tracing.instrument_dependencies(app)
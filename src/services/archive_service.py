@@ -0,0 +1,376 @@
+# src/services/archive_service.py
+"""
+Arquivo frio dos eventos encerrados há mais de ARCHIVE_AFTER_DAYS.
+
+Cada evento vira um segmento JSONL.gz em ARCHIVE_DIRECTORY/segmentos/<ano>/evento_<id>.jsonl.gz:
+uma linha com o evento e uma por autorização, com as presenças e o manifesto do arquivo. Os
+arquivos vão para o prefixo ARCHIVE_PREFIX do armazenamento (diretório em disco frio ou regra de
+lifecycle do bucket) e as linhas saem das tabelas quentes. O evento continua em Eventos, com
+`arquivado_em` preenchido e os contadores de EstatisticasEventos intactos.
+
+O índice (ARCHIVE_DIRECTORY/indice.jsonl) tem uma linha por evento e uma por autorização, só com
+os campos de busca; a consulta (/arquivo) lê o índice e abre o segmento apenas no detalhe.
+
+Ordem em cada evento: arquivos, segmento, commit que remove as linhas e, por fim, o índice. Uma
+falha antes do commit desfaz a movimentação dos arquivos; uma parada entre o commit e o índice é
+corrigida com `rebuild_index` (scripts/archive.py reindexar), que relê os segmentos.
+"""
+import fcntl
+import gzip
+import json
+import os
+import threading
+import unicodedata
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func
+from sqlalchemy.orm import Session
+
+from src.core.config import settings
+from src.db import models
+from src.db.load_plans import AUTHORIZATION_WITH_ATTENDANCE
+from src.services.file_service import delete_file
+from src.services.partitions import since_event
+from src.services.storage import ARCHIVE_PREFIX, get_storage
+from src.utils.logger import logger
+
+INDEX_FILE = "indice.jsonl"
+SEGMENTS_DIR = "segmentos"
+_LOCK_FILE = ".indice.lock"
+
+_EVENT_FIELDS = (
+    "id", "titulo", "descricao", "data_inicio", "data_fim", "horario", "local_evento", "observacoes",
+    "link_unico", "usuario_id", "campus_id", "criado_em",
+)
+_AUTHORIZATION_FIELDS = (
+    "id", "nome_aluno", "matricula_aluno", "email_aluno", "nome_responsavel", "email_responsavel",
+    "status", "submetido_em",
+)
+
+
+def _root() -> Path:
+    return Path(settings.ARCHIVE_DIRECTORY)
+
+
+def normalize(texto: Optional[str]) -> str:
+    """Minúsculas e sem acentos, como a busca das autorizações (f_unaccent(lower(...)))."""
+    decomposto = unicodedata.normalize("NFKD", texto or "")
+    return "".join(c for c in decomposto if not unicodedata.combining(c)).lower()
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Tipo não serializável no arquivo: {type(value).__name__}")
+
+
+def _dumps(record: dict) -> str:
+    return json.dumps(record, ensure_ascii=False, default=_json_default, separators=(",", ":"))
+
+
+@contextmanager
+def _index_lock():
+    """Serializa as escritas no índice entre processos (job de arquivamento e exclusões pela API)."""
+    root = _root()
+    root.mkdir(parents=True, exist_ok=True)
+    with open(root / _LOCK_FILE, "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _write_atomic(path: Path, lines: Iterable[str], compress: bool = False):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    opener = gzip.open if compress else open
+    with opener(tmp_path, "wt", encoding="utf-8") as f:
+        for line in lines:
+            f.write(line + "\n")
+    os.replace(tmp_path, path)
+
+
+# --- SEGMENTOS ---
+def segment_name(evento: models.Evento) -> str:
+    return f"{SEGMENTS_DIR}/{evento.data_inicio.year}/evento_{evento.id}.jsonl.gz"
+
+
+def read_segment(segmento: str) -> Tuple[dict, List[dict]]:
+    """Evento e autorizações de um segmento, na ordem em que foram gravados."""
+    evento, autorizacoes = None, []
+    with gzip.open(_root() / segmento, "rt", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if record.pop("tipo") == "evento":
+                evento = record
+            else:
+                autorizacoes.append(record)
+    return evento, autorizacoes
+
+
+def _index_lines(evento: dict, autorizacoes: List[dict], segmento: str, arquivado_em) -> List[str]:
+    submissoes = [a["submetido_em"] for a in autorizacoes if a.get("submetido_em")]
+    lines = [_dumps({
+        "evento": evento["id"], "usuario": evento["usuario_id"], "campus": evento["campus_id"],
+        "titulo": evento["titulo"], "data_inicio": evento["data_inicio"], "data_fim": evento["data_fim"],
+        "autorizacoes": len(autorizacoes), "ultima_submissao": max(submissoes, default=None),
+        "arquivado_em": arquivado_em, "segmento": segmento,
+    })]
+    lines.extend(_dumps({
+        "autorizacao": a["id"], "evento": evento["id"], "nome_aluno": a["nome_aluno"],
+        "matricula_aluno": a["matricula_aluno"], "nome_responsavel": a["nome_responsavel"], "status": a["status"],
+    }) for a in autorizacoes)
+    return lines
+
+
+# --- ARQUIVAMENTO ---
+def archivable_events(db: Session, hoje: date = None, limite: int = None) -> List[models.Evento]:
+    """Eventos ainda não arquivados cujo fim (ou início, sem data de fim) passou de ARCHIVE_AFTER_DAYS."""
+    corte = (hoje or date.today()) - timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+    fim = func.coalesce(models.Evento.data_fim, models.Evento.data_inicio)
+    query = db.query(models.Evento).filter(models.Evento.arquivado_em.is_(None), fim < corte).order_by(fim, models.Evento.id)
+    return query.limit(limite).all() if limite else query.all()
+
+
+def _archive_file(storage, autorizacao: models.Autorizacao, movidos: list) -> Optional[dict]:
+    """Move o arquivo para o prefixo frio e devolve o manifesto dele."""
+    if not autorizacao.caminho_arquivo:
+        return None
+    chave = ARCHIVE_PREFIX + autorizacao.caminho_arquivo
+    try:
+        storage.move(autorizacao.caminho_arquivo, chave)
+        movidos.append((autorizacao.caminho_arquivo, chave))
+    except FileNotFoundError:
+        # Já movido por uma execução interrompida, ou ausente desde antes (conferido abaixo)
+        pass
+    armazenado = storage.stat(chave)
+    if armazenado is None:
+        logger.warning(f"Arquivo: {autorizacao.caminho_arquivo} (autorização {autorizacao.id}) não encontrado no armazenamento.")
+    return {
+        "chave": chave,
+        "nome_original": autorizacao.nome_arquivo_original,
+        "tipo": autorizacao.tipo_arquivo,
+        "tamanho": armazenado.tamanho if armazenado else autorizacao.tamanho_arquivo,
+        "presente": armazenado is not None,
+    }
+
+
+def _restore_files(storage, movidos: list):
+    for origem, destino in reversed(movidos):
+        try:
+            storage.move(destino, origem)
+        except Exception as e:
+            logger.error(f"Arquivo: não foi possível devolver {destino} para {origem}: {e}")
+
+
+def archive_event(db: Session, evento: models.Evento) -> int:
+    """Arquiva um evento (segmento, arquivos, linhas e índice); retorna o total de autorizações. Faz commit."""
+    storage = get_storage()
+    autorizacoes = db.query(models.Autorizacao).options(*AUTHORIZATION_WITH_ATTENDANCE).filter(
+        models.Autorizacao.evento_id == evento.id, since_event(evento.criado_em)
+    ).order_by(models.Autorizacao.id).all()
+
+    evento_registro = {campo: getattr(evento, campo) for campo in _EVENT_FIELDS}
+    segmento = segment_name(evento)
+    movidos = []
+    try:
+        registros = []
+        for autorizacao in autorizacoes:
+            registro = {campo: getattr(autorizacao, campo) for campo in _AUTHORIZATION_FIELDS}
+            registro["presencas"] = [
+                {"data_presenca": p.data_presenca, "presente_ida": p.presente_ida, "presente_volta": p.presente_volta}
+                for p in sorted(autorizacao.presencas, key=lambda p: p.data_presenca)
+            ]
+            registro["arquivo"] = _archive_file(storage, autorizacao, movidos)
+            registros.append(registro)
+        _write_atomic(
+            _root() / segmento,
+            [_dumps({"tipo": "evento", **evento_registro})]
+            + [_dumps({"tipo": "autorizacao", **registro}) for registro in registros],
+            compress=True,
+        )
+
+        # Remoção em massa: sem marcas de exclusão por linha no feed (o ETag do evento muda pela versão)
+        presencas = models.Presenca.__table__
+        tabela = models.Autorizacao.__table__
+        ids = tabela.select().with_only_columns(tabela.c.id).where(tabela.c.evento_id == evento.id)
+        db.execute(delete(presencas).where(
+            presencas.c.autorizacao_id.in_(ids), since_event(evento.criado_em, presencas.c.autorizacao_submetido_em)
+        ))
+        db.execute(delete(tabela).where(tabela.c.evento_id == evento.id, since_event(evento.criado_em, tabela.c.submetido_em)))
+        db.execute(delete(models.MudancaExcluida.__table__).where(models.MudancaExcluida.evento_id == evento.id))
+        evento.arquivado_em = datetime.now()
+        arquivado_em = evento.arquivado_em
+        db.commit()
+    except Exception:
+        db.rollback()
+        _restore_files(storage, movidos)
+        raise
+
+    lines = _index_lines(evento_registro, registros, segmento, arquivado_em)
+    with _index_lock(), open(_root() / INDEX_FILE, "a", encoding="utf-8") as f:
+        f.write("".join(line + "\n" for line in lines))
+        f.flush()
+        os.fsync(f.fileno())
+    return len(registros)
+
+
+def archive_closed_events(db: Session, dry_run: bool = False, limite: int = None) -> Tuple[int, int]:
+    """Arquiva os eventos elegíveis; retorna (eventos, autorizações) arquivados."""
+    eventos = autorizacoes = 0
+    for evento in archivable_events(db, limite=limite):
+        if dry_run:
+            logger.info(f"Arquivo: evento {evento.id} ('{evento.titulo}', fim {evento.data_fim or evento.data_inicio}) seria arquivado.")
+            continue
+        evento_id = evento.id
+        total = archive_event(db, evento)
+        eventos += 1
+        autorizacoes += total
+        logger.info(f"Arquivo: evento {evento_id} arquivado ({total} autorizações).")
+    return eventos, autorizacoes
+
+
+# --- ÍNDICE ---
+def _read_index(path: Path) -> Tuple[Dict[int, dict], Dict[int, dict]]:
+    eventos, autorizacoes = {}, {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            # Linhas repetidas (evento refeito após uma parada) ficam com a última versão
+            if "autorizacao" in record:
+                record["_busca"] = normalize(" ".join(
+                    filter(None, (record["nome_aluno"], record["matricula_aluno"], record["nome_responsavel"]))
+                ))
+                autorizacoes[record["autorizacao"]] = record
+            else:
+                eventos[record["evento"]] = record
+    return eventos, {
+        autorizacao_id: record for autorizacao_id, record in autorizacoes.items() if record["evento"] in eventos
+    }
+
+
+class ArchiveIndex:
+    """Índice em memória por worker, relido quando o arquivo muda (outro processo arquivou ou removeu)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stamp = None
+        self.eventos: Dict[int, dict] = {}
+        self.autorizacoes: Dict[int, dict] = {}
+
+    def refresh(self):
+        path = _root() / INDEX_FILE
+        try:
+            st = path.stat()
+            stamp = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            stamp = None
+        if stamp == self._stamp:
+            return
+        with self._lock:
+            if stamp != self._stamp:
+                self.eventos, self.autorizacoes = _read_index(path) if stamp else ({}, {})
+                self._stamp = stamp
+
+    def event(self, evento_id: int) -> Optional[dict]:
+        self.refresh()
+        return self.eventos.get(evento_id)
+
+    def search(self, termo: Optional[str] = None, matricula: Optional[str] = None, evento_id: Optional[int] = None,
+               usuario_id: Optional[int] = None) -> List[Tuple[dict, dict]]:
+        """Pares (autorização, evento) do índice, do evento mais recente para o mais antigo e por nome."""
+        self.refresh()
+        termo = normalize(termo) if termo else None
+        hits = []
+        for record in self.autorizacoes.values():
+            evento = self.eventos[record["evento"]]
+            if usuario_id is not None and evento["usuario"] != usuario_id:
+                continue
+            if evento_id is not None and record["evento"] != evento_id:
+                continue
+            if matricula and record["matricula_aluno"] != matricula:
+                continue
+            if termo and termo not in record["_busca"]:
+                continue
+            hits.append((record, evento))
+        # Ordenação estável em duas passadas: nome crescente dentro de cada evento, eventos decrescentes
+        hits.sort(key=lambda hit: (hit[0]["_busca"], hit[0]["autorizacao"]))
+        hits.sort(key=lambda hit: (hit[1]["data_inicio"], hit[1]["evento"]), reverse=True)
+        return hits
+
+
+index = ArchiveIndex()
+
+
+def rebuild_index() -> int:
+    """Reescreve o índice a partir dos segmentos; retorna o total de eventos indexados."""
+    root = _root()
+    with _index_lock():
+        lines, eventos = [], 0
+        for path in sorted((root / SEGMENTS_DIR).glob("*/*.jsonl.gz")):
+            segmento = path.relative_to(root).as_posix()
+            evento, autorizacoes = read_segment(segmento)
+            lines.extend(_index_lines(evento, autorizacoes, segmento, datetime.fromtimestamp(path.stat().st_mtime)))
+            eventos += 1
+        _write_atomic(root / INDEX_FILE, lines)
+    return eventos
+
+
+# --- REMOÇÃO (exclusão do evento e retenção) ---
+def remove_archived_event(evento_id: int) -> int:
+    """
+    Apaga os arquivos, o segmento e as linhas do índice de um evento arquivado; retorna o total de
+    autorizações. Se algum arquivo não puder ser apagado, o erro sobe e o evento continua no arquivo.
+    """
+    root = _root()
+    path = root / INDEX_FILE
+    with _index_lock():
+        if not path.exists():
+            return 0
+        eventos, _ = _read_index(path)
+        entrada = eventos.get(evento_id)
+        if entrada is None:
+            return 0
+        _, autorizacoes = read_segment(entrada["segmento"])
+        for autorizacao in autorizacoes:
+            if autorizacao.get("arquivo") and autorizacao["arquivo"]["presente"]:
+                delete_file(autorizacao["arquivo"]["chave"])
+
+        with open(path, encoding="utf-8") as f:
+            restantes = [
+                line.rstrip("\n") for line in f
+                if line.strip() and json.loads(line).get("evento") != evento_id
+            ]
+        _write_atomic(path, restantes)
+        (root / entrada["segmento"]).unlink(missing_ok=True)
+    return len(autorizacoes)
+
+
+def expired_archived_events(agora: datetime = None) -> List[dict]:
+    """Eventos do arquivo cuja última submissão passou de AUTHORIZATION_RETENTION_DAYS."""
+    limite = ((agora or datetime.now()) - timedelta(days=settings.AUTHORIZATION_RETENTION_DAYS)).isoformat()
+    index.refresh()
+    return [
+        evento for evento in index.eventos.values()
+        if (evento["ultima_submissao"] or evento["arquivado_em"]) < limite
+    ]
+
+
+def purge_expired_archive(dry_run: bool = False) -> int:
+    """Aplica a retenção ao arquivo; retorna o total de autorizações removidas."""
+    removidas = 0
+    for evento in expired_archived_events():
+        if dry_run:
+            logger.info(f"Arquivo: evento {evento['evento']} (última submissão {evento['ultima_submissao']}) seria removido.")
+            continue
+        total = remove_archived_event(evento["evento"])
+        removidas += total
+        logger.info(f"Arquivo: evento {evento['evento']} removido do arquivo ({total} autorizações).")
+    return removidas
@@ -0,0 +1,81 @@
+# src/services/campus_registry.py
+"""
+Cadastro de campi em memória. Os campi mudam raramente, então cada worker guarda a tabela inteira
+(e a listagem pública já serializada) e só a recarrega quando a versão em VersoesCadastros muda.
+
+A versão é incrementada na mesma transação de qualquer escrita em Campi (listener em models.py)
+e conferida no máximo a cada CAMPUS_REGISTRY_CHECK_SECONDS. Um ID não encontrado força a
+conferência, para que um campus recém-criado em outro worker seja aceito imediatamente.
+"""
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.core.config import settings
+from src.db import models, schemas
+from src.utils.serialization import list_adapter
+
+REGISTRY_NAME = "campus"
+
+
+class CampusSnapshot(NamedTuple):
+    versao: int
+    por_id: Dict[int, schemas.Campus]
+    ordenados: List[schemas.Campus]
+    corpo: bytes
+
+
+class CampusRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot: Optional[CampusSnapshot] = None
+        self._checked_at = 0.0
+
+    def _current_version(self, db: Session) -> int:
+        versoes = models.VersaoCadastro.__table__
+        return db.execute(select(versoes.c.versao).where(versoes.c.nome == REGISTRY_NAME)).scalar() or 0
+
+    def load(self, db: Session) -> CampusSnapshot:
+        versao = self._current_version(db)
+        campi = db.query(models.Campus.id, models.Campus.nome).order_by(models.Campus.nome).all()
+        # Linhas do banco sem validação: as regras de entrada (ex.: nome com 3+ caracteres) não valem
+        # para cadastros antigos, e uma linha fora delas derrubaria todas as rotas que usam o cadastro
+        ordenados = [schemas.Campus.model_construct(id=campus.id, nome=campus.nome) for campus in campi]
+        snapshot = CampusSnapshot(
+            versao=versao,
+            por_id={campus.id: campus for campus in ordenados},
+            ordenados=ordenados,
+            corpo=list_adapter(schemas.Campus).dump_json(ordenados),
+        )
+        self._snapshot = snapshot
+        self._checked_at = time.monotonic()
+        return snapshot
+
+    def current(self, db: Session, force_check: bool = False) -> CampusSnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and not force_check and \
+                time.monotonic() - self._checked_at < settings.CAMPUS_REGISTRY_CHECK_SECONDS:
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            # Só avança: uma sessão na réplica atrasada não volta o cadastro para uma versão anterior
+            if snapshot is None or self._current_version(db) > snapshot.versao:
+                return self.load(db)
+            self._checked_at = time.monotonic()
+            return snapshot
+
+    def get(self, db: Session, campus_id: int) -> Optional[schemas.Campus]:
+        campus = self.current(db).por_id.get(campus_id)
+        if campus is None:
+            campus = self.current(db, force_check=True).por_id.get(campus_id)
+        return campus
+
+    def invalidate(self):
+        """Chamado após uma escrita neste worker: a próxima leitura recarrega sem esperar o intervalo."""
+        self._checked_at = 0.0
+
+
+registry = CampusRegistry()
@@ -0,0 +1,31 @@
+# src/services/change_feed.py
+from sqlalchemy import and_, select
+from sqlalchemy.orm import Session
+
+from src.db import models
+
+
+def current_watermark(db: Session) -> int:
+    """Limite (exclusivo) das versões que já podem ser entregues; vira o próximo cursor."""
+    return db.execute(select(models.change_watermark())).scalar()
+
+
+def collect_changes(db: Session, eventos, desde: int, ate: int) -> dict:
+    """
+    Autorizações, presenças e exclusões com versão em [desde, ate) dos eventos informados
+    (uma lista de IDs ou um SELECT de IDs). As presenças vêm como (presenca, evento_id).
+    """
+    def window(column):
+        return and_(column >= desde, column < ate)
+
+    autorizacoes = db.query(models.Autorizacao).filter(
+        models.Autorizacao.evento_id.in_(eventos), window(models.Autorizacao.versao)
+    ).order_by(models.Autorizacao.versao, models.Autorizacao.id).all()
+    presencas = db.query(models.Presenca, models.Autorizacao.evento_id).join(models.Autorizacao).filter(
+        models.Autorizacao.evento_id.in_(eventos), window(models.Presenca.versao)
+    ).order_by(models.Presenca.versao, models.Presenca.id).all()
+    excluidos = db.query(models.MudancaExcluida).filter(
+        models.MudancaExcluida.evento_id.in_(eventos), window(models.MudancaExcluida.versao)
+    ).order_by(models.MudancaExcluida.versao, models.MudancaExcluida.id).all()
+
+    return {"autorizacoes": autorizacoes, "presencas": presencas, "excluidos": excluidos}
@@ -0,0 +1,262 @@
+# src/services/dossier.py
+"""
+Dossiê do evento em PDF: capa (dados do evento e lista de alunos com o status) seguida dos
+documentos das autorizações aprovadas, com as imagens convertidas em páginas.
+
+A geração roda em um pool de processos (DOSSIER_WORKERS em cada worker da API): a requisição só
+lê o banco e enfileira. O processo filho busca um documento por vez, grava o PDF em um arquivo
+temporário e o envia ao armazenamento; a API nunca carrega o dossiê, só serve o arquivo pronto
+(FileResponse no armazenamento local, URL pré-assinada no S3). O progresso fica em um JSON ao
+lado do PDF, visível a todos os workers.
+
+A chave é o hash dos dados da capa e de (id, versao) de cada autorização do evento: qualquer
+alteração gera outro dossiê e o mesmo conjunto reaproveita o já gerado. Os arquivos ficam sob
+DOSSIER_PREFIX e a tarefa `dossies` do agendador os apaga depois de DOSSIER_TTL_HOURS.
+
+pypdf, Pillow e reportlab só são importados nos processos do pool.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+from src.core.config import settings
+from src.services.storage import DOSSIER_PREFIX, get_storage
+from src.utils.logger import logger
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tif", ".tiff", ".webp"}
+# Imagens reduzidas para caber em A4 a 150 dpi: fotos de celular não incham o dossiê
+IMAGE_MAX_SIZE = (1240, 1754)
+IMAGE_DPI = 150
+# Intervalo mínimo entre as gravações do progresso
+PROGRESS_INTERVAL_SECONDS = 1.0
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def dossier_key(dados: dict) -> str:
+    conteudo = json.dumps(dados, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(conteudo.encode()).hexdigest()[:20]
+
+
+def pdf_key(evento_id: int, chave: str) -> str:
+    return f"{DOSSIER_PREFIX}evento_{evento_id}_{chave}.pdf"
+
+
+def _status_key(evento_id: int, chave: str) -> str:
+    return f"{DOSSIER_PREFIX}evento_{evento_id}_{chave}.json"
+
+
+def read_status(evento_id: int, chave: str) -> Optional[dict]:
+    storage = get_storage()
+    key = _status_key(evento_id, chave)
+    if storage.stat(key) is None:
+        return None
+    return json.loads(storage.get(key))
+
+
+def _write_status(evento_id: int, chave: str, estado: str, **dados) -> dict:
+    status = {"estado": estado, "atualizado_em": datetime.now().isoformat(timespec="seconds"), **dados}
+    get_storage().put(_status_key(evento_id, chave), json.dumps(status).encode(), "application/json")
+    return status
+
+
+def _stale(status: dict) -> bool:
+    atualizado_em = datetime.fromisoformat(status["atualizado_em"])
+    return datetime.now() - atualizado_em > timedelta(minutes=settings.DOSSIER_STALE_MINUTES)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: o filho não herda as conexões do banco nem as threads do worker da API
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.DOSSIER_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _executor
+
+
+def shutdown():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def request_dossier(dados: dict) -> dict:
+    """
+    Estado do dossiê para os dados atuais do evento, enfileirando a geração quando ele não existe
+    (ou quando a anterior ficou parada por mais de DOSSIER_STALE_MINUTES, ex.: worker reiniciado).
+    Uma geração que falhou é informada uma vez; a chamada seguinte tenta de novo.
+    """
+    evento_id = dados["evento"]["id"]
+    chave = dossier_key(dados)
+    if get_storage().stat(pdf_key(evento_id, chave)) is not None:
+        return {"estado": "pronto", "chave": chave}
+
+    status = read_status(evento_id, chave)
+    if status is not None and status["estado"] == "erro":
+        if not status.get("informado"):
+            dados_erro = {campo: valor for campo, valor in status.items() if campo not in ("estado", "atualizado_em")}
+            status = _write_status(evento_id, chave, "erro", **dados_erro, informado=True)
+            return {**status, "chave": chave}
+    elif status is not None and status["estado"] != "pronto" and not _stale(status):
+        return {**status, "chave": chave}
+
+    documentos = sum(1 for aluno in dados["alunos"] if aluno["status"] == "aprovado" and aluno["caminho_arquivo"])
+    status = _write_status(evento_id, chave, "na_fila", documentos=documentos, processados=0, paginas=0, falhas=0)
+    future = _get_executor().submit(build_dossier, dados, chave)
+    future.add_done_callback(lambda f: f.exception() and logger.error(
+        f"Dossiê do evento {evento_id}: o processo de geração falhou: {f.exception()!r}"
+    ))
+    logger.info(f"Dossiê do evento {evento_id} enfileirado ({documentos} documentos).")
+    return {**status, "chave": chave}
+
+
+# --- GERAÇÃO (processos do pool) ---
+def _cover(dados: dict, path: Path):
+    from xml.sax.saxutils import escape
+
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import cm
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    evento, alunos = dados["evento"], dados["alunos"]
+    styles = getSampleStyleSheet()
+    celula = styles["BodyText"]
+    story = [
+        Paragraph("Dossiê de autorizações", styles["Title"]),
+        Paragraph(escape(evento["titulo"]), styles["Heading2"]),
+    ]
+    for rotulo, valor in (
+        ("Data", evento["periodo"]), ("Local", evento["local_evento"]), ("Campus", evento["campus"]),
+        ("Responsável", evento["professor"]), ("Observações", evento["observacoes"]),
+    ):
+        if valor:
+            story.append(Paragraph(f"<b>{rotulo}:</b> {escape(valor)}", celula))
+
+    contagem = {}
+    for aluno in alunos:
+        contagem[aluno["status"]] = contagem.get(aluno["status"], 0) + 1
+    resumo = ", ".join(f"{status}: {total}" for status, total in sorted(contagem.items())) or "nenhum aluno"
+    story += [Spacer(1, 0.4 * cm), Paragraph(f"<b>Alunos ({len(alunos)}):</b> {escape(resumo)}", celula), Spacer(1, 0.3 * cm)]
+
+    linhas = [["#", "Aluno", "Matrícula", "Status", "Documento"]]
+    for numero, aluno in enumerate(alunos, start=1):
+        incluido = aluno["status"] == "aprovado" and aluno["caminho_arquivo"]
+        linhas.append([
+            str(numero), Paragraph(escape(aluno["nome_aluno"]), celula), aluno["matricula_aluno"] or "-",
+            aluno["status"], "anexado" if incluido else "-",
+        ])
+    tabela = Table(linhas, colWidths=[1 * cm, 8 * cm, 3.5 * cm, 2.8 * cm, 2.2 * cm], repeatRows=1)
+    tabela.setStyle(TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ("FONTSIZE", (0, 0), (-1, -1), 9),
+    ]))
+    story.append(tabela)
+    SimpleDocTemplate(str(path), pagesize=A4, title=f"Dossiê - {evento['titulo']}").build(story)
+
+
+def _missing_page(aluno: dict, motivo: str, path: Path):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    pagina = canvas.Canvas(str(path), pagesize=A4)
+    _, altura = A4
+    pagina.setFont("Helvetica-Bold", 14)
+    pagina.drawString(72, altura - 96, "Documento indisponível")
+    pagina.setFont("Helvetica", 11)
+    pagina.drawString(72, altura - 120, f"Aluno: {aluno['nome_aluno']}")
+    pagina.drawString(72, altura - 138, f"Motivo: {motivo}")
+    pagina.save()
+
+
+def _document_pdf(storage, aluno: dict, workdir: Path) -> Path:
+    """O documento da autorização como PDF em disco (imagens viram uma página)."""
+    key = aluno["caminho_arquivo"]
+    origem = storage.local_path(key)
+    if origem is None or not origem.is_file():
+        if storage.stat(key) is None:
+            raise FileNotFoundError("arquivo não encontrado no armazenamento")
+        origem = workdir / f"origem{Path(key).suffix}"
+        origem.write_bytes(storage.get(key))
+
+    tipo = aluno["tipo_arquivo"] or ""
+    if tipo == "application/pdf" or origem.suffix.lower() == ".pdf":
+        return origem
+    if not (tipo.startswith("image/") or origem.suffix.lower() in IMAGE_SUFFIXES):
+        raise ValueError(f"tipo de arquivo não suportado ({tipo or origem.suffix})")
+
+    from PIL import Image, ImageOps
+
+    destino = workdir / "imagem.pdf"
+    with Image.open(origem) as imagem:
+        imagem = ImageOps.exif_transpose(imagem).convert("RGB")
+        imagem.thumbnail(IMAGE_MAX_SIZE)
+        imagem.save(destino, "PDF", resolution=IMAGE_DPI)
+    return destino
+
+
+def build_dossier(dados: dict, chave: str):
+    """Executado no pool: monta o dossiê em disco e o envia ao armazenamento."""
+    from pypdf import PdfReader, PdfWriter
+
+    evento_id = dados["evento"]["id"]
+    storage = get_storage()
+    aprovados = [aluno for aluno in dados["alunos"] if aluno["status"] == "aprovado" and aluno["caminho_arquivo"]]
+    progresso = {"documentos": len(aprovados), "processados": 0, "paginas": 0, "falhas": 0}
+    inicio = ultimo_aviso = time.monotonic()
+    try:
+        _write_status(evento_id, chave, "gerando", **progresso)
+        with tempfile.TemporaryDirectory(prefix="dossie-") as tmp:
+            workdir = Path(tmp)
+            writer = PdfWriter()
+            _cover(dados, workdir / "capa.pdf")
+            writer.append(str(workdir / "capa.pdf"))
+
+            for aluno in aprovados:
+                documento_dir = workdir / str(aluno["id"])
+                documento_dir.mkdir()
+                try:
+                    documento = _document_pdf(storage, aluno, documento_dir)
+                    writer.append(PdfReader(documento), outline_item=aluno["nome_aluno"])
+                except Exception as e:
+                    logger.warning(f"Dossiê do evento {evento_id}: documento da autorização {aluno['id']} ignorado ({e}).")
+                    _missing_page(aluno, str(e), documento_dir / "indisponivel.pdf")
+                    writer.append(str(documento_dir / "indisponivel.pdf"), outline_item=f"{aluno['nome_aluno']} (indisponível)")
+                    progresso["falhas"] += 1
+                progresso["processados"] += 1
+                progresso["paginas"] = len(writer.pages)
+                if time.monotonic() - ultimo_aviso >= PROGRESS_INTERVAL_SECONDS:
+                    _write_status(evento_id, chave, "gerando", **progresso)
+                    ultimo_aviso = time.monotonic()
+
+            progresso["paginas"] = len(writer.pages)
+            saida = workdir / "dossie.pdf"
+            with open(saida, "wb") as f:
+                writer.write(f)
+            writer.close()
+            progresso["tamanho"] = os.path.getsize(saida)
+            storage.put_file(pdf_key(evento_id, chave), saida, "application/pdf")
+        _write_status(evento_id, chave, "pronto", **progresso)
+        logger.info(
+            f"Dossiê do evento {evento_id} gerado em {time.monotonic() - inicio:.1f}s: "
+            f"{progresso['paginas']} páginas, {progresso['falhas']} documentos indisponíveis."
+        )
+    except Exception as e:
+        logger.error(f"Erro ao gerar o dossiê do evento {evento_id}: {e}")
+        _write_status(evento_id, chave, "erro", erro=str(e), **progresso)
@@ -1,32 +1,54 @@
 # src/services/email_service.py
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+# fastapi_mail e jinja2 são importados sob demanda: o fastapi_mail sozinho leva ~150ms para
+# importar e só é usado nas background tasks de envio, depois da resposta
 from pathlib import Path
-from sqlalchemy.orm import joinedload
 
+from src.core import tracing
 from src.core.config import settings
 from src.utils.logger import logger
 from src.db.models import Autorizacao, Evento, Usuario
-from src.db import models
+from src.db.load_plans import AUTHORIZATION_FOR_EMAIL
 from src.db.session import SessionLocal
 
 class EmailService:
-    conf = ConnectionConfig(
-        MAIL_USERNAME=settings.SMTP_USER,
-        MAIL_PASSWORD=settings.SMTP_PASS,
-        MAIL_FROM=settings.FROM_EMAIL,
-        MAIL_PORT=settings.SMTP_PORT,
-        MAIL_SERVER=settings.SMTP_HOST,
-        MAIL_STARTTLS=True,
-        MAIL_SSL_TLS=False,
-        USE_CREDENTIALS=True,
-        VALIDATE_CERTS=True
-    )
-    
-    template_env = Environment(
-        loader=FileSystemLoader(Path(__file__).parent / 'email_templates'),
-        autoescape=select_autoescape(['html'])
-    )
+    _conf = None
+    _template_env = None
+
+    @classmethod
+    def get_connection_config(cls):
+        if cls._conf is None:
+            from fastapi_mail import ConnectionConfig
+            cls._conf = ConnectionConfig(
+                MAIL_USERNAME=settings.SMTP_USER,
+                MAIL_PASSWORD=settings.SMTP_PASS,
+                MAIL_FROM=settings.FROM_EMAIL,
+                MAIL_PORT=settings.SMTP_PORT,
+                MAIL_SERVER=settings.SMTP_HOST,
+                MAIL_STARTTLS=settings.SMTP_STARTTLS,
+                MAIL_SSL_TLS=False,
+                USE_CREDENTIALS=settings.SMTP_USE_CREDENTIALS,
+                VALIDATE_CERTS=settings.SMTP_VALIDATE_CERTS
+            )
+        return cls._conf
+
+    @classmethod
+    def get_template_env(cls):
+        if cls._template_env is None:
+            from jinja2 import Environment, FileSystemLoader, select_autoescape
+            cls._template_env = Environment(
+                loader=FileSystemLoader(Path(__file__).parent / 'email_templates'),
+                autoescape=select_autoescape(['html'])
+            )
+        return cls._template_env
+
+    @classmethod
+    def compile_templates(cls) -> int:
+        """Compila todos os templates de e-mail (ficam no cache do Environment); usado no aquecimento."""
+        env = cls.get_template_env()
+        names = env.list_templates(extensions=['html'])
+        for name in names:
+            env.get_template(name)
+        return len(names)
 
     @classmethod
     def format_event_date(cls, evento: Evento) -> str:
@@ -45,6 +67,11 @@ class EmailService:
 
     @classmethod
     async def send_email(cls, subject: str, recipients: list, template_name: str, template_body: dict):
+        with tracing.span("smtp.enviar", tracing.SPAN_KIND_CLIENT, **{"email.template": template_name}) as span:
+            await cls._send_email(subject, recipients, template_name, template_body, span)
+
+    @classmethod
+    async def _send_email(cls, subject: str, recipients: list, template_name: str, template_body: dict, span):
         try:
             valid_recipients = [email for email in recipients if email]
             if not valid_recipients:
@@ -55,7 +82,9 @@ class EmailService:
             if 'evento' in template_body:
                 template_body['formatted_event_date'] = cls.format_event_date(template_body['evento'])
 
-            template = cls.template_env.get_template(template_name)
+            from fastapi_mail import FastMail, MessageSchema
+
+            template = cls.get_template_env().get_template(template_name)
             html_content = template.render(template_body)
             message = MessageSchema(
                 subject=subject,
@@ -63,10 +92,15 @@ class EmailService:
                 body=html_content,
                 subtype="html"
             )
-            fm = FastMail(cls.conf)
+            fm = FastMail(cls.get_connection_config())
+            if span:
+                span.set(**{"email.destinatarios": len(valid_recipients), "smtp.host": settings.SMTP_HOST})
             await fm.send_message(message)
             logger.info(f"Email '{subject}' enviado para {valid_recipients}")
         except Exception as e:
+            # O envio roda em background task: a falha não chega ao cliente, mas mantém o trace
+            if span:
+                span.record_error(e)
             logger.error(f"Falha catastrófica ao enviar email '{subject}' para {recipients}: {e}")
 
     # --- FUNÇÕES AUXILIARES DE BUSCA NO DB ---
@@ -74,9 +108,9 @@ class EmailService:
     def get_autorizacao_from_db(cls, autorizacao_id: int):
         db = SessionLocal()
         try:
-            return db.query(Autorizacao).options(
-                joinedload(Autorizacao.evento).joinedload(models.Evento.criador)
-            ).filter(Autorizacao.id == autorizacao_id).first()
+            return db.query(Autorizacao).options(*AUTHORIZATION_FOR_EMAIL).filter(
+                Autorizacao.id == autorizacao_id
+            ).first()
         finally:
             db.close()
 
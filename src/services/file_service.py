@@ -1,51 +1,57 @@
-import aiofiles
-import os
 import uuid
 from pathlib import Path
 from fastapi import UploadFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from src.core import tracing
 from src.core.config import settings
+from src.services.storage import get_storage
 from src.utils.logger import logger
 
-async def save_upload_file(upload_file: UploadFile) -> str:
-    # Adiciona um log para sabermos exatamente o tipo de arquivo recebido
-    logger.info(f"Tentativa de upload do arquivo '{upload_file.filename}' com content-type: {upload_file.content_type}")
-
+def validate_file_type(content_type: str, filename: str):
     # --- LÓGICA DE VALIDAÇÃO FLEXÍVEL E ROBUSTA ---
     # Permite 'application/pdf' ou qualquer tipo que comece com 'image/'
-    
-    content_type = upload_file.content_type
-    
     if not (content_type == 'application/pdf' or (content_type and content_type.startswith('image/'))):
-        logger.warning(f"Upload bloqueado: Tipo de arquivo inválido '{content_type}' para o arquivo '{upload_file.filename}'.")
+        logger.warning(f"Upload bloqueado: Tipo de arquivo inválido '{content_type}' para o arquivo '{filename}'.")
         raise HTTPException(status_code=400, detail="Tipo de arquivo inválido. Apenas PDF e imagens são permitidos.")
-    
-    contents = await upload_file.read()
-    if len(contents) > settings.MAX_FILE_SIZE:
-        logger.warning(f"Upload bloqueado: Arquivo '{upload_file.filename}' excedeu o tamanho máximo de {settings.MAX_FILE_SIZE} bytes.")
+
+
+def validate_file_size(size: int, filename: str):
+    if size > settings.MAX_FILE_SIZE:
+        logger.warning(f"Upload bloqueado: Arquivo '{filename}' excedeu o tamanho máximo de {settings.MAX_FILE_SIZE} bytes.")
         raise HTTPException(status_code=400, detail="Arquivo muito grande.")
-    
-    upload_dir = Path(settings.UPLOAD_DIRECTORY)
-    upload_dir.mkdir(parents=True, exist_ok=True)
-    
-    ext = Path(upload_file.filename).suffix
+
+
+def new_stored_filename(original_filename: str) -> str:
     # Garante que a extensão seja minúscula para consistência
-    filename = f"{uuid.uuid4()}{ext.lower()}"
-    file_path = upload_dir / filename
+    ext = Path(original_filename or "").suffix
+    return f"{uuid.uuid4()}{ext.lower()}"
+
+
+async def save_upload_file(upload_file: UploadFile) -> str:
+    # Adiciona um log para sabermos exatamente o tipo de arquivo recebido
+    logger.info(f"Tentativa de upload do arquivo '{upload_file.filename}' com content-type: {upload_file.content_type}")
+
+    validate_file_type(upload_file.content_type, upload_file.filename)
+    
+    with tracing.span("upload.ler", **{"arquivo.tipo": upload_file.content_type or ""}) as span:
+        contents = await upload_file.read()
+        if span:
+            span.set(**{"arquivo.bytes": len(contents)})
+    validate_file_size(len(contents), upload_file.filename)
     
-    async with aiofiles.open(file_path, 'wb') as f:
-        await f.write(contents)
+    filename = new_stored_filename(upload_file.filename)
+    await run_in_threadpool(get_storage().put, filename, contents, upload_file.content_type)
     
     logger.info(f"Arquivo '{upload_file.filename}' salvo como '{filename}'")
     return filename
 
 def delete_file(filename: str):
-    file_path = Path(settings.UPLOAD_DIRECTORY) / filename
+    storage = get_storage()
     try:
-        if file_path.is_file():
-            os.remove(file_path)
-            logger.info(f"Arquivo deletado: {file_path}")
+        if storage.delete(filename):
+            logger.info(f"Arquivo deletado ({storage.name}): {filename}")
         else:
-            logger.warning(f"Arquivo para deletar não encontrado: {file_path}")
+            logger.warning(f"Arquivo para deletar não encontrado ({storage.name}): {filename}")
     except Exception as e:
-        logger.error(f"Erro ao deletar o arquivo {file_path}: {e}")
+        logger.error(f"Erro ao deletar o arquivo {filename} ({storage.name}): {e}")
         raise
\ No newline at end of file
@@ -0,0 +1,164 @@
+# src/services/idempotency.py
+"""
+Idempotency-Key nas submissões públicas (multipart).
+
+A primeira requisição com a chave assume a linha em ChavesIdempotencia (INSERT com a restrição
+única decidindo quem chegou primeiro), processa e guarda status e corpo da resposta. Repetições
+recebem a resposta guardada sem salvar arquivo, inserir autorização ou enviar e-mails; uma
+repetição concorrente espera a original terminar. A tabela é compartilhada por todos os workers.
+"""
+import asyncio
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from src.core.config import settings
+from src.db import models
+from src.utils.logger import logger
+from src.utils.serialization import JSON_MEDIA_TYPE
+
+HEADER = "Idempotency-Key"
+REPLAY_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+_POLL_SECONDS = 0.25
+
+_table = models.ChaveIdempotencia.__table__
+
+
+def request_fingerprint(*values) -> str:
+    """Hash dos dados da requisição: a mesma chave com outro conteúdo é um erro do cliente."""
+    return hashlib.sha256(json.dumps(values, default=str, ensure_ascii=False).encode()).hexdigest()
+
+
+def _try_claim(db: Session, escopo: str, chave: str, hash_requisicao: str) -> bool:
+    now = datetime.now()
+    try:
+        db.execute(insert(_table).values(
+            escopo=escopo, chave=chave, hash_requisicao=hash_requisicao, bloqueada_em=now,
+            expira_em=now + timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS),
+        ))
+        db.commit()
+        return True
+    except IntegrityError:
+        db.rollback()
+        return False
+
+
+def _take_over(db: Session, row, hash_requisicao: str) -> bool:
+    """Assume uma chave expirada ou abandonada; o WHERE em bloqueada_em impede que dois workers a assumam."""
+    now = datetime.now()
+    result = db.execute(update(_table).where(
+        _table.c.id == row.id, _table.c.bloqueada_em == row.bloqueada_em
+    ).values(
+        hash_requisicao=hash_requisicao, status_code=None, corpo=None, bloqueada_em=now,
+        expira_em=now + timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS),
+    ))
+    db.commit()
+    return result.rowcount == 1
+
+
+async def _claim_or_replay(db: Session, escopo: str, chave: str, hash_requisicao: str) -> Optional[Response]:
+    """None quando esta requisição deve processar; senão a resposta guardada."""
+    deadline = asyncio.get_running_loop().time() + settings.IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        if _try_claim(db, escopo, chave, hash_requisicao):
+            return None
+
+        row = db.execute(select(_table).where(_table.c.escopo == escopo, _table.c.chave == chave)).first()
+        db.commit()
+        if row is None:
+            # Removida entre o INSERT e a leitura (limpeza ou falha da original): tenta de novo
+            continue
+        now = datetime.now()
+        abandoned = row.status_code is None and \
+            row.bloqueada_em < now - timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS)
+        if row.expira_em < now or abandoned:
+            if _take_over(db, row, hash_requisicao):
+                if abandoned:
+                    logger.warning(f"Idempotency-Key '{chave}' ({escopo}) abandonada em processamento; reprocessando.")
+                return None
+            continue
+
+        if row.hash_requisicao != hash_requisicao:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+                detail=f"A chave {HEADER} já foi usada com dados diferentes.",
+            )
+        if row.status_code is not None:
+            return Response(
+                content=row.corpo, status_code=row.status_code, media_type=JSON_MEDIA_TYPE,
+                headers={REPLAY_HEADER: "true"},
+            )
+        if asyncio.get_running_loop().time() >= deadline:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Uma requisição com esta chave ainda está em processamento. Tente novamente em instantes.",
+            )
+        await asyncio.sleep(_POLL_SECONDS)
+
+
+def _store(db: Session, escopo: str, chave: str, status_code: int, corpo: bytes):
+    db.execute(update(_table).where(_table.c.escopo == escopo, _table.c.chave == chave).values(
+        status_code=status_code, corpo=corpo.decode()
+    ))
+    db.commit()
+
+
+def _release(db: Session, escopo: str, chave: str):
+    db.execute(delete(_table).where(_table.c.escopo == escopo, _table.c.chave == chave))
+    db.commit()
+
+
+async def run_idempotent(
+    db: Session,
+    escopo: str,
+    chave: Optional[str],
+    hash_requisicao: str,
+    process: Callable[[], Awaitable[Response]],
+) -> Response:
+    """
+    Executa `process` uma única vez por (escopo, chave). Respostas de sucesso e erros do cliente
+    (HTTPException < 500) são guardadas; em qualquer outra falha a chave é liberada para nova tentativa.
+    Sem chave, apenas executa.
+    """
+    if chave is None:
+        return await process()
+    chave = chave.strip()
+    if not chave or len(chave) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"O cabeçalho {HEADER} deve ter entre 1 e {MAX_KEY_LENGTH} caracteres.",
+        )
+
+    replay = await _claim_or_replay(db, escopo, chave, hash_requisicao)
+    if replay is not None:
+        logger.info(f"Idempotency-Key '{chave}' ({escopo}): resposta original devolvida sem reprocessar.")
+        return replay
+
+    try:
+        response = await process()
+    except HTTPException as e:
+        db.rollback()
+        if e.status_code < 500 and not e.headers:
+            _store(db, escopo, chave, e.status_code, json.dumps({"detail": e.detail}, ensure_ascii=False).encode())
+        else:
+            _release(db, escopo, chave)
+        raise
+    except BaseException:
+        db.rollback()
+        _release(db, escopo, chave)
+        raise
+
+    _store(db, escopo, chave, response.status_code, response.body)
+    return response
+
+
+def purge_expired(db: Session) -> int:
+    """Remove as respostas vencidas; não faz commit."""
+    return db.execute(delete(_table).where(_table.c.expira_em < datetime.now())).rowcount
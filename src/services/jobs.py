@@ -0,0 +1,157 @@
+# src/services/jobs.py
+"""
+Tarefas periódicas executadas pelo agendador (src/services/scheduler.py).
+
+Cada tarefa recebe uma sessão, processa em lotes com commit por lote e devolve o total de itens
+processados. Todas são idempotentes: se o worker cair no meio, a próxima execução (depois que a
+concessão vencer) continua de onde a anterior parou, sem repetir efeitos.
+"""
+from datetime import datetime, timedelta
+from typing import Callable, Dict, NamedTuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from src.core.config import settings
+from src.db import models
+from src.services import archive_service, idempotency, partitions, stats_service
+from src.services.file_service import delete_file
+from src.services.storage import DOSSIER_PREFIX, get_storage
+from src.services.upload_staging import purge_expired_uploads
+from src.utils.logger import logger
+
+# Autorizações removidas por transação na retenção sem partições
+RETENTION_BATCH_SIZE = 500
+# Eventos recalculados por transação no recálculo noturno das estatísticas
+STATS_BATCH_SIZE = 200
+# Eventos arquivados por execução (a fila restante fica para a próxima)
+ARCHIVE_BATCH_SIZE = 50
+
+
+class Job(NamedTuple):
+    nome: str
+    agenda: str
+    funcao: Callable[[Session], int]
+    # Prazo da concessão, renovada a cada terço dele durante a execução: se o worker sumir, outro assume a tarefa depois disso
+    concessao_minutos: int = 30
+
+
+def ensure_partitions(db: Session) -> int:
+    if not partitions.is_partitioned(db):
+        return 0
+    criadas = partitions.ensure_partitions(db)
+    db.commit()
+    return len(criadas)
+
+
+def archive_closed_events(db: Session) -> int:
+    eventos, _ = archive_service.archive_closed_events(db, limite=ARCHIVE_BATCH_SIZE)
+    return eventos
+
+
+def purge_expired_authorizations(db: Session) -> int:
+    """Retenção: semestres inteiros quando particionado; senão, lotes de autorizações (arquivos primeiro)."""
+    if partitions.is_partitioned(db):
+        return partitions.purge_expired_partitions(db)
+
+    limite = datetime.now() - timedelta(days=settings.AUTHORIZATION_RETENTION_DAYS)
+    autorizacoes = models.Autorizacao.__table__
+    presencas = models.Presenca.__table__
+    eventos = models.Evento.__table__
+    removidas = 0
+    while True:
+        lote = db.execute(
+            select(autorizacoes.c.id, autorizacoes.c.evento_id, autorizacoes.c.caminho_arquivo)
+            .where(autorizacoes.c.submetido_em < limite)
+            .order_by(autorizacoes.c.submetido_em)
+            .limit(RETENTION_BATCH_SIZE)
+        ).all()
+        if not lote:
+            return removidas
+
+        for autorizacao in lote:
+            if autorizacao.caminho_arquivo:
+                delete_file(autorizacao.caminho_arquivo)
+        ids = [autorizacao.id for autorizacao in lote]
+        evento_ids = {autorizacao.evento_id for autorizacao in lote}
+        db.execute(delete(presencas).where(
+            presencas.c.autorizacao_id.in_(ids), presencas.c.autorizacao_submetido_em < limite
+        ))
+        db.execute(delete(autorizacoes).where(autorizacoes.c.id.in_(ids)))
+        # Contadores e ETags dos eventos que perderam autorizações
+        stats_service.recalculate_event_stats(db, evento_ids)
+        db.execute(update(eventos).where(eventos.c.id.in_(evento_ids)).values(versao=eventos.c.versao + 1))
+        db.commit()
+        removidas += len(lote)
+        logger.info(f"Retenção: {len(lote)} autorizações removidas (total {removidas}).")
+
+
+def purge_expired_archive(db: Session) -> int:
+    return archive_service.purge_expired_archive()
+
+
+def expire_verification_codes(db: Session) -> int:
+    usuarios = models.Usuario.__table__
+    total = db.execute(
+        update(usuarios)
+        .where(usuarios.c.codigo_verificacao_expira_em < datetime.now())
+        .values(codigo_verificacao=None, codigo_verificacao_expira_em=None)
+    ).rowcount
+    db.commit()
+    return total
+
+
+def purge_idempotency_keys(db: Session) -> int:
+    total = idempotency.purge_expired(db)
+    db.commit()
+    return total
+
+
+def purge_staged_uploads(db: Session) -> int:
+    return purge_expired_uploads()
+
+
+def purge_dossiers(db: Session) -> int:
+    return get_storage().delete_older_than(DOSSIER_PREFIX, settings.DOSSIER_TTL_HOURS * 3600)
+
+
+def recalculate_event_stats(db: Session) -> int:
+    """Corrige divergências dos contadores incrementais, em lotes de eventos não arquivados."""
+    eventos = models.Evento.__table__
+    ultimo_id = 0
+    total = 0
+    while True:
+        ids = db.execute(
+            select(eventos.c.id)
+            .where(eventos.c.id > ultimo_id, eventos.c.arquivado_em.is_(None))
+            .order_by(eventos.c.id)
+            .limit(STATS_BATCH_SIZE)
+        ).scalars().all()
+        if not ids:
+            return total
+        total += stats_service.recalculate_event_stats(db, ids)
+        db.commit()
+        ultimo_id = ids[-1]
+
+
+def purge_job_history(db: Session) -> int:
+    limite = datetime.now() - timedelta(days=settings.SCHEDULER_HISTORY_DAYS)
+    execucoes = models.ExecucaoTarefa.__table__
+    total = db.execute(delete(execucoes).where(execucoes.c.iniciada_em < limite)).rowcount
+    db.commit()
+    return total
+
+
+# Agenda padrão (cron com 5 campos, horário do servidor); SCHEDULER_SCHEDULES substitui por nome
+JOBS: Dict[str, Job] = {job.nome: job for job in (
+    Job("particoes", "0 1 * * *", ensure_partitions),
+    Job("arquivar_eventos", "30 1 * * *", archive_closed_events, concessao_minutos=120),
+    Job("retencao", "0 2 * * *", purge_expired_authorizations, concessao_minutos=120),
+    Job("retencao_arquivo", "30 2 * * *", purge_expired_archive, concessao_minutos=60),
+    Job("estatisticas", "0 0 * * *", recalculate_event_stats, concessao_minutos=60),
+    Job("codigos_verificacao", "*/15 * * * *", expire_verification_codes, concessao_minutos=5),
+    Job("chaves_idempotencia", "10 * * * *", purge_idempotency_keys, concessao_minutos=10),
+    Job("uploads_pendentes", "20 * * * *", purge_staged_uploads, concessao_minutos=10),
+    Job("dossies", "40 * * * *", purge_dossiers, concessao_minutos=10),
+    Job("historico_tarefas", "50 3 * * *", purge_job_history, concessao_minutos=10),
+)}
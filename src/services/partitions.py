@@ -0,0 +1,145 @@
+# src/services/partitions.py
+"""
+Partições semestrais de Autorizacoes e Presencas (PostgreSQL, migração 0009).
+
+- `ensure_partitions` cria com antecedência as partições dos próximos semestres (função SQL
+  criar_particoes_semestre); sem elas as submissões cairiam na partição padrão.
+- `purge_expired_partitions` aplica a retenção: apaga os arquivos das autorizações de cada
+  semestre vencido e só então desanexa e remove as partições inteiras, sem DELETE linha a linha.
+  A retenção é por semestre completo: um semestre sai quando o fim dele passa do prazo.
+- `since_event` é a condição que permite ao planejador descartar as partições anteriores ao evento.
+
+Em bancos não particionados (SQLite do benchmark, PostgreSQL ainda sem a migração) nada disso se
+aplica e a retenção remove as autorizações em lotes (tarefa `retencao` em src/services/jobs.py).
+"""
+import re
+from datetime import date, datetime, timedelta
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy import text, true, update
+from sqlalchemy.orm import Session
+
+from src.core.config import settings
+from src.db import models
+from src.services import stats_service
+from src.services.file_service import delete_file
+from src.utils.logger import logger
+
+DEFAULT_SUFFIX = "padrao"
+_SUFFIX_PATTERN = re.compile(r"^\d{4}_[12]$")
+_BOUNDS_PATTERN = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+class Partition(NamedTuple):
+    sufixo: str
+    inicio: datetime
+    fim: datetime
+
+
+def _table(tabela: str, sufixo: str) -> str:
+    if sufixo != DEFAULT_SUFFIX and not _SUFFIX_PATTERN.match(sufixo):
+        raise ValueError(f"Sufixo de partição inválido: {sufixo!r}")
+    return f'"{tabela}_{sufixo}"'
+
+
+def since_event(criado_em: Optional[datetime], column=models.Autorizacao.submetido_em):
+    """
+    Condição sempre verdadeira para as autorizações (e presenças) de um evento, que são criadas depois
+    dele; com ela o PostgreSQL não visita as partições de semestres anteriores à criação do evento.
+    """
+    return column >= criado_em if criado_em is not None else true()
+
+
+def is_partitioned(db: Session) -> bool:
+    if db.get_bind().dialect.name != 'postgresql':
+        return False
+    return db.execute(text(
+        "SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass('\"Autorizacoes\"')"
+    )).scalar() or False
+
+
+def semester_start(dia: date) -> date:
+    return date(dia.year, 1 if dia.month <= 6 else 7, 1)
+
+
+def list_partitions(db: Session) -> List[Partition]:
+    """Partições semestrais de Autorizacoes, da mais antiga para a mais nova (sem a padrão)."""
+    rows = db.execute(text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = '\"Autorizacoes\"'::regclass"
+    )).all()
+    partitions = []
+    for nome, limites in rows:
+        match = _BOUNDS_PATTERN.search(limites)
+        if not match:
+            continue
+        partitions.append(Partition(
+            nome.removeprefix("Autorizacoes_"), datetime.fromisoformat(match[1]), datetime.fromisoformat(match[2])
+        ))
+    return sorted(partitions, key=lambda partition: partition.inicio)
+
+
+def ensure_partitions(db: Session, semestres: int = None) -> List[str]:
+    """Garante as partições do semestre atual e dos `semestres` seguintes; não faz commit."""
+    semestres = settings.PARTITIONS_AHEAD_SEMESTERS if semestres is None else semestres
+    dia = semester_start(date.today())
+    sufixos = []
+    for _ in range(semestres + 1):
+        sufixos.append(db.execute(text("SELECT criar_particoes_semestre(:dia)"), {"dia": dia}).scalar())
+        dia = semester_start(dia + timedelta(days=200))
+
+    # Linhas na partição padrão impedem criar a partição do período delas: precisam de atenção manual
+    na_padrao = db.execute(text(f"SELECT count(*) FROM {_table('Autorizacoes', DEFAULT_SUFFIX)}")).scalar()
+    if na_padrao:
+        logger.error(
+            f"Partições: {na_padrao} autorizações na partição padrão (sem partição semestral para a data). "
+            "Mova-as antes de criar a partição do período correspondente."
+        )
+    return sufixos
+
+
+def expired_partitions(db: Session, agora: datetime = None) -> List[Partition]:
+    limite = (agora or datetime.now()) - timedelta(days=settings.AUTHORIZATION_RETENTION_DAYS)
+    return [partition for partition in list_partitions(db) if partition.fim <= limite]
+
+
+def drop_partition(db: Session, partition: Partition) -> int:
+    """
+    Apaga os arquivos das autorizações do semestre e remove as partições dele (presenças primeiro,
+    por causa da chave estrangeira). Se algum arquivo não puder ser apagado, nada é removido do
+    banco (o erro sobe) e a próxima execução tenta de novo. Faz commit.
+    """
+    autorizacoes = _table("Autorizacoes", partition.sufixo)
+    presencas = _table("Presencas", partition.sufixo)
+
+    arquivos = db.execute(text(f"SELECT caminho_arquivo FROM {autorizacoes} WHERE caminho_arquivo IS NOT NULL")).scalars()
+    for caminho in arquivos:
+        delete_file(caminho)
+
+    total = db.execute(text(f"SELECT count(*) FROM {autorizacoes}")).scalar()
+    evento_ids = db.execute(text(f"SELECT DISTINCT evento_id FROM {autorizacoes}")).scalars().all()
+
+    for tabela, particao in (("Presencas", presencas), ("Autorizacoes", autorizacoes)):
+        db.execute(text(f'ALTER TABLE "{tabela}" DETACH PARTITION {particao}'))
+        db.execute(text(f"DROP TABLE {particao}"))
+
+    if evento_ids:
+        # Contadores e ETags dos eventos que perderam autorizações
+        stats_service.recalculate_event_stats(db, evento_ids)
+        eventos = models.Evento.__table__
+        db.execute(update(eventos).where(eventos.c.id.in_(evento_ids)).values(versao=eventos.c.versao + 1))
+    db.commit()
+    return total
+
+
+def purge_expired_partitions(db: Session, dry_run: bool = False) -> int:
+    """Remove os semestres além do prazo de retenção; retorna o total de autorizações removidas."""
+    removidas = 0
+    for partition in expired_partitions(db):
+        if dry_run:
+            logger.info(f"Partições: {partition.sufixo} ({partition.inicio:%d/%m/%Y} a {partition.fim:%d/%m/%Y}) seria removida.")
+            continue
+        total = drop_partition(db, partition)
+        removidas += total
+        logger.info(f"Partições: {partition.sufixo} removida ({total} autorizações).")
+    return removidas
@@ -0,0 +1,152 @@
+# src/services/realtime.py
+"""
+Avisos de mudança para os streams SSE dos professores.
+
+O aviso só diz "o evento X, do usuário Y, mudou na versão V"; o conteúdo é lido do feed de
+mudanças (change_feed), que é durável. Assim um aviso perdido é recuperado na reconexão
+(Last-Event-ID) ou no aviso seguinte.
+
+- PostgreSQL: NOTIFY na mesma transação da alteração (só é entregue no commit) e, em cada
+  worker, uma thread com uma conexão dedicada em LISTEN repassa os avisos aos streams locais.
+- Demais bancos (SQLite do benchmark): barramento local, publicado após o commit da sessão;
+  só alcança os streams do mesmo processo.
+"""
+import asyncio
+import json
+import select
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import Text, event, func
+from sqlalchemy import select as sql_select
+from sqlalchemy.orm import Session
+
+from src.db import models
+from src.db.session import engine
+from src.utils.logger import logger
+
+CHANNEL = "ifroautoriza_mudancas"
+_PENDING_KEY = "realtime_pendentes"
+# Intervalo de verificação da conexão em LISTEN e espera antes de reconectar após uma falha
+_LISTEN_POLL_SECONDS = 5.0
+_LISTEN_RETRY_SECONDS = 3.0
+
+
+def notify_event_change(db: Session, evento: models.Evento):
+    """Registra o aviso de mudança no evento; deve ser chamado antes do commit da alteração."""
+    if db.get_bind().dialect.name == 'postgresql':
+        payload = func.json_build_object(
+            'evento_id', evento.id, 'usuario_id', evento.usuario_id, 'versao', models.change_version()
+        ).cast(Text)
+        db.execute(sql_select(func.pg_notify(CHANNEL, payload)))
+    else:
+        versao = db.execute(sql_select(models.change_version())).scalar()
+        db.info.setdefault(_PENDING_KEY, []).append(
+            {"evento_id": evento.id, "usuario_id": evento.usuario_id, "versao": versao}
+        )
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_local_pending(session):
+    for payload in session.info.pop(_PENDING_KEY, []):
+        broker.publish(payload)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_local_pending(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+class Subscription:
+    """Fila de avisos de um stream. Guarda só a maior versão pendente: vários avisos viram uma consulta."""
+
+    def __init__(self, usuario_id: int, is_admin: bool, loop: asyncio.AbstractEventLoop):
+        self.usuario_id = usuario_id
+        self.is_admin = is_admin
+        self.loop = loop
+        self.wakeup = asyncio.Event()
+        self.versao_pendente: Optional[int] = None
+
+    def _deliver(self, versao: Optional[int]):
+        if versao is not None:
+            self.versao_pendente = max(versao, self.versao_pendente or versao)
+        self.wakeup.set()
+
+    def take_pending(self) -> Optional[int]:
+        versao, self.versao_pendente = self.versao_pendente, None
+        self.wakeup.clear()
+        return versao
+
+
+class ChangeBroker:
+    """Streams conectados neste processo; `publish` pode ser chamado de qualquer thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = set()
+        self._listener: Optional[threading.Thread] = None
+
+    def subscribe(self, usuario_id: int, is_admin: bool) -> Subscription:
+        subscription = Subscription(usuario_id, is_admin, asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions.add(subscription)
+            if engine.dialect.name == 'postgresql' and self._listener is None:
+                self._listener = threading.Thread(target=self._listen_postgres, name="realtime-listen", daemon=True)
+                self._listener.start()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, payload: Optional[dict]):
+        """Acorda os streams do dono do evento e dos admins; sem payload, acorda todos."""
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            if payload is None:
+                versao = None
+            elif subscription.is_admin or subscription.usuario_id == payload.get("usuario_id"):
+                versao = payload.get("versao")
+            else:
+                continue
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._deliver, versao)
+            except RuntimeError:
+                # Loop já encerrado (stream fechado durante o desligamento do worker)
+                self.unsubscribe(subscription)
+
+    def _listen_postgres(self):
+        while True:
+            connection = None
+            try:
+                # Conexão dedicada, fora do pool, em autocommit para receber os NOTIFY
+                connection = engine.raw_connection()
+                dbapi_connection = connection.driver_connection
+                connection.detach()
+                dbapi_connection.autocommit = True
+                dbapi_connection.cursor().execute(f"LISTEN {CHANNEL}")
+                logger.info(f"Realtime: escutando o canal '{CHANNEL}'.")
+                # Avisos podem ter sido perdidos enquanto não havia conexão: todos consultam de novo
+                self.publish(None)
+                while True:
+                    select.select([dbapi_connection], [], [], _LISTEN_POLL_SECONDS)
+                    dbapi_connection.poll()
+                    while dbapi_connection.notifies:
+                        notification = dbapi_connection.notifies.pop(0)
+                        try:
+                            self.publish(json.loads(notification.payload))
+                        except ValueError:
+                            logger.warning(f"Realtime: aviso inválido ignorado: {notification.payload!r}")
+            except Exception as e:
+                logger.error(f"Realtime: conexão de LISTEN perdida ({e}); reconectando em {_LISTEN_RETRY_SECONDS:.0f}s.")
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+                time.sleep(_LISTEN_RETRY_SECONDS)
+
+
+broker = ChangeBroker()
@@ -0,0 +1,388 @@
+# src/services/scheduler.py
+"""
+Agendador das tarefas periódicas (src/services/jobs.py), no lugar do cron com scripts avulsos.
+
+Cada worker da API roda uma thread que, a cada SCHEDULER_TICK_SECONDS, procura tarefas vencidas
+em TarefasAgendadas. Para executar, o worker precisa ganhar a concessão: um UPDATE condicional
+(próxima execução vencida e nenhuma concessão válida) que só afeta a linha em um deles, em qualquer
+banco. O vencedor executa, registra a execução em ExecucoesTarefas e calcula a próxima a partir do
+fim, sem recuperar as execuções perdidas enquanto a aplicação estava fora. Enquanto a tarefa roda, a
+concessão é renovada em segundo plano; se o worker cair no meio, ela vence depois de
+`concessao_minutos` e outro worker assume.
+"""
+import os
+import random
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from src.core import tracing
+from src.core.config import settings
+from src.db import models
+from src.db.session import SessionLocal
+from src.services.jobs import JOBS, Job
+from src.utils.logger import logger
+
+# Tamanho máximo da mensagem de erro guardada no histórico
+ERROR_MAX_LENGTH = 2000
+
+_tarefas = models.TarefaAgendada.__table__
+_execucoes = models.ExecucaoTarefa.__table__
+
+
+# --- AGENDA (cron) ---
+class CronSchedule:
+    """
+    Expressão cron de 5 campos (minuto, hora, dia do mês, mês, dia da semana com 0 ou 7 = domingo),
+    com `*`, listas, intervalos e passos (`*/15`, `1-5`, `0,30`), além de @hourly, @daily e @weekly.
+    Como no cron, se dia do mês e dia da semana estiverem restritos, basta um dos dois coincidir.
+    """
+    ALIASES = {"@hourly": "0 * * * *", "@daily": "0 0 * * *", "@midnight": "0 0 * * *", "@weekly": "0 0 * * 0"}
+    _LIMITS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, expressao: str):
+        self.expressao = expressao
+        campos = self.ALIASES.get(expressao.strip(), expressao).split()
+        if len(campos) != 5:
+            raise ValueError(f"Agenda inválida '{expressao}': são esperados 5 campos.")
+        minutos, horas, dias, meses, semana = (
+            self._parse_field(campo, minimo, maximo, expressao)
+            for campo, (minimo, maximo) in zip(campos, self._LIMITS)
+        )
+        self.minutos, self.horas, self.dias, self.meses = minutos, horas, dias, meses
+        self.semana = {dia % 7 for dia in semana}
+        self._dia_restrito = campos[2] != "*"
+        self._semana_restrita = campos[4] != "*"
+
+    @staticmethod
+    def _parse_field(campo: str, minimo: int, maximo: int, expressao: str) -> set:
+        valores = set()
+        for parte in campo.split(","):
+            intervalo, _, passo = parte.partition("/")
+            try:
+                passo = int(passo) if passo else 1
+                if intervalo == "*":
+                    inicio, fim = minimo, maximo
+                elif "-" in intervalo:
+                    inicio, fim = (int(valor) for valor in intervalo.split("-", 1))
+                else:
+                    inicio = int(intervalo)
+                    fim = maximo if passo > 1 else inicio
+            except ValueError:
+                raise ValueError(f"Agenda inválida '{expressao}': campo '{campo}'.")
+            if passo < 1 or not minimo <= inicio <= fim <= maximo:
+                raise ValueError(f"Agenda inválida '{expressao}': campo '{campo}' fora de {minimo}-{maximo}.")
+            valores.update(range(inicio, fim + 1, passo))
+        return valores
+
+    def _day_matches(self, momento: datetime) -> bool:
+        dia = momento.day in self.dias
+        semana = (momento.isoweekday() % 7) in self.semana
+        if self._dia_restrito and self._semana_restrita:
+            return dia or semana
+        return dia and semana
+
+    def next_after(self, momento: datetime) -> datetime:
+        """Primeiro minuto depois de `momento` que satisfaz a agenda."""
+        proximo = momento.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limite = proximo.year + 5
+        while proximo.year <= limite:
+            if proximo.month not in self.meses:
+                ano, mes = divmod(proximo.month, 12)
+                proximo = proximo.replace(year=proximo.year + ano, month=mes + 1, day=1, hour=0, minute=0)
+            elif not self._day_matches(proximo):
+                proximo = (proximo + timedelta(days=1)).replace(hour=0, minute=0)
+            elif proximo.hour not in self.horas:
+                proximo = (proximo + timedelta(hours=1)).replace(minute=0)
+            elif proximo.minute not in self.minutos:
+                proximo += timedelta(minutes=1)
+            else:
+                return proximo
+        raise ValueError(f"Agenda '{self.expressao}' nunca ocorre.")
+
+
+def executor_id() -> str:
+    """Identifica o worker nas concessões e no histórico (calculado na hora: com preload_app o módulo é importado no master)."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def job_schedule(job: Job) -> str:
+    return settings.SCHEDULER_SCHEDULES.get(job.nome, job.agenda)
+
+
+# --- CONCESSÃO E EXECUÇÃO ---
+def sync_jobs(db: Session, agora: datetime = None) -> int:
+    """Cadastra as tarefas novas e recalcula a próxima execução das que mudaram de agenda. Faz commit."""
+    agora = agora or datetime.now()
+    existentes = {tarefa.nome: tarefa.agenda for tarefa in db.query(models.TarefaAgendada.nome, models.TarefaAgendada.agenda)}
+    alteradas = 0
+    for job in JOBS.values():
+        agenda = job_schedule(job)
+        if existentes.get(job.nome) == agenda:
+            continue
+        proxima = CronSchedule(agenda).next_after(agora)
+        try:
+            if job.nome in existentes:
+                db.execute(update(_tarefas).where(_tarefas.c.nome == job.nome).values(agenda=agenda, proxima_execucao=proxima))
+            else:
+                db.add(models.TarefaAgendada(nome=job.nome, agenda=agenda, proxima_execucao=proxima))
+            db.commit()
+            alteradas += 1
+        except IntegrityError:
+            # Outro worker cadastrou ao mesmo tempo
+            db.rollback()
+    return alteradas
+
+
+def _claim(db: Session, job: Job, agora: datetime, forcar: bool = False) -> bool:
+    """Tenta obter a concessão da tarefa; só um worker consegue. Faz commit."""
+    condicoes = [_tarefas.c.nome == job.nome, or_(_tarefas.c.bloqueada_ate.is_(None), _tarefas.c.bloqueada_ate < agora)]
+    if not forcar:
+        condicoes.append(_tarefas.c.proxima_execucao <= agora)
+    obtida = db.execute(
+        update(_tarefas).where(*condicoes)
+        .values(bloqueada_ate=agora + timedelta(minutes=job.concessao_minutos), executor=executor_id())
+    ).rowcount == 1
+    if obtida:
+        # Execuções deixadas por um worker que caiu (a concessão dele venceu) contam como falha
+        db.execute(
+            update(_execucoes)
+            .where(_execucoes.c.tarefa == job.nome, _execucoes.c.status == 'executando')
+            .values(status='erro', finalizada_em=agora, erro="Interrompida: a concessão venceu antes do fim da execução.")
+        )
+    db.commit()
+    return obtida
+
+
+def _release(db: Session, job: Job, reagendar: bool):
+    valores = {"bloqueada_ate": None, "executor": None}
+    if reagendar:
+        valores["proxima_execucao"] = CronSchedule(job_schedule(job)).next_after(datetime.now())
+    db.execute(update(_tarefas).where(_tarefas.c.nome == job.nome, _tarefas.c.executor == executor_id()).values(**valores))
+    db.commit()
+
+
+class _LeaseHeartbeat:
+    """
+    Renova a concessão a cada terço de `concessao_minutos` enquanto a tarefa executa, para que uma
+    execução mais longa que o prazo não seja assumida por outro worker no meio. Só renova se a
+    concessão ainda for deste worker; se não for mais (ex.: o worker ficou parado além do prazo),
+    marca `perdida` e para.
+    """
+
+    def __init__(self, job: Job, intervalo: float = None):
+        self.job = job
+        self.intervalo = intervalo or job.concessao_minutos * 60 / 3
+        self.perdida = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"concessao-{job.nome}", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+    def _run(self):
+        while not self._stop.wait(self.intervalo):
+            db = SessionLocal()
+            try:
+                renovada = db.execute(
+                    update(_tarefas)
+                    .where(_tarefas.c.nome == self.job.nome, _tarefas.c.executor == executor_id())
+                    .values(bloqueada_ate=datetime.now() + timedelta(minutes=self.job.concessao_minutos))
+                ).rowcount == 1
+                db.commit()
+            except SQLAlchemyError as e:
+                # Falha passageira do banco: a concessão atual ainda vale, tenta de novo no próximo ciclo
+                logger.error(f"Agendador: erro ao renovar a concessão da tarefa '{self.job.nome}': {e}")
+                continue
+            finally:
+                db.close()
+            if not renovada:
+                self.perdida = True
+                logger.error(f"Agendador: a concessão da tarefa '{self.job.nome}' foi perdida durante a execução.")
+                return
+
+
+def run_job(job: Job, forcar: bool = False) -> Optional[models.ExecucaoTarefa]:
+    """
+    Executa a tarefa se obtiver a concessão (vencida, ou a qualquer momento com `forcar`); devolve a
+    execução registrada ou None quando outro worker já a tem. Uma execução forçada não altera a agenda.
+    """
+    db = SessionLocal()
+    try:
+        if not _claim(db, job, datetime.now(), forcar=forcar):
+            return None
+        execucao = models.ExecucaoTarefa(tarefa=job.nome, executor=executor_id(), iniciada_em=datetime.now(), status='executando')
+        db.add(execucao)
+        db.commit()
+
+        inicio = time.perf_counter()
+        # Cada execução é um trace (SQL e armazenamento como spans), sujeito à mesma amostragem
+        with tracing.trace(f"tarefa {job.nome}", **{"tarefa.nome": job.nome, "tarefa.execucao": execucao.id}) as raiz:
+            try:
+                with _LeaseHeartbeat(job) as concessao:
+                    execucao.itens = job.funcao(db)
+                if concessao.perdida:
+                    execucao.status = 'erro'
+                    execucao.erro = "A concessão foi perdida durante a execução; outro worker pode ter executado a tarefa ao mesmo tempo."
+                else:
+                    execucao.status = 'sucesso'
+            except Exception as e:
+                db.rollback()
+                execucao.status = 'erro'
+                execucao.erro = f"{type(e).__name__}: {e}"[:ERROR_MAX_LENGTH]
+                logger.exception(f"Agendador: tarefa '{job.nome}' falhou.")
+                if raiz:
+                    raiz.record_error(e)
+        execucao.finalizada_em = datetime.now()
+        execucao.duracao_ms = int((time.perf_counter() - inicio) * 1000)
+        db.commit()
+        logger.info(
+            f"Agendador: tarefa '{job.nome}' terminou com {execucao.status} em {execucao.duracao_ms}ms "
+            f"({execucao.itens if execucao.itens is not None else '-'} itens)."
+        )
+        db.refresh(execucao)
+        db.expunge(execucao)
+        _release(db, job, reagendar=not forcar)
+        return execucao
+    finally:
+        db.close()
+
+
+def run_due_jobs(agora: datetime = None) -> int:
+    """Executa as tarefas vencidas cuja concessão este worker obtiver; retorna quantas executou."""
+    agora = agora or datetime.now()
+    db = SessionLocal()
+    try:
+        vencidas = db.execute(
+            select(_tarefas.c.nome).where(
+                _tarefas.c.proxima_execucao <= agora,
+                or_(_tarefas.c.bloqueada_ate.is_(None), _tarefas.c.bloqueada_ate < agora),
+            )
+        ).scalars().all()
+    finally:
+        db.close()
+    # Embaralhadas: workers que acordam juntos disputam tarefas diferentes primeiro
+    random.shuffle(vencidas)
+    executadas = 0
+    for nome in vencidas:
+        job = JOBS.get(nome)
+        if job is not None and run_job(job) is not None:
+            executadas += 1
+    return executadas
+
+
+# --- MÉTRICAS ---
+class JobMetrics(NamedTuple):
+    nome: str
+    agenda: str
+    proxima_execucao: Optional[datetime]
+    executor: Optional[str]
+    execucoes: int
+    sucessos: int
+    erros: int
+    duracao_media_ms: Optional[float]
+    duracao_maxima_ms: Optional[int]
+    ultima_execucao: Optional[datetime]
+    ultimo_status: Optional[str]
+    ultimo_erro: Optional[str]
+
+
+def job_metrics(db: Session, desde: datetime = None) -> List[JobMetrics]:
+    """Resumo por tarefa das execuções desde `desde` (padrão: todo o histórico mantido)."""
+    filtros = [_execucoes.c.iniciada_em >= desde] if desde else []
+    agregados = {
+        linha.tarefa: linha for linha in db.query(
+            _execucoes.c.tarefa,
+            func.count().label("execucoes"),
+            func.count().filter(_execucoes.c.status == 'sucesso').label("sucessos"),
+            func.count().filter(_execucoes.c.status == 'erro').label("erros"),
+            func.avg(_execucoes.c.duracao_ms).label("duracao_media_ms"),
+            func.max(_execucoes.c.duracao_ms).label("duracao_maxima_ms"),
+        ).filter(*filtros).group_by(_execucoes.c.tarefa)
+    }
+    ultimas_ids = db.query(func.max(_execucoes.c.id)).group_by(_execucoes.c.tarefa).scalar_subquery()
+    ultimas = {
+        execucao.tarefa: execucao
+        for execucao in db.query(models.ExecucaoTarefa).filter(models.ExecucaoTarefa.id.in_(ultimas_ids))
+    }
+    tarefas: Dict[str, models.TarefaAgendada] = {tarefa.nome: tarefa for tarefa in db.query(models.TarefaAgendada)}
+
+    metricas = []
+    for nome, job in JOBS.items():
+        tarefa, agregado, ultima = tarefas.get(nome), agregados.get(nome), ultimas.get(nome)
+        metricas.append(JobMetrics(
+            nome=nome,
+            agenda=job_schedule(job),
+            proxima_execucao=tarefa.proxima_execucao if tarefa else None,
+            executor=tarefa.executor if tarefa else None,
+            execucoes=agregado.execucoes if agregado else 0,
+            sucessos=agregado.sucessos if agregado else 0,
+            erros=agregado.erros if agregado else 0,
+            duracao_media_ms=float(agregado.duracao_media_ms) if agregado and agregado.duracao_media_ms is not None else None,
+            duracao_maxima_ms=agregado.duracao_maxima_ms if agregado else None,
+            ultima_execucao=ultima.iniciada_em if ultima else None,
+            ultimo_status=ultima.status if ultima else None,
+            ultimo_erro=ultima.erro if ultima else None,
+        ))
+    return metricas
+
+
+# --- THREAD DOS WORKERS ---
+class SchedulerRunner:
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if not settings.SCHEDULER_ENABLED or self._thread is not None:
+            return
+        for job in JOBS.values():
+            # Agenda inválida em SCHEDULER_SCHEDULES falha na subida, não na madrugada
+            CronSchedule(job_schedule(job))
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        if self._thread is None:
+            return
+        self._stop.set()
+        # Uma tarefa em andamento não é interrompida: a concessão dela vence e outro worker a retoma
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        intervalo = settings.SCHEDULER_TICK_SECONDS
+        # Atraso inicial aleatório: os workers do gunicorn sobem juntos
+        if self._stop.wait(random.uniform(0, min(intervalo, 5))):
+            return
+        sincronizado = False
+        while not self._stop.is_set():
+            try:
+                if not sincronizado:
+                    db = SessionLocal()
+                    try:
+                        sync_jobs(db)
+                    finally:
+                        db.close()
+                    sincronizado = True
+                run_due_jobs()
+            except SQLAlchemyError as e:
+                # Ex.: banco fora do ar ou migração 0011 não aplicada; tenta de novo no próximo ciclo
+                logger.error(f"Agendador: erro ao consultar as tarefas: {e}")
+            self._stop.wait(intervalo)
+
+
+runner = SchedulerRunner()
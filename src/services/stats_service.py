@@ -0,0 +1,89 @@
+# src/services/stats_service.py
+from typing import Iterable, Optional
+
+from sqlalchemy import case, func, update
+from sqlalchemy.orm import Session
+
+from src.db import models
+
+# Coluna de EstatisticasEventos que conta cada status de autorização
+STATUS_COLUMNS = {
+    'pré-cadastrado': 'pre_cadastrados',
+    'submetido': 'submetidos',
+    'aprovado': 'aprovados',
+    'rejeitado': 'rejeitados',
+}
+
+
+def _apply_deltas(db: Session, evento_id: int, deltas: dict):
+    """
+    Soma os deltas na linha do evento com um UPDATE atômico (coluna = coluna + delta), na mesma
+    transação da alteração que os originou. Se o evento ainda não tem linha (ex.: criado antes da
+    tabela existir), recalcula a partir das tabelas de origem, que já incluem a alteração pendente.
+    """
+    deltas = {column: delta for column, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    table = models.EstatisticaEvento.__table__
+    values = {column: table.c[column] + delta for column, delta in deltas.items()}
+    values["atualizado_em"] = func.now()
+    db.flush()
+    result = db.execute(update(table).where(table.c.evento_id == evento_id).values(**values))
+    if result.rowcount == 0:
+        recalculate_event_stats(db, [evento_id])
+
+
+def register_event_created(evento: models.Evento):
+    """Cria a linha zerada do evento, para que as próximas alterações sejam só incrementos."""
+    evento.estatisticas = models.EstatisticaEvento(
+        pre_cadastrados=0, submetidos=0, aprovados=0, rejeitados=0, presentes=0
+    )
+
+
+def register_status_change(db: Session, evento_id: int, anterior: Optional[str], novo: Optional[str]):
+    """Registra uma autorização criada (anterior=None), removida (novo=None) ou que mudou de status."""
+    if anterior == novo:
+        return
+    deltas = {}
+    if anterior:
+        deltas[STATUS_COLUMNS[anterior]] = -1
+    if novo:
+        deltas[STATUS_COLUMNS[novo]] = deltas.get(STATUS_COLUMNS[novo], 0) + 1
+    _apply_deltas(db, evento_id, deltas)
+
+
+def register_attendance_change(db: Session, evento_id: int, estava_presente: bool, esta_presente: bool):
+    """Registra um aluno que passou a ter (ou deixou de ter) alguma presença na ida no evento."""
+    _apply_deltas(db, evento_id, {"presentes": int(esta_presente) - int(estava_presente)})
+
+
+def recalculate_event_stats(db: Session, evento_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Recalcula os contadores a partir de Autorizacoes e Presencas (eventos não arquivados, ou só os informados).
+    Usado no preenchimento inicial e para corrigir eventuais divergências; não faz commit.
+    """
+    status_counts = [
+        func.count(case((models.Autorizacao.status == status, 1))).label(column)
+        for status, column in STATUS_COLUMNS.items()
+    ]
+    # EXISTS por autorização usa o índice único (autorizacao_id, data_presenca) de Presencas
+    presente = models.Autorizacao.presencas.any(models.Presenca.presente_ida.is_(True))
+    query = db.query(
+        models.Evento.id,
+        *status_counts,
+        func.count(case((presente, 1))).label("presentes"),
+    ).outerjoin(models.Autorizacao, models.Autorizacao.evento_id == models.Evento.id).group_by(models.Evento.id)
+
+    if evento_ids is not None:
+        query = query.filter(models.Evento.id.in_(list(evento_ids)))
+    else:
+        # Eventos arquivados não têm mais linhas nas tabelas quentes: os contadores ficam como estavam
+        query = query.filter(models.Evento.arquivado_em.is_(None))
+
+    total = 0
+    for row in query.all():
+        values = dict(row._mapping)
+        values["evento_id"] = values.pop("id")
+        db.merge(models.EstatisticaEvento(**values))
+        total += 1
+    return total
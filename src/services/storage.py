@@ -0,0 +1,283 @@
+# src/services/storage.py
+"""
+Armazenamento dos arquivos das autorizações, escolhido por STORAGE_BACKEND.
+
+- local: arquivos em UPLOAD_DIRECTORY; as URLs pré-assinadas apontam para a própria API
+  (/arquivos/{token}), com um token curto assinado com o JWT_SECRET.
+- s3: bucket S3 ou compatível (MinIO); as URLs pré-assinadas vão direto ao bucket e os bytes
+  não passam pelos workers da API.
+
+As chaves são o valor de `caminho_arquivo` (nome gerado + extensão). Envios diretos ainda não
+vinculados a uma autorização ficam sob PENDING_PREFIX até a submissão; os de eventos arquivados
+(src/services/archive_service.py) ficam sob ARCHIVE_PREFIX, que pode ir para uma classe de
+armazenamento fria (regra de lifecycle do bucket ou diretório montado em outro disco).
+"""
+import os
+import shutil
+import time
+import uuid
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple, Optional
+from urllib.parse import quote
+
+from src.core.config import settings
+from src.core.security import create_transfer_token
+from src.core.tracing import traced_methods
+
+PENDING_PREFIX = "pendentes/"
+ARCHIVE_PREFIX = "arquivo/"
+# Dossiês em PDF gerados por evento (src/services/dossier.py), descartados após DOSSIER_TTL_HOURS
+DOSSIER_PREFIX = "dossies/"
+
+
+class StoredObject(NamedTuple):
+    tamanho: int
+    tipo_arquivo: Optional[str]
+
+
+def content_disposition(filename: Optional[str]) -> str:
+    return f"attachment; filename*=utf-8''{quote(filename or 'arquivo')}"
+
+
+class StorageBackend:
+    """Interface comum; `expires_in` em segundos."""
+    name = ""
+
+    def put(self, key: str, data: bytes, content_type: Optional[str] = None):
+        raise NotImplementedError
+
+    def put_file(self, key: str, path: Path, content_type: Optional[str] = None):
+        """Armazena um arquivo local e o remove (no backend local é só um rename)."""
+        raise NotImplementedError
+
+    def get(self, key: str) -> bytes:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> bool:
+        """Remove o objeto; False se ele não existia."""
+        raise NotImplementedError
+
+    def stat(self, key: str) -> Optional[StoredObject]:
+        raise NotImplementedError
+
+    def move(self, source_key: str, target_key: str):
+        """Renomeia o objeto; FileNotFoundError se a origem não existe (ex.: já movida)."""
+        raise NotImplementedError
+
+    def delete_older_than(self, prefix: str, max_age_seconds: int) -> int:
+        raise NotImplementedError
+
+    def presign_get(self, key: str, filename: Optional[str], content_type: Optional[str], expires_in: int) -> str:
+        raise NotImplementedError
+
+    def presign_put(self, key: str, content_type: str, size: int, expires_in: int) -> str:
+        raise NotImplementedError
+
+    def local_path(self, key: str) -> Optional[Path]:
+        """Caminho no disco, quando o backend é local (permite servir com FileResponse)."""
+        return None
+
+
+# Operações com I/O viram spans no trace da requisição (src/core/tracing.py)
+TRACED_OPERATIONS = ("put", "put_file", "get", "delete", "stat", "move", "delete_older_than")
+
+
+@traced_methods("armazenamento", TRACED_OPERATIONS)
+class LocalStorage(StorageBackend):
+    name = "local"
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if self.root.resolve() not in path.parents:
+            raise ValueError(f"Chave de arquivo inválida: {key!r}")
+        return path
+
+    def put(self, key, data, content_type=None):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+    def put_file(self, key, path, content_type=None):
+        target = self._path(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.replace(path, target)
+        except OSError:
+            # Outro sistema de arquivos: copia e remove
+            shutil.move(str(path), str(target))
+
+    def get(self, key):
+        return self._path(key).read_bytes()
+
+    def delete(self, key):
+        try:
+            self._path(key).unlink()
+            return True
+        except FileNotFoundError:
+            return False
+
+    def stat(self, key):
+        try:
+            return StoredObject(self._path(key).stat().st_size, None)
+        except FileNotFoundError:
+            return None
+
+    def move(self, source_key, target_key):
+        self.put_file(target_key, self._path(source_key))
+
+    def delete_older_than(self, prefix, max_age_seconds):
+        directory = self._path(prefix.rstrip("/"))
+        if not directory.is_dir():
+            return 0
+        limit = time.time() - max_age_seconds
+        removed = 0
+        for path in directory.iterdir():
+            try:
+                if path.is_file() and path.stat().st_mtime < limit:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        return removed
+
+    def presign_get(self, key, filename, content_type, expires_in):
+        token = create_transfer_token({"op": "get", "k": key, "fn": filename, "ct": content_type}, expires_in)
+        return f"{settings.API_V1_STR}/arquivos/{token}"
+
+    def presign_put(self, key, content_type, size, expires_in):
+        token = create_transfer_token({"op": "put", "k": key, "ct": content_type, "len": size}, expires_in)
+        return f"{settings.API_V1_STR}/arquivos/{token}"
+
+    def local_path(self, key):
+        return self._path(key)
+
+
+@traced_methods("armazenamento", TRACED_OPERATIONS)
+class S3Storage(StorageBackend):
+    """S3 ou compatível. O boto3 só é importado quando este backend é usado."""
+    name = "s3"
+
+    def __init__(self, bucket: str, prefix: str = "", region: str = "us-east-1", endpoint_url: Optional[str] = None,
+                 public_endpoint_url: Optional[str] = None, access_key_id: Optional[str] = None,
+                 secret_access_key: Optional[str] = None):
+        if not bucket:
+            raise ValueError("S3_BUCKET é obrigatório com STORAGE_BACKEND=s3.")
+        self.bucket = bucket
+        self.prefix = prefix
+        self._options = {
+            "region_name": region, "aws_access_key_id": access_key_id, "aws_secret_access_key": secret_access_key,
+        }
+        self._endpoint_url = endpoint_url
+        self._public_endpoint_url = public_endpoint_url or endpoint_url
+        self._client = None
+        self._presign_client = None
+
+    def _make_client(self, endpoint_url):
+        import boto3
+        from botocore.config import Config
+
+        # Endereçamento por caminho funciona com MinIO e com endpoints sem DNS curinga
+        config = Config(signature_version="s3v4", s3={"addressing_style": "path"} if endpoint_url else {})
+        return boto3.client("s3", endpoint_url=endpoint_url, config=config, **self._options)
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = self._make_client(self._endpoint_url)
+        return self._client
+
+    @property
+    def presign_client(self):
+        if self._presign_client is None:
+            self._presign_client = self._make_client(self._public_endpoint_url) \
+                if self._public_endpoint_url != self._endpoint_url else self.client
+        return self._presign_client
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def put(self, key, data, content_type=None):
+        extra = {"ContentType": content_type} if content_type else {}
+        self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=data, **extra)
+
+    def put_file(self, key, path, content_type=None):
+        extra = {"ContentType": content_type} if content_type else {}
+        self.client.upload_file(str(path), self.bucket, self._key(key), ExtraArgs=extra)
+        Path(path).unlink()
+
+    def get(self, key):
+        return self.client.get_object(Bucket=self.bucket, Key=self._key(key))["Body"].read()
+
+    def delete(self, key):
+        if self.stat(key) is None:
+            return False
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+        return True
+
+    def stat(self, key):
+        from botocore.exceptions import ClientError
+
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return StoredObject(head["ContentLength"], head.get("ContentType"))
+
+    def move(self, source_key, target_key):
+        from botocore.exceptions import ClientError
+
+        # Cópia feita pelo próprio S3, sem trafegar pela API
+        try:
+            self.client.copy_object(
+                Bucket=self.bucket, Key=self._key(target_key),
+                CopySource={"Bucket": self.bucket, "Key": self._key(source_key)},
+            )
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey"):
+                raise FileNotFoundError(source_key)
+            raise
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(source_key))
+
+    def delete_older_than(self, prefix, max_age_seconds):
+        # Em produção, prefira também uma regra de lifecycle do bucket para o prefixo
+        limit = time.time() - max_age_seconds
+        removed = 0
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix)):
+            old = [{"Key": item["Key"]} for item in page.get("Contents", []) if item["LastModified"].timestamp() < limit]
+            if old:
+                self.client.delete_objects(Bucket=self.bucket, Delete={"Objects": old, "Quiet": True})
+                removed += len(old)
+        return removed
+
+    def presign_get(self, key, filename, content_type, expires_in):
+        params = {"Bucket": self.bucket, "Key": self._key(key), "ResponseContentDisposition": content_disposition(filename)}
+        if content_type:
+            params["ResponseContentType"] = content_type
+        return self.presign_client.generate_presigned_url("get_object", Params=params, ExpiresIn=expires_in)
+
+    def presign_put(self, key, content_type, size, expires_in):
+        # Content-Type e Content-Length entram na assinatura: o cliente precisa enviá-los iguais
+        params = {"Bucket": self.bucket, "Key": self._key(key), "ContentType": content_type, "ContentLength": size}
+        return self.presign_client.generate_presigned_url("put_object", Params=params, ExpiresIn=expires_in)
+
+
+@lru_cache(maxsize=None)
+def get_storage() -> StorageBackend:
+    if settings.STORAGE_BACKEND == "local":
+        return LocalStorage(settings.UPLOAD_DIRECTORY)
+    if settings.STORAGE_BACKEND == "s3":
+        return S3Storage(
+            bucket=settings.S3_BUCKET, prefix=settings.S3_PREFIX, region=settings.S3_REGION,
+            endpoint_url=settings.S3_ENDPOINT_URL, public_endpoint_url=settings.S3_PUBLIC_ENDPOINT_URL,
+            access_key_id=settings.S3_ACCESS_KEY_ID, secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+        )
+    raise ValueError(f"STORAGE_BACKEND desconhecido: {settings.STORAGE_BACKEND!r} (use 'local' ou 's3').")
@@ -0,0 +1,333 @@
+# src/services/upload_staging.py
+"""
+Uploads retomáveis no estilo tus (criação, PATCH com Upload-Offset, HEAD para o progresso).
+
+Os blocos são gravados direto em UPLOAD_DIRECTORY/.staging/<id>.part e os metadados ficam em
+<id>.json ao lado, então qualquer worker atende qualquer bloco; o progresso é o tamanho do .part.
+Um flock no .part impede dois PATCH simultâneos no mesmo upload. Quando a submissão referencia
+o upload concluído, o arquivo vai para o armazenamento (no backend local, um rename sem cópia).
+Uploads não concluídos expiram em UPLOAD_STAGING_TTL_HOURS.
+
+Com o armazenamento em S3, o envio direto (create_direct_upload) é o caminho preferido: o cliente
+envia o arquivo por uma URL pré-assinada e o `upload_id` é um token assinado que identifica o
+objeto pendente; nenhum byte passa pela API.
+"""
+import base64
+import fcntl
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+import aiofiles
+from fastapi import HTTPException, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from jose import JWTError
+from starlette.requests import ClientDisconnect
+
+from src.core import tracing
+from src.core.config import settings
+from src.core.security import create_transfer_token, decode_transfer_token
+from src.services.file_service import new_stored_filename, save_upload_file, validate_file_size, validate_file_type
+from src.services.storage import PENDING_PREFIX, get_storage
+from src.utils.logger import logger
+
+TUS_VERSION = "1.0.0"
+OFFSET_CONTENT_TYPE = "application/offset+octet-stream"
+STAGING_DIRNAME = ".staging"
+# A limpeza oportunista (na criação de uploads) roda no máximo uma vez por intervalo em cada worker
+_PURGE_INTERVAL_SECONDS = 600
+_last_purge = 0.0
+
+
+def staging_dir() -> Path:
+    return Path(settings.UPLOAD_DIRECTORY) / STAGING_DIRNAME
+
+
+def _paths(upload_id: str):
+    try:
+        upload_id = str(uuid.UUID(upload_id))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload não encontrado ou expirado.")
+    base = staging_dir() / upload_id
+    return base.with_suffix(".part"), base.with_suffix(".json")
+
+
+def parse_metadata(header: Optional[str]) -> dict:
+    """Upload-Metadata do tus: pares "chave valor-base64" separados por vírgula."""
+    metadata = {}
+    for pair in (header or "").split(","):
+        key, _, value = pair.strip().partition(" ")
+        if not key:
+            continue
+        try:
+            metadata[key] = base64.b64decode(value, validate=True).decode() if value else ""
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Upload-Metadata inválido.")
+    return metadata
+
+
+def _remove(*paths: Path):
+    for path in paths:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _write_meta(meta_path: Path, meta: dict):
+    tmp_path = meta_path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(meta))
+    os.replace(tmp_path, meta_path)
+
+
+def create_upload(tamanho: int, nome_arquivo: str, tipo_arquivo: str) -> dict:
+    """Valida tipo e tamanho antes do primeiro byte e cria o arquivo de staging vazio."""
+    validate_file_type(tipo_arquivo, nome_arquivo)
+    validate_file_size(tamanho, nome_arquivo)
+    if tamanho <= 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Upload-Length inválido.")
+    _maybe_purge()
+
+    staging_dir().mkdir(parents=True, exist_ok=True)
+    upload_id = str(uuid.uuid4())
+    part_path, meta_path = _paths(upload_id)
+    now = time.time()
+    meta = {
+        "id": upload_id, "tamanho": tamanho, "nome_arquivo": nome_arquivo, "tipo_arquivo": tipo_arquivo,
+        "criado_em": now, "expira_em": now + settings.UPLOAD_STAGING_TTL_HOURS * 3600,
+    }
+    part_path.touch()
+    _write_meta(meta_path, meta)
+    logger.info(f"Upload retomável {upload_id} criado para '{nome_arquivo}' ({tamanho} bytes).")
+    return meta
+
+
+def get_upload(upload_id: str):
+    """Metadados e offset atual; uploads expirados são removidos e tratados como inexistentes."""
+    part_path, meta_path = _paths(upload_id)
+    try:
+        meta = json.loads(meta_path.read_text())
+        offset = part_path.stat().st_size
+    except (FileNotFoundError, ValueError):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload não encontrado ou expirado.")
+    if meta["expira_em"] < time.time():
+        _remove(part_path, meta_path)
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload não encontrado ou expirado.")
+    return meta, offset
+
+
+@contextmanager
+def _locked(part_path: Path):
+    try:
+        fd = os.open(part_path, os.O_RDWR)
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload não encontrado ou expirado.")
+    try:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Outro envio deste upload está em andamento.")
+        yield
+    finally:
+        os.close(fd)
+
+
+async def append_chunk(upload_id: str, offset: int, chunks: AsyncIterator[bytes]):
+    """
+    Grava o corpo do PATCH a partir de `offset`, que precisa ser o tamanho atual do .part.
+    Se a conexão cair no meio, os bytes já recebidos ficam e o cliente retoma do novo offset.
+    """
+    meta, _ = get_upload(upload_id)
+    part_path, _ = _paths(upload_id)
+    with _locked(part_path):
+        current = part_path.stat().st_size
+        if offset != current:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Upload-Offset {offset} não confere com o recebido até agora ({current}).",
+            )
+        remaining = meta["tamanho"] - current
+        with tracing.span("upload.gravar_bloco", **{"upload.offset": offset}) as span:
+            async with aiofiles.open(part_path, "r+b") as f:
+                await f.seek(current)
+                try:
+                    async for chunk in chunks:
+                        if len(chunk) > remaining:
+                            await f.truncate(current)
+                            raise HTTPException(
+                                status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+                                detail="O bloco ultrapassa o Upload-Length declarado.",
+                            )
+                        await f.write(chunk)
+                        remaining -= len(chunk)
+                except ClientDisconnect:
+                    logger.info(f"Upload retomável {upload_id}: conexão encerrada em {meta['tamanho'] - remaining} bytes.")
+            if span:
+                span.set(**{"upload.bytes": meta["tamanho"] - remaining - current})
+        return meta, meta["tamanho"] - remaining
+
+
+def delete_upload(upload_id: str):
+    get_upload(upload_id)
+    part_path, meta_path = _paths(upload_id)
+    with _locked(part_path):
+        _remove(part_path, meta_path)
+    logger.info(f"Upload retomável {upload_id} cancelado pelo cliente.")
+
+
+def claim_upload(upload_id: str) -> dict:
+    """Move o upload concluído para UPLOAD_DIRECTORY e devolve as colunas do arquivo da autorização."""
+    meta, _ = get_upload(upload_id)
+    part_path, meta_path = _paths(upload_id)
+    with _locked(part_path):
+        size = part_path.stat().st_size
+        if size != meta["tamanho"]:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Upload incompleto: {size} de {meta['tamanho']} bytes recebidos.",
+            )
+        filename = new_stored_filename(meta["nome_arquivo"])
+        get_storage().put_file(filename, part_path, meta["tipo_arquivo"])
+        _remove(meta_path)
+    logger.info(f"Upload retomável {upload_id} ('{meta['nome_arquivo']}') salvo como '{filename}'")
+    return {
+        "caminho_arquivo": filename, "nome_arquivo_original": meta["nome_arquivo"],
+        "tamanho_arquivo": size, "tipo_arquivo": meta["tipo_arquivo"],
+    }
+
+
+def create_direct_upload(tamanho: int, nome_arquivo: str, tipo_arquivo: str) -> dict:
+    """
+    URL pré-assinada para o cliente enviar o arquivo direto ao armazenamento. O `upload_id`
+    devolvido é um token com a chave pendente e os dados declarados, conferidos na submissão.
+    """
+    validate_file_type(tipo_arquivo, nome_arquivo)
+    validate_file_size(tamanho, nome_arquivo)
+    if tamanho <= 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Tamanho do arquivo inválido.")
+
+    key = f"{PENDING_PREFIX}{new_stored_filename(nome_arquivo)}"
+    expires_in = settings.STORAGE_PRESIGN_EXPIRES_SECONDS
+    upload_id = create_transfer_token(
+        {"op": "envio", "k": key, "fn": nome_arquivo, "ct": tipo_arquivo, "len": tamanho},
+        settings.UPLOAD_STAGING_TTL_HOURS * 3600,
+    )
+    return {
+        "upload_id": upload_id,
+        "url": get_storage().presign_put(key, tipo_arquivo, tamanho, expires_in),
+        "metodo": "PUT",
+        "cabecalhos": {"Content-Type": tipo_arquivo},
+        "expira_em": datetime.fromtimestamp(time.time() + expires_in),
+    }
+
+
+def claim_direct_upload(upload_id: str) -> dict:
+    """Confere o objeto enviado diretamente e o move da área pendente para a chave definitiva."""
+    try:
+        claims = decode_transfer_token(upload_id, "envio")
+    except JWTError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload não encontrado ou expirado.")
+
+    storage = get_storage()
+    stored = storage.stat(claims["k"])
+    if stored is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="O arquivo ainda não foi enviado ou já foi usado em outra submissão.",
+        )
+    if stored.tamanho != claims["len"]:
+        storage.delete(claims["k"])
+        logger.warning(f"Envio direto '{claims['k']}' descartado: {stored.tamanho} bytes, declarados {claims['len']}.")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="O arquivo enviado não corresponde ao tamanho declarado. Envie novamente.",
+        )
+
+    filename = new_stored_filename(claims["fn"])
+    try:
+        storage.move(claims["k"], filename)
+    except FileNotFoundError:
+        # Outra submissão concorrente com o mesmo upload_id chegou primeiro
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="O arquivo ainda não foi enviado ou já foi usado em outra submissão.",
+        )
+    logger.info(f"Envio direto '{claims['k']}' ('{claims['fn']}') salvo como '{filename}' ({storage.name})")
+    return {
+        "caminho_arquivo": filename, "nome_arquivo_original": claims["fn"],
+        "tamanho_arquivo": stored.tamanho, "tipo_arquivo": claims["ct"],
+    }
+
+
+def _is_resumable_upload_id(upload_id: str) -> bool:
+    try:
+        uuid.UUID(upload_id)
+        return True
+    except ValueError:
+        return False
+
+
+async def store_submission_file(arquivo: Optional[UploadFile], upload_id: Optional[str]) -> dict:
+    """Arquivo da submissão: enviado no próprio formulário, por upload retomável ou por envio direto."""
+    if arquivo is not None and not arquivo.filename:
+        # Campo de arquivo vazio no formulário
+        arquivo = None
+    if (arquivo is None) == (upload_id is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Envie o arquivo ou o upload_id de um upload concluído (apenas um deles).",
+        )
+    if upload_id is not None:
+        claim = claim_upload if _is_resumable_upload_id(upload_id) else claim_direct_upload
+        return await run_in_threadpool(claim, upload_id)
+    saved_file_path = await save_upload_file(arquivo)
+    return {
+        "caminho_arquivo": saved_file_path, "nome_arquivo_original": arquivo.filename,
+        "tamanho_arquivo": arquivo.size, "tipo_arquivo": arquivo.content_type,
+    }
+
+
+def purge_expired_uploads() -> int:
+    """Remove uploads vencidos (e .part sem metadados mais antigos que o prazo) e envios diretos não usados."""
+    removed = get_storage().delete_older_than(PENDING_PREFIX, settings.UPLOAD_STAGING_TTL_HOURS * 3600)
+    directory = staging_dir()
+    if not directory.is_dir():
+        return removed
+    now = time.time()
+    for meta_path in directory.glob("*.json"):
+        try:
+            expired = json.loads(meta_path.read_text())["expira_em"] < now
+        except (FileNotFoundError, ValueError, KeyError):
+            continue
+        if expired:
+            _remove(meta_path.with_suffix(".part"), meta_path)
+            removed += 1
+    for part_path in directory.glob("*.part"):
+        try:
+            orphan = not part_path.with_suffix(".json").exists() and \
+                part_path.stat().st_mtime < now - settings.UPLOAD_STAGING_TTL_HOURS * 3600
+        except FileNotFoundError:
+            continue
+        if orphan:
+            _remove(part_path)
+            removed += 1
+    return removed
+
+
+def _maybe_purge():
+    global _last_purge
+    now = time.time()
+    if now - _last_purge < _PURGE_INTERVAL_SECONDS:
+        return
+    _last_purge = now
+    try:
+        removed = purge_expired_uploads()
+        if removed:
+            logger.info(f"Uploads retomáveis: {removed} uploads vencidos removidos.")
+    except OSError as e:
+        logger.error(f"Erro ao remover uploads retomáveis vencidos: {e}")
@@ -0,0 +1,38 @@
+from typing import Optional
+
+from fastapi import Request, Response
+
+# O cliente sempre revalida; com o ETag a revalidação custa uma leitura da versão do evento
+CACHE_CONTROL = "private, no-cache"
+
+
+def event_etag(evento_id: int, versao: int, recurso: str) -> str:
+    """ETag fraco (o corpo pode ser comprimido pelo middleware) derivado da versão do evento."""
+    return f'W/"{recurso}-{evento_id}-{versao}"'
+
+
+def resource_etag(recurso: str, *partes) -> str:
+    """ETag fraco de um recurso que não pertence a um evento (ex.: listagem de campi)."""
+    return f'W/"{"-".join(str(parte) for parte in (recurso, *partes))}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Comparação fraca do If-None-Match (lista separada por vírgulas ou "*")."""
+    header: Optional[str] = request.headers.get("if-none-match")
+    if not header:
+        return False
+    wanted = etag.removeprefix("W/")
+    return any(
+        candidate == "*" or candidate.removeprefix("W/") == wanted
+        for candidate in (value.strip() for value in header.split(","))
+    )
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+def set_etag(response: Response, etag: str) -> Response:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return response
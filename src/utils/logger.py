@@ -1,7 +1,18 @@
 import logging
+from contextvars import ContextVar
 from logging.handlers import RotatingFileHandler
 from pathlib import Path
 
+# Trace da requisição (ou tarefa) em andamento, definido por src/core/tracing.py; "-" fora de um trace
+trace_id_var: ContextVar[str] = ContextVar("trace_id", default="-")
+
+
+class TraceIdFilter(logging.Filter):
+    def filter(self, record):
+        record.trace_id = trace_id_var.get()
+        return True
+
+
 def setup_logger():
     # --- INÍCIO DA CORREÇÃO ---
     # Define o caminho para o diretório raiz do projeto (indo "para cima" duas vezes a partir de src/utils/)
@@ -23,16 +34,19 @@ def setup_logger():
         logger.handlers.clear()
 
     # Formatter
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - [%(trace_id)s] %(message)s')
+    trace_filter = TraceIdFilter()
 
     # Console handler
     ch = logging.StreamHandler()
     ch.setFormatter(formatter)
+    ch.addFilter(trace_filter)
     logger.addHandler(ch)
 
     # File handler - agora usando o caminho absoluto
     fh = RotatingFileHandler(log_file_path, maxBytes=1024*1024*5, backupCount=5)
     fh.setFormatter(formatter)
+    fh.addFilter(trace_filter)
     logger.addHandler(fh)
     
     return logger
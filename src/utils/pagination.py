@@ -0,0 +1,22 @@
+import base64
+import json
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(*values) -> str:
+    """Codifica a chave da última linha da página (ex.: nome_aluno, id) em um cursor opaco."""
+    raw = json.dumps(values, default=str, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """Decodifica um cursor gerado por `encode_cursor`; cursores inválidos viram 400."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != size:
+            raise ValueError
+        return values
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor de paginação inválido.")
@@ -0,0 +1,68 @@
+from functools import lru_cache
+from typing import Callable, Iterable, List, Optional, Type
+
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, TypeAdapter
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+@lru_cache(maxsize=None)
+def list_adapter(schema: Type[BaseModel]) -> TypeAdapter:
+    """TypeAdapter de List[schema], criado uma única vez por schema."""
+    return TypeAdapter(List[schema])
+
+
+def dump_orm_list(schema: Type[BaseModel], rows: Iterable) -> bytes:
+    """
+    Converte objetos do ORM direto para JSON: uma única validação (from_attributes)
+    e a serialização no pydantic-core, sem passar por dicts intermediários nem pelo json da stdlib.
+    """
+    adapter = list_adapter(schema)
+    return adapter.dump_json(adapter.validate_python(list(rows), from_attributes=True))
+
+
+def orm_response(schema: Type[BaseModel], obj, status_code: int = 200) -> Response:
+    """Mesmo caminho de `orm_list_response` para um único objeto do ORM."""
+    content = schema.model_validate(obj, from_attributes=True).model_dump_json()
+    return Response(content=content, status_code=status_code, media_type=JSON_MEDIA_TYPE)
+
+
+def orm_list_response(schema: Type[BaseModel], rows: Iterable, status_code: int = 200) -> Response:
+    """
+    Resposta pronta para listas. Como é um `Response`, o FastAPI não valida de novo contra o
+    `response_model` (que continua declarado na rota apenas para a documentação).
+    """
+    return Response(content=dump_orm_list(schema, rows), status_code=status_code, media_type=JSON_MEDIA_TYPE)
+
+
+def stream_orm_list(
+    schema: Type[BaseModel],
+    rows: Iterable,
+    batch_size: int = 500,
+    on_close: Optional[Callable[[], None]] = None,
+) -> StreamingResponse:
+    """
+    Serializa um array JSON em lotes enquanto as linhas chegam do banco (use com `yield_per`),
+    sem montar a lista inteira em memória. `on_close` é chamado ao final (ex.: fechar a sessão).
+    """
+    def generate():
+        try:
+            yield b"["
+            first = True
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    yield (b"" if first else b",") + dump_orm_list(schema, batch)[1:-1]
+                    first = False
+                    batch = []
+            if batch:
+                yield (b"" if first else b",") + dump_orm_list(schema, batch)[1:-1]
+            yield b"]"
+        finally:
+            if on_close:
+                on_close()
+
+    return StreamingResponse(generate(), media_type=JSON_MEDIA_TYPE)